@@ -74,25 +74,28 @@ def normalize(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     统一解析入口：先判断来源（version 1/4），再调用对应 adapter 解析，最后由 normalizer 写入 _source。
     """
     format_type = identify_data_source(payload)
-    logger.debug(f"识别数据源类型: {format_type.value}")
+    logger.debug("识别数据源类型: %s", format_type.value)
     
     if format_type == WebhookFormat.PROMETHEUS_ALERTMANAGER:
         alerts = parse_prometheus(payload)
         for a in alerts:
             a["_source"] = "prometheus"
-        logger.info(f"Prometheus Alertmanager 解析完成，共 {len(alerts)} 条告警")
+        logger.info("Prometheus Alertmanager 解析完成，共 %d 条告警", len(alerts))
         return alerts
     elif format_type == WebhookFormat.GRAFANA_UNIFIED_ALERTING:
         alerts = parse_grafana(payload)
         for a in alerts:
             a["_source"] = "grafana"
-        logger.info(f"Grafana Unified Alerting 解析完成，共 {len(alerts)} 条告警")
+        logger.info("Grafana Unified Alerting 解析完成，共 %d 条告警", len(alerts))
         return alerts
     elif format_type == WebhookFormat.SINGLE_ALERT:
         alerts = parse_single_alert(payload)
-        logger.info(f"单条告警格式解析完成，共 {len(alerts)} 条告警")
+        logger.info("单条告警格式解析完成，共 %d 条告警", len(alerts))
         return alerts
     else:
         # 未知格式，返回空列表
-        logger.warning(f"无法识别的数据源格式，payload 顶层字段: {list(payload.keys()) if isinstance(payload, dict) else '非字典类型'}")
+        logger.warning(
+            "无法识别的数据源格式，payload 顶层字段: %s",
+            list(payload.keys()) if isinstance(payload, dict) else "非字典类型",
+        )
         return []
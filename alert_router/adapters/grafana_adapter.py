@@ -14,6 +14,9 @@ from . import build_alert_object
 
 logger = logging.getLogger("alert-router")
 
+# 旧版 valueString 中的当前值：var='B' labels={...} value=123
+_VALUE_STRING_RE = re.compile(r"var='B' labels=\{.*?\} value=(\d+)")
+
 
 def _parse_current_value(alert: Dict[str, Any]) -> str:
     """
@@ -27,7 +30,7 @@ def _parse_current_value(alert: Dict[str, Any]) -> str:
     except (AttributeError, TypeError):
         pass
     value_string = alert.get("valueString") or ""
-    match = re.search(r"var='B' labels=\{.*?\} value=(\d+)", value_string)
+    match = _VALUE_STRING_RE.search(value_string)
     if match:
         return match.group(1)
     return ""
@@ -83,7 +86,7 @@ def parse(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     alerts: List[Dict[str, Any]] = []
     if "alerts" in payload and isinstance(payload["alerts"], list):
         raw_alerts = payload["alerts"]
-        logger.debug(f"Grafana Unified Alerting 收到 {len(raw_alerts)} 条原始告警")
+        logger.debug("Grafana Unified Alerting 收到 %d 条原始告警", len(raw_alerts))
         for alert in raw_alerts:
             # 添加来源标识到告警对象（labels 保持原始）
             raw_labels = dict(alert.get("labels") or {})
@@ -94,7 +97,7 @@ def parse(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
             current_value = _parse_current_value(alert)
             if current_value:
                 annotations["当前值"] = current_value
-                logger.debug(f"Grafana 告警解析到当前值: {current_value}")
+                logger.debug("Grafana 告警解析到当前值: %s", current_value)
 
             alert_obj = build_alert_object(
                 alert=alert,
@@ -14,6 +14,9 @@ from . import build_alert_object
 
 logger = logging.getLogger("alert-router")
 
+# summary 中的当前值："当前值：XXX" 或 "当前值: XXX"
+_SUMMARY_VALUE_RE = re.compile(r'当前值[：:]\s*([^\s|]+)')
+
 
 def _extract_value_from_summary(summary: str) -> str:
     """
@@ -25,8 +28,7 @@ def _extract_value_from_summary(summary: str) -> str:
     """
     if not summary:
         return ""
-    # 尝试匹配 "当前值：XXX" 或 "当前值: XXX"
-    match = re.search(r'当前值[：:]\s*([^\s|]+)', summary)
+    match = _SUMMARY_VALUE_RE.search(summary)
     if match:
         return match.group(1).strip()
     return ""
@@ -152,7 +154,7 @@ def parse(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
         logger.warning("Prometheus payload 中 alerts 字段不是列表类型")
         return []
 
-    logger.debug(f"Prometheus Alertmanager 收到 {len(raw_alerts)} 条原始告警")
+    logger.debug("Prometheus Alertmanager 收到 %d 条原始告警", len(raw_alerts))
 
     # 同组多条告警合并为一条发送；从各条告警汇总各种实体类型（pod、instance、service_name等）
     if len(raw_alerts) > 1 and payload.get("groupKey"):
@@ -214,8 +216,8 @@ def parse(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
         
         # 提取每个实体的值（支持pod、instance、service_name等多种类型）
         entity_values = _build_entity_values(raw_alerts)
-        if entity_values:
-            logger.debug(f"Prometheus 合并告警：提取到 {len(entity_values)} 个实体的值: {list(entity_values.keys())}")
+        if entity_values and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Prometheus 合并告警：提取到 %d 个实体的值: %s", len(entity_values), list(entity_values.keys()))
         
         common_annotations: Dict[str, Any] = dict(payload.get("commonAnnotations") or {})
         first = raw_alerts[0]
@@ -232,12 +234,12 @@ def parse(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
         }
         if receiver_name:
             merged["_receiver"] = receiver_name
-        logger.info(f"Prometheus 将 {len(raw_alerts)} 条告警合并为 1 条发送 (groupKey: {payload.get('groupKey')})")
+        logger.info("Prometheus 将 %d 条告警合并为 1 条发送 (groupKey: %s)", len(raw_alerts), payload.get("groupKey"))
         return [merged]
 
     alerts: List[Dict[str, Any]] = []
     receiver_name = payload.get("receiver")
-    logger.debug(f"Prometheus 单独处理 {len(raw_alerts)} 条告警 (receiver: {receiver_name})")
+    logger.debug("Prometheus 单独处理 %d 条告警 (receiver: %s)", len(raw_alerts), receiver_name)
     for alert in raw_alerts:
         raw_labels = dict(alert.get("labels") or {})
         labels: Dict[str, Any] = dict(raw_labels)
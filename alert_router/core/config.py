@@ -70,7 +70,7 @@ def load_config() -> Tuple[Dict, Dict[str, Channel]]:
         raise FileNotFoundError(error_msg)
     
     if logger:
-        logger.info(f"正在加载配置文件: {path}")
+        logger.info("正在加载配置文件: %s", path)
     
     with open(path, "r", encoding="utf-8") as f:
         raw = yaml.safe_load(f)
@@ -118,6 +118,8 @@ def load_config() -> Tuple[Dict, Dict[str, Channel]]:
         # 如果代理开关关闭，则不使用代理
         if not proxy_enabled:
             proxy = None
+        # Channel 只读且可哈希，代理以排序后的 (协议, 地址) 元组保存
+        proxy = tuple(sorted(proxy.items())) if isinstance(proxy, dict) and proxy else None
         
         # send_resolved 默认为 True（如果未配置）
         send_resolved = v.get("send_resolved", True)
@@ -130,9 +132,9 @@ def load_config() -> Tuple[Dict, Dict[str, Channel]]:
             enabled_count += 1
     
     if logger:
-        logger.info(f"配置加载完成：共 {len(channels)} 个渠道，其中 {enabled_count} 个已启用")
+        logger.info("配置加载完成：共 %d 个渠道，其中 %d 个已启用", len(channels), enabled_count)
         if global_proxy_enabled and global_proxy:
-            logger.debug(f"全局代理已启用: {global_proxy}")
+            logger.debug("全局代理已启用: %s", global_proxy)
         elif not global_proxy_enabled:
             logger.debug("全局代理已禁用")
     
@@ -4,17 +4,19 @@
 提供统一的日志配置，支持文件输出和日志轮转。
 不在本模块内自动实例化，由 app 在启动时显式调用 setup_logging。
 已配置标记挂在 logger 上，避免模块被多次导入时重复添加 handler（同一条日志打两遍）。
+业务线程只把日志记录放入内存队列，文件/控制台写入由后台 QueueListener 线程完成。
 """
 
 import inspect
 import json
 import logging
 import os
+import queue
+import secrets
 import sys
-import uuid
 from contextvars import ContextVar
 from datetime import datetime, timezone
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
 from typing import Any, Dict, Optional
 
@@ -22,6 +24,8 @@ from typing import Any, Dict, Optional
 _ATTR_CONFIGURED = "_alert_router_logging_configured"
 _TRACE_ID_CTX: ContextVar[str] = ContextVar("alert_router_trace_id", default="-")
 _ORIGINAL_RECORD_FACTORY = logging.getLogRecordFactory()
+# 后台写日志的监听线程（setup_logging 时启动，stop_logging 时停止并刷盘）
+_queue_listener: Optional[QueueListener] = None
 
 
 def _get_caller_class_name() -> Optional[str]:
@@ -159,6 +163,27 @@ class ConsoleFormatter(logging.Formatter):
         return head + msg
 
 
+# formatter 无状态，模块级各建一个，setup_logging 按 log_format 选用
+_FORMATTERS: Dict[str, logging.Formatter] = {
+    "json": JsonFormatter(),
+    "human": ConsoleFormatter(),
+}
+
+
+class _InProcessQueueHandler(QueueHandler):
+    """进程内队列 handler：只在入队时固定 message，保留 exc_info 与 extra 字段交给后台 formatter。
+
+    标准 QueueHandler.prepare 会把异常栈拼进 message 并清掉 exc_info（为跨进程 pickle 准备），
+    这里队列与监听线程同进程，无需序列化，JSON 日志仍可单独输出 exception 字段。
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # 入队前渲染 message，避免后台线程格式化时参数对象已被调用方修改
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
 def setup_logging(
     log_dir: str,
     log_file: str,
@@ -181,6 +206,7 @@ def setup_logging(
     Returns:
         logging.Logger: 配置好的 logger 实例
     """
+    global _queue_listener
     logger = logging.getLogger("alert-router")
     if getattr(logger, _ATTR_CONFIGURED, False):
         return logger
@@ -204,33 +230,69 @@ def setup_logging(
     logger.handlers.clear()
     
     fmt = (log_format or "human").strip().lower()
-    formatter = JsonFormatter() if fmt == "json" else ConsoleFormatter()
-    trace_filter = TraceIdFilter()
+    formatter = _FORMATTERS["json" if fmt == "json" else "human"]
 
-    # 文件 handler（带轮转），仅一个
+    # 文件 handler（带轮转），仅一个；delay=True 到第一条日志写入时才打开文件
     file_handler = RotatingFileHandler(
         log_file_path,
         maxBytes=max_bytes,
         backupCount=backup_count,
-        encoding='utf-8'
+        encoding='utf-8',
+        delay=True,
     )
     file_handler.setLevel(log_level)
     file_handler.setFormatter(formatter)
-    file_handler.addFilter(trace_filter)
-    logger.addHandler(file_handler)
+    handlers = [file_handler]
 
     # 控制台：与文件使用同一 formatter，保证 tail/journal 与文件观感一致
     if sys.stderr.isatty():
         console_handler = logging.StreamHandler(sys.stderr)
         console_handler.setLevel(log_level)
         console_handler.setFormatter(formatter)
-        console_handler.addFilter(trace_filter)
-        logger.addHandler(console_handler)
+        handlers.append(console_handler)
+
+    # logger 上只挂队列 handler：traceId 依赖当前请求的 contextvars，必须在入队前（业务线程内）注入
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    queue_handler = _InProcessQueueHandler(log_queue)
+    queue_handler.setLevel(log_level)
+    queue_handler.addFilter(TraceIdFilter())
+    logger.addHandler(queue_handler)
+
+    _queue_listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _queue_listener.start()
     
     setattr(logger, _ATTR_CONFIGURED, True)
     return logger
 
 
+def stop_logging() -> None:
+    """停止后台日志线程，写完队列中剩余的日志并关闭文件（应用关闭时调用）。"""
+    global _queue_listener
+    listener, _queue_listener = _queue_listener, None
+    if listener is None:
+        return
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+
+
+def route_to_queue(name: str) -> None:
+    """
+    让其它 logger（如 uvicorn.access）改走 alert-router 的日志队列，由后台线程写文件/控制台，
+    不在事件循环线程上同步写 stderr。需在 setup_logging 之后、且在 uvicorn 配置日志之后调用。
+
+    Args:
+        name: 要接管的 logger 名称
+    """
+    source = logging.getLogger("alert-router")
+    queue_handlers = [h for h in source.handlers if isinstance(h, QueueHandler)]
+    if not queue_handlers:
+        return
+    target = logging.getLogger(name)
+    target.handlers = queue_handlers
+    target.propagate = False
+
+
 def get_logger(name: str = "alert-router") -> logging.Logger:
     """
     获取 logger 实例
@@ -245,5 +307,5 @@ def get_logger(name: str = "alert-router") -> logging.Logger:
 
 
 def new_trace_id() -> str:
-    """生成新的 traceId。"""
-    return str(uuid.uuid4())[:12]
+    """生成新的 traceId（12 位十六进制，与原 uuid 截断长度一致，省去 UUID 构造与格式化）。"""
+    return secrets.token_hex(6)
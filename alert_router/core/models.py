@@ -1,13 +1,43 @@
 """
 数据模型定义
 """
-from dataclasses import dataclass
-from typing import Dict, Optional
+from dataclasses import dataclass, fields
+from typing import Optional, Tuple
 
 
-@dataclass
+def _with_slots(cls):
+    """
+    为 dataclass 添加 __slots__（Python 3.9 不支持 dataclass(slots=True)，按 3.10 的做法重建类）
+
+    字段默认值已固化在生成的 __init__ 中，去掉同名类属性后再声明 slots，
+    实例不再带 __dict__，属性访问走描述符、内存占用更小。
+    """
+    cls_dict = dict(cls.__dict__)
+    field_names = tuple(f.name for f in fields(cls))
+    cls_dict["__slots__"] = field_names
+    for name in field_names:
+        cls_dict.pop(name, None)
+    cls_dict.pop("__dict__", None)
+    cls_dict.pop("__weakref__", None)
+    new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+    # frozen 生成的 __setattr__/__delattr__ 通过闭包引用原类（type(self) is cls 判断），
+    # 不改指向新类则实例判断失效，赋值会在 super(cls, self) 处抛 TypeError 而不是 FrozenInstanceError
+    for value in cls_dict.values():
+        value = getattr(value, "__func__", value)
+        for cell in getattr(value, "__closure__", None) or ():
+            try:
+                if cell.cell_contents is cls:
+                    cell.cell_contents = new_cls
+            except ValueError:
+                # 空 cell（变量尚未赋值）
+                continue
+    return new_cls
+
+
+@_with_slots
+@dataclass(frozen=True)
 class Channel:
-    """告警渠道配置"""
+    """告警渠道配置（加载后只读；所有字段可哈希，可直接作为缓存键）"""
     name: str
     type: str
     enabled: bool = True  # 开关：是否启用此渠道
@@ -15,7 +45,7 @@ class Channel:
     template: Optional[str] = None
     bot_token: Optional[str] = None
     chat_id: Optional[str] = None
-    proxy: Optional[Dict[str, str]] = None  # 代理配置，格式: {"http": "socks5://proxy:port", "https": "socks5://proxy:port"} 或 {"http": "http://proxy:port", "https": "https://proxy:port"}
+    proxy: Optional[Tuple[Tuple[str, str], ...]] = None  # 代理配置，按协议排序的 (协议, 代理地址) 元组，如 (("http", "socks5h://proxy:port"), ("https", "socks5h://proxy:port"))；使用时 dict(proxy) 即为 requests 的 proxies
     proxy_enabled: bool = True  # 开关：是否启用代理（此渠道）
     send_resolved: bool = True  # 是否发送 resolved 状态的告警（默认发送）
-    image_enabled: bool = False  # 是否对该渠道启用 Prometheus 趋势图发送（仅 Telegram）
\ No newline at end of file
+    image_enabled: bool = False  # 是否对该渠道启用 Prometheus 趋势图发送（仅 Telegram）
@@ -2,6 +2,7 @@
 工具函数模块
 """
 import re
+from functools import lru_cache
 from datetime import datetime, timedelta
 from typing import Optional
 
@@ -11,6 +12,17 @@ logger = get_logger("alert-router")
 
 INVALID_TIME_STRINGS = {"未知时间", "未知恢复时间", "0001-01-01T00:00:00Z"}
 
+# description 中的 UTC 时间：2025-03-28 00:30:15.418 +0000 UTC
+_DESCRIPTION_TIME_RE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3} \+0000 UTC)")
+# 已是本地格式的时间：YYYY-MM-DD HH:MM:SS
+_LOCAL_TIME_RE = re.compile(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$")
+# Grafana/Prometheus ISO 8601 时间：基础部分、小数秒、时区
+_ISO_TIME_RE = re.compile(r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?([+-]\d{2}:\d{2}|Z)?")
+# SSH SHA256 指纹
+_SSH_FINGERPRINT_RE = re.compile(r"(SHA256:)([A-Za-z0-9+/=]+)")
+# http:// 或 https:// 开头的 URL
+_URL_RE = re.compile(r"(https?://[^\s\)]+)")
+
 
 def detect_template_format(template_path: str) -> Optional[str]:
     """检测模板文件的格式（Telegram parse_mode）"""
@@ -32,119 +44,131 @@ def convert_to_cst(time_str: str) -> str:
     - 2024-01-15T10:30:00.123Z
     - 2026-02-10T01:47:51.122980105+08:00（Grafana ISO 8601 带时区）
     - 2024-01-15 10:30:15.418 +0000 UTC
+
+    同一告警的时间会被多个渠道、多个模板重复转换，字符串输入按值缓存结果。
     """
     if not time_str or time_str in INVALID_TIME_STRINGS:
         return time_str
+    try:
+        if isinstance(time_str, str):
+            result = _convert_to_cst_cached(time_str)
+        else:
+            result = _convert_to_cst(time_str)
+    except Exception as e:
+        logger.error("时间转换异常: %s, 错误: %s", time_str, e)
+        return time_str  # 如果解析失败，返回原值
+    # 告警在缓存之外记录：同一个无法解析的时间每次出现都要留下日志
+    if result is None:
+        logger.warning("无法解析时间格式: %s，返回原值", time_str)
+        return time_str
+    return result
+
+
+def _pick_utc_format(time_str: str) -> Optional[str]:
+    """
+    根据字符串形态选择 UTC 时间的解析格式（纯字符串探测，不触发异常）
+
+    - 2025-03-28T00:30:15.418Z -> %Y-%m-%dT%H:%M:%S.%f（Z 由调用方去掉）
+    - 2025-03-28T00:30:15Z -> %Y-%m-%dT%H:%M:%S
+    - 2025-03-28 00:30:15.418 +0000 UTC -> %Y-%m-%d %H:%M:%S.%f +0000 UTC
+    - 其它返回 None
+    """
+    if time_str.endswith("Z"):
+        if "." in time_str[-11:]:
+            return "%Y-%m-%dT%H:%M:%S.%f"
+        return "%Y-%m-%dT%H:%M:%S"
+    if time_str.endswith(" UTC"):
+        return "%Y-%m-%d %H:%M:%S.%f +0000 UTC"
+    return None
+
 
+@lru_cache(maxsize=4096)
+def _convert_to_cst_cached(time_str: str) -> Optional[str]:
+    return _convert_to_cst(time_str)
+
+
+def _convert_to_cst(time_str: str) -> Optional[str]:
+    """convert_to_cst 的实际解析逻辑（不带缓存、不记告警）；无法解析时返回 None"""
     original_time = time_str  # 保存原始值用于日志
 
-    try:
-        # 已是本地格式 YYYY-MM-DD HH:MM:SS（本函数输出或其它环节传入），直接返回避免重复解析
-        if re.match(r"^\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}$", time_str.strip()):
-            return time_str.strip()
-
-        # Grafana/Prometheus ISO 8601 格式（带时区，如 +08:00 或 Z）
-        # 微秒超过 6 位需截断，否则 fromisoformat 可能失败
-        m = re.match(
-            r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2})(\.\d+)?([+-]\d{2}:\d{2}|Z)?",
-            time_str.strip()
-        )
-        if m:
-            base, frac, tz = m.groups()
-            # 截断微秒至 6 位
-            if frac:
-                frac = frac[:7] if len(frac) > 7 else frac  # .123456 或 .123
-            else:
-                frac = ""
-            # Z 表示 UTC，fromisoformat 需 +00:00
-            tz_str = "+00:00" if (tz == "Z" or time_str.strip().endswith("Z")) else (tz or "+00:00")
-            normalized = base + frac + tz_str
-
-            # 有些 Python 版本/实现对这种 normalized 格式支持不一致，
-            # 如果 fromisoformat 失败，则不要直接抛出，而是回退到下面的 strptime 分支。
-            try:
-                dt = datetime.fromisoformat(normalized)
-            except ValueError:
-                dt = None
-
-            if dt is not None:
-                # 统一转为 CST：已是 +08 则仅格式化，UTC 则加 8 小时
-                if dt.tzinfo:
-                    from datetime import timezone
-                    cst_dt = dt.astimezone(timezone(timedelta(hours=8)))
-                    result = cst_dt.strftime("%Y-%m-%d %H:%M:%S")
-                else:
-                    cst_dt = dt + timedelta(hours=8)
-                    result = cst_dt.strftime("%Y-%m-%d %H:%M:%S")
-                logger.debug(f"时间转换: {original_time} -> {result} (CST)")
-                return result
-
-        # 尝试解析 %Y-%m-%dT%H:%M:%S.%fZ 格式（例如：2025-03-28T00:30:15.418Z）
+    # 已是本地格式 YYYY-MM-DD HH:MM:SS（本函数输出或其它环节传入），直接返回避免重复解析
+    if _LOCAL_TIME_RE.match(time_str.strip()):
+        return time_str.strip()
+
+    # Grafana/Prometheus ISO 8601 格式（带时区，如 +08:00 或 Z）
+    # 微秒超过 6 位需截断，否则 fromisoformat 可能失败
+    m = _ISO_TIME_RE.match(time_str.strip())
+    if m:
+        base, frac, tz = m.groups()
+        # 截断微秒至 6 位
+        if frac:
+            frac = frac[:7] if len(frac) > 7 else frac  # .123456 或 .123
+        else:
+            frac = ""
+        # Z 表示 UTC，fromisoformat 需 +00:00
+        tz_str = "+00:00" if (tz == "Z" or time_str.strip().endswith("Z")) else (tz or "+00:00")
+        normalized = base + frac + tz_str
+
+        # 有些 Python 版本/实现对这种 normalized 格式支持不一致，
+        # 如果 fromisoformat 失败，则不要直接抛出，而是回退到下面的 strptime 分支。
         try:
-            clean_time = time_str.rstrip("Z")
-            dt = datetime.strptime(clean_time, "%Y-%m-%dT%H:%M:%S.%f")
-            # 直接加 8 小时
-            cst_dt = dt + timedelta(hours=8)
-            result = cst_dt.strftime("%Y-%m-%d %H:%M:%S")
-            logger.debug(f"时间转换: {original_time} (UTC) -> {result} (CST)")
-            return result
+            dt = datetime.fromisoformat(normalized)
         except ValueError:
-            pass
-        
-        # 尝试解析 %Y-%m-%dT%H:%M:%SZ 格式（不带毫秒）
-        try:
-            clean_time = time_str.rstrip("Z")
-            dt = datetime.strptime(clean_time, "%Y-%m-%dT%H:%M:%S")
-            # 直接加 8 小时
-            cst_dt = dt + timedelta(hours=8)
-            result = cst_dt.strftime("%Y-%m-%d %H:%M:%S")
-            logger.debug(f"时间转换: {original_time} (UTC) -> {result} (CST)")
+            dt = None
+
+        if dt is not None:
+            # 统一转为 CST：已是 +08 则仅格式化，UTC 则加 8 小时
+            if dt.tzinfo:
+                from datetime import timezone
+                cst_dt = dt.astimezone(timezone(timedelta(hours=8)))
+                result = cst_dt.strftime("%Y-%m-%d %H:%M:%S")
+            else:
+                cst_dt = dt + timedelta(hours=8)
+                result = cst_dt.strftime("%Y-%m-%d %H:%M:%S")
+            logger.debug("时间转换: %s -> %s (CST)", original_time, result)
             return result
-        except ValueError:
-            pass
-        
-        # 尝试解析 %Y-%m-%d %H:%M:%S.%f +0000 UTC 格式（例如：2025-03-28 00:30:15.418 +0000 UTC）
+
+    # 按字符串形态选定唯一的 strptime 格式，避免逐个格式抛出/捕获 ValueError
+    fmt = _pick_utc_format(time_str)
+    if fmt is not None:
         try:
-            dt = datetime.strptime(time_str, "%Y-%m-%d %H:%M:%S.%f +0000 UTC")
+            dt = datetime.strptime(time_str.rstrip("Z"), fmt)
+        except ValueError:
+            dt = None
+        if dt is not None:
             # 直接加 8 小时
             cst_dt = dt + timedelta(hours=8)
             result = cst_dt.strftime("%Y-%m-%d %H:%M:%S")
-            logger.debug(f"时间转换: {original_time} (UTC) -> {result} (CST)")
+            logger.debug("时间转换: %s (UTC) -> %s (CST)", original_time, result)
             return result
-        except ValueError:
-            pass
-        
-        # 如果都解析失败，记录警告并返回原值
-        logger.warning(f"无法解析时间格式: {original_time}，返回原值")
-        return time_str
-    except Exception as e:
-        logger.error(f"时间转换异常: {original_time}, 错误: {e}")
-        return time_str  # 如果解析失败，返回原值
+
+    # 都解析失败：由 convert_to_cst 记录警告并返回原值
+    return None
+
+
+def _replace_time_match(match) -> str:
+    return convert_to_cst(match.group(0))
+
+
+@lru_cache(maxsize=1024)
+def _replace_times_cached(description: str) -> str:
+    try:
+        # 使用正则替换所有匹配项
+        return _DESCRIPTION_TIME_RE.sub(_replace_time_match, description)
+    except Exception:
+        return description  # 如果替换失败，返回原值
 
 
 def replace_times_in_description(description: str) -> str:
     """
     替换 description 中的时间（严格匹配不破坏原有格式）
-    将 UTC 时间替换为北京时间
+    将 UTC 时间替换为北京时间（同一 description 被多个渠道渲染时只替换一次）
     """
     if not description:
         return description
-    
-    try:
-        # 精确匹配时间部分的正则表达式：2025-03-28 00:30:15.418 +0000 UTC
-        time_pattern = r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3} \+0000 UTC)"
-        
-        # 定义替换函数
-        def replace_match(match):
-            original_time = match.group(0)
-            beijing_time = convert_to_cst(original_time)
-            return beijing_time
-        
-        # 使用正则替换所有匹配项
-        updated_description = re.sub(time_pattern, replace_match, description)
-        return updated_description
-    except Exception as e:
-        return description  # 如果替换失败，返回原值
+    if not isinstance(description, str):
+        return description
+    return _replace_times_cached(description)
 
 
 def mask_ssh_fingerprint(text: str) -> str:
@@ -159,7 +183,7 @@ def mask_ssh_fingerprint(text: str) -> str:
             return f"{prefix}xxxxxxxx"
         return f"{prefix}{fingerprint[:-8]}xxxxxxxx"
 
-    return re.sub(r"(SHA256:)([A-Za-z0-9+/=]+)", replace_match, text)
+    return _SSH_FINGERPRINT_RE.sub(replace_match, text)
 
 
 def url_to_link(text: str) -> str:
@@ -169,14 +193,11 @@ def url_to_link(text: str) -> str:
     """
     if not text or not isinstance(text, str):
         return text
-    
-    # 匹配 http:// 或 https:// 开头的 URL
-    url_pattern = r"(https?://[^\s\)]+)"
-    
+
     def replace_url(match):
         url = match.group(1)
         # 移除 URL 末尾可能存在的标点符号（除了在 HTML 标签中）
         url_clean = url.rstrip(".,;:!?)")
         return f"<a href=\"{url_clean}\">{url_clean}</a>"
     
-    return re.sub(url_pattern, replace_url, text)
+    return _URL_RE.sub(replace_url, text)
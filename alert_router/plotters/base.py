@@ -7,13 +7,50 @@ from datetime import datetime, timezone
 from zoneinfo import ZoneInfo
 from typing import Dict, List, Tuple, Optional
 import platform
+import threading
 
 import matplotlib
 import matplotlib.dates as mdates
 import matplotlib.pyplot as plt
+import requests
+from requests.adapters import HTTPAdapter
 
 matplotlib.use("Agg")
 
+# pyplot 的当前图、rcParams 与 kaleido 导出进程都是进程级共享状态，不是线程安全的。
+# 多条告警在线程池中并发处理时，取数（HTTP）可以并发，绘图与导出必须持此锁串行执行。
+PLOT_LOCK = threading.Lock()
+
+# 出图取数（Prometheus / Grafana API）共用的连接池会话；代理按请求通过 proxies 传入。
+# 不配置重试：出图失败只影响是否带图，不应因重试拖慢告警发送
+_query_session: Optional[requests.Session] = None
+_query_session_lock = threading.Lock()
+
+
+def get_query_session() -> requests.Session:
+    """获取出图取数共用的 HTTP 会话（首次调用时创建，进程内复用连接）"""
+    global _query_session
+    session = _query_session
+    if session is not None:
+        return session
+    with _query_session_lock:
+        if _query_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=16)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _query_session = session
+        return _query_session
+
+
+def close_query_session() -> None:
+    """关闭出图取数会话（应用关闭时调用）"""
+    global _query_session
+    with _query_session_lock:
+        if _query_session is not None:
+            _query_session.close()
+            _query_session = None
+
 # 尝试导入 Plotly（可选）
 try:
     import plotly.graph_objects as go
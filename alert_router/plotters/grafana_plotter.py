@@ -19,6 +19,7 @@ import requests
 
 from ..core.logging_config import get_logger
 from ..core.http_metrics import request_with_metrics
+from .base import PLOT_LOCK, get_query_session
 
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt  # noqa: E402
@@ -78,7 +79,7 @@ def generate_plot_from_grafana_generator_url(
             parsed = urlparse(generator_url)
             if parsed.scheme and parsed.netloc:
                 effective_grafana_url = f"{parsed.scheme}://{parsed.netloc}"
-                logger.debug(f"从 generatorURL 提取 Grafana URL: {effective_grafana_url}")
+                logger.debug("从 generatorURL 提取 Grafana URL: %s", effective_grafana_url)
         except Exception:
             pass
     logger.info(
@@ -190,7 +191,7 @@ def _generate_from_prometheus_query(
             "从 Grafana generatorURL 提取查询，请求 Prometheus query_range: api=%s",
             prometheus_api,
         )
-        session = requests.Session()
+        session = get_query_session()
         response = request_with_metrics(
             session,
             "GET",
@@ -208,163 +209,165 @@ def _generate_from_prometheus_query(
             logger.info("Prometheus query_range 无可绘制数据，跳过出图")
             return None
 
-        # 创建图表 - 使用更大的尺寸
-        fig, ax = plt.subplots(figsize=(14, 7), dpi=150)
-        
-        # 设置中文字体支持
-        import platform
-        if platform.system() == 'Darwin':  # macOS
-            plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'PingFang SC', 'STHeiti', 'Arial']
-        elif platform.system() == 'Linux':
-            plt.rcParams['font.sans-serif'] = ['WenQuanYi Micro Hei', 'DejaVu Sans', 'Liberation Sans']
-        else:  # Windows
-            plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial']
-        plt.rcParams['axes.unicode_minus'] = False
-        
-        plotted = 0
-        # 使用更鲜艳、对比度更好的颜色方案
-        colors = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', '#e67e22', '#34495e']
-        # 如果数据系列超过预设颜色数量，使用调色板生成更多颜色
-        if len(result) > len(colors):
-            colors = plt.cm.Set2(range(len(result)))
-        
-        for idx, series in enumerate(result):
-            values = series.get("values") or []
-            if not values:
-                continue
-            xs = []
-            ys = []
-            for item in values:
-                if not isinstance(item, (list, tuple)) or len(item) < 2:
+        # 绘图与导出持锁串行，见 PLOT_LOCK 说明
+        with PLOT_LOCK:
+            # 创建图表 - 使用更大的尺寸
+            fig, ax = plt.subplots(figsize=(14, 7), dpi=150)
+        
+            # 设置中文字体支持
+            import platform
+            if platform.system() == 'Darwin':  # macOS
+                plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'PingFang SC', 'STHeiti', 'Arial']
+            elif platform.system() == 'Linux':
+                plt.rcParams['font.sans-serif'] = ['WenQuanYi Micro Hei', 'DejaVu Sans', 'Liberation Sans']
+            else:  # Windows
+                plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial']
+            plt.rcParams['axes.unicode_minus'] = False
+        
+            plotted = 0
+            # 使用更鲜艳、对比度更好的颜色方案
+            colors = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', '#e67e22', '#34495e']
+            # 如果数据系列超过预设颜色数量，使用调色板生成更多颜色
+            if len(result) > len(colors):
+                colors = plt.cm.Set2(range(len(result)))
+        
+            for idx, series in enumerate(result):
+                values = series.get("values") or []
+                if not values:
                     continue
-                try:
-                    ts = float(item[0])
-                    val = float(item[1])
-                except (TypeError, ValueError):
+                xs = []
+                ys = []
+                for item in values:
+                    if not isinstance(item, (list, tuple)) or len(item) < 2:
+                        continue
+                    try:
+                        ts = float(item[0])
+                        val = float(item[1])
+                    except (TypeError, ValueError):
+                        continue
+                    # 将 UTC 时间转换为 UTC+8
+                    utc_time = datetime.fromtimestamp(ts, tz=timezone.utc)
+                    utc8_time = utc_time.astimezone(ZoneInfo("Asia/Shanghai"))
+                    xs.append(utc8_time)
+                    ys.append(val)
+                if not xs:
                     continue
-                # 将 UTC 时间转换为 UTC+8
-                utc_time = datetime.fromtimestamp(ts, tz=timezone.utc)
-                utc8_time = utc_time.astimezone(ZoneInfo("Asia/Shanghai"))
-                xs.append(utc8_time)
-                ys.append(val)
-            if not xs:
-                continue
             
-            # 确保数据点按时间排序
-            sorted_pairs = sorted(zip(xs, ys), key=lambda x: x[0])
-            xs, ys = zip(*sorted_pairs) if sorted_pairs else ([], [])
+                # 确保数据点按时间排序
+                sorted_pairs = sorted(zip(xs, ys), key=lambda x: x[0])
+                xs, ys = zip(*sorted_pairs) if sorted_pairs else ([], [])
             
-            if not xs:
-                continue
+                if not xs:
+                    continue
             
-            label = _build_series_label(series.get("metric") or {})
-            # 绘制数据线 - 更粗更明显
-            ax.plot(xs, ys, linewidth=3.0, label=label, color=colors[idx % len(colors)], marker='o', markersize=4, alpha=0.95, zorder=5-idx)
-            plotted += 1
+                label = _build_series_label(series.get("metric") or {})
+                # 绘制数据线 - 更粗更明显
+                ax.plot(xs, ys, linewidth=3.0, label=label, color=colors[idx % len(colors)], marker='o', markersize=4, alpha=0.95, zorder=5-idx)
+                plotted += 1
 
-        if plotted == 0:
-            plt.close(fig)
-            logger.info("Prometheus query_range 结果无法解析为曲线，跳过出图")
-            return None
+            if plotted == 0:
+                plt.close(fig)
+                logger.info("Prometheus query_range 结果无法解析为曲线，跳过出图")
+                return None
 
-        # 优化图表样式 - 使用实际的 alertname 作为标题
-        chart_title = alertname if alertname else "Grafana Alert Trend"
-        ax.set_title(chart_title, fontsize=20, fontweight='bold', pad=30, color='#ffffff')
-        
-        # X轴标签显示告警时间（UTC+8，到秒）
-        if alert_time:
-            try:
-                # 解析告警时间并转换为 UTC+8
-                from dateutil import parser
-                alert_dt = parser.parse(alert_time)
-                if alert_dt.tzinfo is None:
-                    # 如果没有时区信息，假设是 UTC
-                    alert_dt = alert_dt.replace(tzinfo=timezone.utc)
-                # 转换为 UTC+8
-                alert_dt_utc8 = alert_dt.astimezone(ZoneInfo("Asia/Shanghai"))
-                # 格式化为字符串：年-月-日 时:分:秒
-                xlabel_text = alert_dt_utc8.strftime('%Y-%m-%d %H:%M:%S')
-            except Exception:
-                # 如果解析失败，使用默认标签
-                xlabel_text = "Time (UTC+8)"
-        else:
-            xlabel_text = "Time (UTC+8)"
-        
-        ax.set_xlabel(xlabel_text, fontsize=14, color='#ffffff', fontweight='normal')
+            # 优化图表样式 - 使用实际的 alertname 作为标题
+            chart_title = alertname if alertname else "Grafana Alert Trend"
+            ax.set_title(chart_title, fontsize=20, fontweight='bold', pad=30, color='#ffffff')
         
-        # Y轴不显示标签，保持简洁
-        ax.set_ylabel("", fontsize=0)
-        
-        # 优化Y轴数值格式 - 使用K格式（类似Grafana）
-        def format_y_value(x, p):
-            if abs(x) >= 1000:
-                return f'{x/1000:.2f} K'.rstrip('0').rstrip('.')
-            elif x == int(x):
-                return f'{int(x)}'
+            # X轴标签显示告警时间（UTC+8，到秒）
+            if alert_time:
+                try:
+                    # 解析告警时间并转换为 UTC+8
+                    from dateutil import parser
+                    alert_dt = parser.parse(alert_time)
+                    if alert_dt.tzinfo is None:
+                        # 如果没有时区信息，假设是 UTC
+                        alert_dt = alert_dt.replace(tzinfo=timezone.utc)
+                    # 转换为 UTC+8
+                    alert_dt_utc8 = alert_dt.astimezone(ZoneInfo("Asia/Shanghai"))
+                    # 格式化为字符串：年-月-日 时:分:秒
+                    xlabel_text = alert_dt_utc8.strftime('%Y-%m-%d %H:%M:%S')
+                except Exception:
+                    # 如果解析失败，使用默认标签
+                    xlabel_text = "Time (UTC+8)"
             else:
-                return f'{x:.1f}'
-        ax.yaxis.set_major_formatter(plt.FuncFormatter(format_y_value))
-        ax.tick_params(axis='y', labelsize=12, colors='#ffffff', width=1)
-        ax.tick_params(axis='x', labelsize=11, colors='#ffffff', width=1)
-        
-        # 改进网格样式 - 更明显
-        ax.grid(True, linestyle="--", alpha=0.4, linewidth=1.0, color='#ffffff')
-        ax.set_axisbelow(True)
-        
-        # 设置坐标轴颜色
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_color('#ffffff')
-        ax.spines['bottom'].set_color('#ffffff')
-        ax.spines['left'].set_linewidth(2)
-        ax.spines['bottom'].set_linewidth(2)
-        
-        # 优化图例显示 - 放在右侧
-        if plotted > 0:
-            legend = ax.legend(
-                loc="center left",
-                bbox_to_anchor=(1.02, 0.5),
-                fontsize=12,
-                framealpha=0.95,
-                fancybox=True,
-                shadow=False,
-                edgecolor='#ffffff',
-                facecolor='#1a1a2e',
-                borderpad=1.0,
-                labelspacing=0.8,
-                handlelength=2.0,
-                handletextpad=0.8
-            )
-            for text in legend.get_texts():
-                text.set_color('#ffffff')
-                text.set_fontweight('normal')
-        
-        # 优化时间轴显示 - 只显示时间（时:分:秒），不显示日期
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S', tz=ZoneInfo("Asia/Shanghai")))
-        # 根据时间范围自动调整刻度间隔
-        if len(xs) > 0:
-            time_span = (max(xs) - min(xs)).total_seconds()
-            if time_span <= 300:  # 5分钟以内，每30秒一个刻度
-                ax.xaxis.set_major_locator(mdates.SecondLocator(interval=30))
-            elif time_span <= 900:  # 15分钟以内，每1分钟一个刻度
-                ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=1))
-            elif time_span <= 3600:  # 1小时以内，每5分钟一个刻度
-                ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=5))
-            else:  # 超过1小时，每15分钟一个刻度
-                ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=15))
-        fig.autofmt_xdate(rotation=45)
-        
-        # 优化背景色 - 使用深色主题（类似Grafana）
-        fig.patch.set_facecolor('#1e1e1e')  # 深色背景
-        ax.set_facecolor('#2b2b2b')  # 图表区域深灰色
-        
-        # 确保图表紧凑但不会裁剪内容
-        fig.tight_layout(pad=3.0)
+                xlabel_text = "Time (UTC+8)"
+        
+            ax.set_xlabel(xlabel_text, fontsize=14, color='#ffffff', fontweight='normal')
+        
+            # Y轴不显示标签，保持简洁
+            ax.set_ylabel("", fontsize=0)
+        
+            # 优化Y轴数值格式 - 使用K格式（类似Grafana）
+            def format_y_value(x, p):
+                if abs(x) >= 1000:
+                    return f'{x/1000:.2f} K'.rstrip('0').rstrip('.')
+                elif x == int(x):
+                    return f'{int(x)}'
+                else:
+                    return f'{x:.1f}'
+            ax.yaxis.set_major_formatter(plt.FuncFormatter(format_y_value))
+            ax.tick_params(axis='y', labelsize=12, colors='#ffffff', width=1)
+            ax.tick_params(axis='x', labelsize=11, colors='#ffffff', width=1)
+        
+            # 改进网格样式 - 更明显
+            ax.grid(True, linestyle="--", alpha=0.4, linewidth=1.0, color='#ffffff')
+            ax.set_axisbelow(True)
+        
+            # 设置坐标轴颜色
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+            ax.spines['left'].set_color('#ffffff')
+            ax.spines['bottom'].set_color('#ffffff')
+            ax.spines['left'].set_linewidth(2)
+            ax.spines['bottom'].set_linewidth(2)
+        
+            # 优化图例显示 - 放在右侧
+            if plotted > 0:
+                legend = ax.legend(
+                    loc="center left",
+                    bbox_to_anchor=(1.02, 0.5),
+                    fontsize=12,
+                    framealpha=0.95,
+                    fancybox=True,
+                    shadow=False,
+                    edgecolor='#ffffff',
+                    facecolor='#1a1a2e',
+                    borderpad=1.0,
+                    labelspacing=0.8,
+                    handlelength=2.0,
+                    handletextpad=0.8
+                )
+                for text in legend.get_texts():
+                    text.set_color('#ffffff')
+                    text.set_fontweight('normal')
+        
+            # 优化时间轴显示 - 只显示时间（时:分:秒），不显示日期
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S', tz=ZoneInfo("Asia/Shanghai")))
+            # 根据时间范围自动调整刻度间隔
+            if len(xs) > 0:
+                time_span = (max(xs) - min(xs)).total_seconds()
+                if time_span <= 300:  # 5分钟以内，每30秒一个刻度
+                    ax.xaxis.set_major_locator(mdates.SecondLocator(interval=30))
+                elif time_span <= 900:  # 15分钟以内，每1分钟一个刻度
+                    ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=1))
+                elif time_span <= 3600:  # 1小时以内，每5分钟一个刻度
+                    ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=5))
+                else:  # 超过1小时，每15分钟一个刻度
+                    ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=15))
+            fig.autofmt_xdate(rotation=45)
+        
+            # 优化背景色 - 使用深色主题（类似Grafana）
+            fig.patch.set_facecolor('#1e1e1e')  # 深色背景
+            ax.set_facecolor('#2b2b2b')  # 图表区域深灰色
+        
+            # 确保图表紧凑但不会裁剪内容
+            fig.tight_layout(pad=3.0)
 
-        buffer = BytesIO()
-        fig.savefig(buffer, format="png")
-        plt.close(fig)
-        return buffer.getvalue()
+            buffer = BytesIO()
+            fig.savefig(buffer, format="png")
+            plt.close(fig)
+            return buffer.getvalue()
     except requests.RequestException as exc:
         logger.warning("Grafana 出图请求 Prometheus API 失败: %s", exc)
         return None
@@ -404,7 +407,7 @@ def _extract_alert_rule_uid(generator_url: str) -> Optional[str]:
                 if uid and uid != "view":
                     return uid
     except Exception as exc:
-        logger.debug(f"从 generatorURL 提取告警规则 UID 失败: {exc}")
+        logger.debug("从 generatorURL 提取告警规则 UID 失败: %s", exc)
     return None
 
 
@@ -441,9 +444,9 @@ def _generate_from_grafana_alert_rule(
         # Grafana 8.x 使用 /api/ruler/grafana/api/v1/rules/{namespace}/{group}/{rule}
         api_url = f"{grafana_base}/api/alerting/rule/{rule_uid}"
         
-        logger.debug(f"从 Grafana API 获取告警规则详情: {api_url}")
+        logger.debug("从 Grafana API 获取告警规则详情: %s", api_url)
         headers = _build_grafana_headers(grafana_api_token)
-        session = requests.Session()
+        session = get_query_session()
         response = request_with_metrics(
             session,
             "GET",
@@ -514,7 +517,7 @@ def _generate_from_grafana_alert_rule(
             prometheus_api,
             prometheus_query[:100] if len(prometheus_query) > 100 else prometheus_query,
         )
-        session = requests.Session()
+        session = get_query_session()
         response = request_with_metrics(
             session,
             "GET",
@@ -532,195 +535,197 @@ def _generate_from_grafana_alert_rule(
             logger.info("Prometheus query_range 无可绘制数据，跳过出图")
             return None
         
-        # 生成图片
-        # 创建图表 - 使用更大的尺寸
-        fig, ax = plt.subplots(figsize=(14, 7), dpi=150)
-        
-        # 设置中文字体支持
-        import platform
-        if platform.system() == 'Darwin':  # macOS
-            plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'PingFang SC', 'STHeiti', 'Arial']
-        elif platform.system() == 'Linux':
-            plt.rcParams['font.sans-serif'] = ['WenQuanYi Micro Hei', 'DejaVu Sans', 'Liberation Sans']
-        else:  # Windows
-            plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial']
-        plt.rcParams['axes.unicode_minus'] = False
-        
-        plotted = 0
-        # 使用更鲜艳、对比度更好的颜色方案
-        colors = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', '#e67e22', '#34495e']
-        # 如果数据系列超过预设颜色数量，使用调色板生成更多颜色
-        if len(result) > len(colors):
-            colors = plt.cm.Set2(range(len(result)))
-        
-        for idx, series in enumerate(result):
-            values = series.get("values") or []
-            if not values:
-                continue
-            xs = []
-            ys = []
-            for item in values:
-                if not isinstance(item, (list, tuple)) or len(item) < 2:
+        # 绘图与导出持锁串行，见 PLOT_LOCK 说明
+        with PLOT_LOCK:
+            # 生成图片
+            # 创建图表 - 使用更大的尺寸
+            fig, ax = plt.subplots(figsize=(14, 7), dpi=150)
+        
+            # 设置中文字体支持
+            import platform
+            if platform.system() == 'Darwin':  # macOS
+                plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'PingFang SC', 'STHeiti', 'Arial']
+            elif platform.system() == 'Linux':
+                plt.rcParams['font.sans-serif'] = ['WenQuanYi Micro Hei', 'DejaVu Sans', 'Liberation Sans']
+            else:  # Windows
+                plt.rcParams['font.sans-serif'] = ['Microsoft YaHei', 'SimHei', 'Arial']
+            plt.rcParams['axes.unicode_minus'] = False
+        
+            plotted = 0
+            # 使用更鲜艳、对比度更好的颜色方案
+            colors = ['#e74c3c', '#3498db', '#2ecc71', '#f39c12', '#9b59b6', '#1abc9c', '#e67e22', '#34495e']
+            # 如果数据系列超过预设颜色数量，使用调色板生成更多颜色
+            if len(result) > len(colors):
+                colors = plt.cm.Set2(range(len(result)))
+        
+            for idx, series in enumerate(result):
+                values = series.get("values") or []
+                if not values:
                     continue
-                try:
-                    ts = float(item[0])
-                    val = float(item[1])
-                except (TypeError, ValueError):
+                xs = []
+                ys = []
+                for item in values:
+                    if not isinstance(item, (list, tuple)) or len(item) < 2:
+                        continue
+                    try:
+                        ts = float(item[0])
+                        val = float(item[1])
+                    except (TypeError, ValueError):
+                        continue
+                    # 将 UTC 时间转换为 UTC+8
+                    utc_time = datetime.fromtimestamp(ts, tz=timezone.utc)
+                    utc8_time = utc_time.astimezone(ZoneInfo("Asia/Shanghai"))
+                    xs.append(utc8_time)
+                    ys.append(val)
+                if not xs:
                     continue
-                # 将 UTC 时间转换为 UTC+8
-                utc_time = datetime.fromtimestamp(ts, tz=timezone.utc)
-                utc8_time = utc_time.astimezone(ZoneInfo("Asia/Shanghai"))
-                xs.append(utc8_time)
-                ys.append(val)
-            if not xs:
-                continue
             
-            # 确保数据点按时间排序
-            sorted_pairs = sorted(zip(xs, ys), key=lambda x: x[0])
-            xs, ys = zip(*sorted_pairs) if sorted_pairs else ([], [])
+                # 确保数据点按时间排序
+                sorted_pairs = sorted(zip(xs, ys), key=lambda x: x[0])
+                xs, ys = zip(*sorted_pairs) if sorted_pairs else ([], [])
             
-            if not xs:
-                continue
+                if not xs:
+                    continue
             
-            label = _build_series_label(series.get("metric") or {})
-            # 绘制数据线 - 更粗更明显
-            ax.plot(xs, ys, linewidth=3.0, label=label, color=colors[idx % len(colors)], marker='o', markersize=4, alpha=0.95, zorder=5-idx)
-            plotted += 1
-        
-        if plotted == 0:
-            plt.close(fig)
-            logger.info("Prometheus query_range 结果无法解析为曲线，跳过出图")
-            return None
-        
-        # 优化图表样式 - 使用实际的 alertname 作为标题
-        chart_title = alertname if alertname else "Grafana Alert Trend"
-        ax.set_title(chart_title, fontsize=20, fontweight='bold', pad=30, color='#ffffff')
-        
-        # X轴标签显示告警时间（UTC+8，到秒）
-        if alert_time:
-            try:
-                # 解析告警时间并转换为 UTC+8
-                from dateutil import parser
-                alert_dt = parser.parse(alert_time)
-                if alert_dt.tzinfo is None:
-                    # 如果没有时区信息，假设是 UTC
-                    alert_dt = alert_dt.replace(tzinfo=timezone.utc)
-                # 转换为 UTC+8
-                alert_dt_utc8 = alert_dt.astimezone(ZoneInfo("Asia/Shanghai"))
-                # 格式化为字符串：年-月-日 时:分:秒
-                xlabel_text = alert_dt_utc8.strftime('%Y-%m-%d %H:%M:%S')
-            except Exception:
-                # 如果解析失败，使用默认标签
+                label = _build_series_label(series.get("metric") or {})
+                # 绘制数据线 - 更粗更明显
+                ax.plot(xs, ys, linewidth=3.0, label=label, color=colors[idx % len(colors)], marker='o', markersize=4, alpha=0.95, zorder=5-idx)
+                plotted += 1
+        
+            if plotted == 0:
+                plt.close(fig)
+                logger.info("Prometheus query_range 结果无法解析为曲线，跳过出图")
+                return None
+        
+            # 优化图表样式 - 使用实际的 alertname 作为标题
+            chart_title = alertname if alertname else "Grafana Alert Trend"
+            ax.set_title(chart_title, fontsize=20, fontweight='bold', pad=30, color='#ffffff')
+        
+            # X轴标签显示告警时间（UTC+8，到秒）
+            if alert_time:
+                try:
+                    # 解析告警时间并转换为 UTC+8
+                    from dateutil import parser
+                    alert_dt = parser.parse(alert_time)
+                    if alert_dt.tzinfo is None:
+                        # 如果没有时区信息，假设是 UTC
+                        alert_dt = alert_dt.replace(tzinfo=timezone.utc)
+                    # 转换为 UTC+8
+                    alert_dt_utc8 = alert_dt.astimezone(ZoneInfo("Asia/Shanghai"))
+                    # 格式化为字符串：年-月-日 时:分:秒
+                    xlabel_text = alert_dt_utc8.strftime('%Y-%m-%d %H:%M:%S')
+                except Exception:
+                    # 如果解析失败，使用默认标签
+                    xlabel_text = "Time (UTC+8)"
+            else:
                 xlabel_text = "Time (UTC+8)"
-        else:
-            xlabel_text = "Time (UTC+8)"
-        
-        ax.set_xlabel(xlabel_text, fontsize=14, color='#ffffff', fontweight='normal')
-        
-        # Y轴不显示标签，保持简洁
-        ax.set_ylabel("", fontsize=0)
         
-        # 优化Y轴数值格式 - 使用K格式（类似Grafana）
-        def format_y_value(x, p):
-            if abs(x) >= 1000:
-                return f'{x/1000:.2f} K'.rstrip('0').rstrip('.')
-            elif x == int(x):
-                return f'{int(x)}'
-            else:
-                return f'{x:.1f}'
-        ax.yaxis.set_major_formatter(plt.FuncFormatter(format_y_value))
-        ax.tick_params(axis='y', labelsize=12, colors='#ffffff', width=1)
-        ax.tick_params(axis='x', labelsize=11, colors='#ffffff', width=1)
-        
-        # 改进网格样式 - 更明显
-        ax.grid(True, linestyle="--", alpha=0.4, linewidth=1.0, color='#ffffff')
-        ax.set_axisbelow(True)
-        
-        # 设置坐标轴颜色
-        ax.spines['top'].set_visible(False)
-        ax.spines['right'].set_visible(False)
-        ax.spines['left'].set_color('#ffffff')
-        ax.spines['bottom'].set_color('#ffffff')
-        ax.spines['left'].set_linewidth(2)
-        ax.spines['bottom'].set_linewidth(2)
-        
-        # 优化图例显示 - 放在右侧
-        if plotted > 0:
-            legend = ax.legend(
-                loc="center left",
-                bbox_to_anchor=(1.02, 0.5),
-                fontsize=12,
-                framealpha=0.95,
-                fancybox=True,
-                shadow=False,
-                edgecolor='#ffffff',
-                facecolor='#1a1a2e',
-                borderpad=1.0,
-                labelspacing=0.8,
-                handlelength=2.0,
-                handletextpad=0.8
-            )
-            for text in legend.get_texts():
-                text.set_color('#ffffff')
-                text.set_fontweight('normal')
-        
-        # 优化时间轴显示 - 只显示时间（时:分:秒），不显示日期
-        ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S', tz=ZoneInfo("Asia/Shanghai")))
-        # 根据时间范围自动调整刻度间隔
-        if len(xs) > 0:
-            time_span = (max(xs) - min(xs)).total_seconds()
-            if time_span <= 300:  # 5分钟以内，每30秒一个刻度
-                ax.xaxis.set_major_locator(mdates.SecondLocator(interval=30))
-            elif time_span <= 900:  # 15分钟以内，每1分钟一个刻度
-                ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=1))
-            elif time_span <= 3600:  # 1小时以内，每5分钟一个刻度
-                ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=5))
-            else:  # 超过1小时，每15分钟一个刻度
-                ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=15))
-        fig.autofmt_xdate(rotation=45)
-        
-        # 优化背景 - 使用现代渐变背景，更有视觉冲击力
-        # 使用深色到浅色的渐变背景
-        fig.patch.set_facecolor('#0a0a0f')  # 深黑色背景
-        
-        # 图表区域使用深色渐变背景
-        ax.set_facecolor('#151520')  # 深灰蓝色
-        
-        # 创建垂直渐变效果（从下到上）
-        import numpy as np
-        y_min, y_max = ax.get_ylim()
-        x_min, x_max = ax.get_xlim()
-        
-        # 创建渐变网格
-        y_vals = np.linspace(y_min, y_max, 100)
-        x_vals = np.linspace(x_min, x_max, 100)
-        X, Y = np.meshgrid(x_vals, y_vals)
-        
-        # 创建渐变（从深到浅）
-        Z = np.linspace(0, 1, len(y_vals)).reshape(-1, 1)
-        Z = np.tile(Z, (1, len(x_vals)))
-        
-        # 使用自定义颜色映射（深蓝到浅蓝）
-        from matplotlib.colors import LinearSegmentedColormap
-        colors_gradient = ['#0a0a0f', '#1a1a2e', '#2a2a3e']
-        n_bins = 256
-        cmap = LinearSegmentedColormap.from_list('custom', colors_gradient, N=n_bins)
-        
-        ax.imshow(Z, extent=[x_min, x_max, y_min, y_max], 
-                  aspect='auto', cmap=cmap, alpha=0.3, zorder=0, origin='lower')
-        
-        # 确保图表紧凑但不会裁剪内容
-        fig.tight_layout(pad=3.5)
-        
-        buffer = BytesIO()
-        fig.savefig(buffer, format='png', dpi=150, facecolor='#0a0a0f', edgecolor='none', bbox_inches='tight')
-        plt.close(fig)
-        return buffer.getvalue()
+            ax.set_xlabel(xlabel_text, fontsize=14, color='#ffffff', fontweight='normal')
+        
+            # Y轴不显示标签，保持简洁
+            ax.set_ylabel("", fontsize=0)
+        
+            # 优化Y轴数值格式 - 使用K格式（类似Grafana）
+            def format_y_value(x, p):
+                if abs(x) >= 1000:
+                    return f'{x/1000:.2f} K'.rstrip('0').rstrip('.')
+                elif x == int(x):
+                    return f'{int(x)}'
+                else:
+                    return f'{x:.1f}'
+            ax.yaxis.set_major_formatter(plt.FuncFormatter(format_y_value))
+            ax.tick_params(axis='y', labelsize=12, colors='#ffffff', width=1)
+            ax.tick_params(axis='x', labelsize=11, colors='#ffffff', width=1)
+        
+            # 改进网格样式 - 更明显
+            ax.grid(True, linestyle="--", alpha=0.4, linewidth=1.0, color='#ffffff')
+            ax.set_axisbelow(True)
+        
+            # 设置坐标轴颜色
+            ax.spines['top'].set_visible(False)
+            ax.spines['right'].set_visible(False)
+            ax.spines['left'].set_color('#ffffff')
+            ax.spines['bottom'].set_color('#ffffff')
+            ax.spines['left'].set_linewidth(2)
+            ax.spines['bottom'].set_linewidth(2)
+        
+            # 优化图例显示 - 放在右侧
+            if plotted > 0:
+                legend = ax.legend(
+                    loc="center left",
+                    bbox_to_anchor=(1.02, 0.5),
+                    fontsize=12,
+                    framealpha=0.95,
+                    fancybox=True,
+                    shadow=False,
+                    edgecolor='#ffffff',
+                    facecolor='#1a1a2e',
+                    borderpad=1.0,
+                    labelspacing=0.8,
+                    handlelength=2.0,
+                    handletextpad=0.8
+                )
+                for text in legend.get_texts():
+                    text.set_color('#ffffff')
+                    text.set_fontweight('normal')
+        
+            # 优化时间轴显示 - 只显示时间（时:分:秒），不显示日期
+            ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S', tz=ZoneInfo("Asia/Shanghai")))
+            # 根据时间范围自动调整刻度间隔
+            if len(xs) > 0:
+                time_span = (max(xs) - min(xs)).total_seconds()
+                if time_span <= 300:  # 5分钟以内，每30秒一个刻度
+                    ax.xaxis.set_major_locator(mdates.SecondLocator(interval=30))
+                elif time_span <= 900:  # 15分钟以内，每1分钟一个刻度
+                    ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=1))
+                elif time_span <= 3600:  # 1小时以内，每5分钟一个刻度
+                    ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=5))
+                else:  # 超过1小时，每15分钟一个刻度
+                    ax.xaxis.set_major_locator(mdates.MinuteLocator(interval=15))
+            fig.autofmt_xdate(rotation=45)
+        
+            # 优化背景 - 使用现代渐变背景，更有视觉冲击力
+            # 使用深色到浅色的渐变背景
+            fig.patch.set_facecolor('#0a0a0f')  # 深黑色背景
+        
+            # 图表区域使用深色渐变背景
+            ax.set_facecolor('#151520')  # 深灰蓝色
+        
+            # 创建垂直渐变效果（从下到上）
+            import numpy as np
+            y_min, y_max = ax.get_ylim()
+            x_min, x_max = ax.get_xlim()
+        
+            # 创建渐变网格
+            y_vals = np.linspace(y_min, y_max, 100)
+            x_vals = np.linspace(x_min, x_max, 100)
+            X, Y = np.meshgrid(x_vals, y_vals)
+        
+            # 创建渐变（从深到浅）
+            Z = np.linspace(0, 1, len(y_vals)).reshape(-1, 1)
+            Z = np.tile(Z, (1, len(x_vals)))
+        
+            # 使用自定义颜色映射（深蓝到浅蓝）
+            from matplotlib.colors import LinearSegmentedColormap
+            colors_gradient = ['#0a0a0f', '#1a1a2e', '#2a2a3e']
+            n_bins = 256
+            cmap = LinearSegmentedColormap.from_list('custom', colors_gradient, N=n_bins)
+        
+            ax.imshow(Z, extent=[x_min, x_max, y_min, y_max], 
+                      aspect='auto', cmap=cmap, alpha=0.3, zorder=0, origin='lower')
+        
+            # 确保图表紧凑但不会裁剪内容
+            fig.tight_layout(pad=3.5)
+        
+            buffer = BytesIO()
+            fig.savefig(buffer, format='png', dpi=150, facecolor='#0a0a0f', edgecolor='none', bbox_inches='tight')
+            plt.close(fig)
+            return buffer.getvalue()
     except requests.RequestException as exc:
-        logger.debug(f"Grafana 出图请求 API 失败: {exc}")
+        logger.debug("Grafana 出图请求 API 失败: %s", exc)
         return None
     except Exception as exc:
-        logger.debug(f"Grafana 出图异常: {exc}")
+        logger.debug("Grafana 出图异常: %s", exc)
         return None
 
 
@@ -750,9 +755,9 @@ def _generate_from_grafana_renderer(
         
         # 步骤1：获取告警规则详情，查找关联的 dashboard 和 panel
         api_url = f"{grafana_base}/api/alerting/rule/{rule_uid}"
-        logger.debug(f"从 Grafana API 获取告警规则详情: {api_url}")
+        logger.debug("从 Grafana API 获取告警规则详情: %s", api_url)
         headers = _build_grafana_headers(grafana_api_token)
-        session = requests.Session()
+        session = get_query_session()
         response = request_with_metrics(
             session,
             "GET",
@@ -801,7 +806,7 @@ def _generate_from_grafana_renderer(
                         break
         
         if not dashboard_uid or not panel_id:
-            logger.debug(f"告警规则中未找到 dashboard/panel 信息 (dashboard_uid={dashboard_uid}, panel_id={panel_id})")
+            logger.debug("告警规则中未找到 dashboard/panel 信息 (dashboard_uid=%s, panel_id=%s)", dashboard_uid, panel_id)
             return None
         
         # 步骤2：使用 Grafana 渲染服务生成图片
@@ -820,8 +825,8 @@ def _generate_from_grafana_renderer(
             "theme": "light",
         }
         
-        logger.debug(f"使用 Grafana 渲染服务生成图片: {render_url}")
-        session = requests.Session()
+        logger.debug("使用 Grafana 渲染服务生成图片: %s", render_url)
+        session = get_query_session()
         response = request_with_metrics(
             session,
             "GET",
@@ -844,12 +849,12 @@ def _generate_from_grafana_renderer(
         if "image" in content_type.lower():
             return response.content
         else:
-            logger.debug(f"Grafana 渲染服务返回非图片内容: {content_type}")
+            logger.debug("Grafana 渲染服务返回非图片内容: %s", content_type)
             return None
             
     except requests.RequestException as exc:
-        logger.debug(f"Grafana 渲染服务请求失败: {exc}")
+        logger.debug("Grafana 渲染服务请求失败: %s", exc)
         return None
     except Exception as exc:
-        logger.debug(f"Grafana 渲染服务异常: {exc}")
+        logger.debug("Grafana 渲染服务异常: %s", exc)
         return None
@@ -26,6 +26,7 @@ import requests
 
 from ..core.logging_config import get_logger
 from ..core.http_metrics import request_with_metrics
+from .base import PLOT_LOCK, get_query_session
 from ..core.metrics import (
     ImageGenerateFailuresTotal,
     PrometheusRequestDuration,
@@ -570,13 +571,13 @@ def _generate_plot_with_plotly(
                 os.unlink(tmp_path)  # 删除临时文件
             except Exception as e:
                 # 如果 write_image 失败，尝试 to_image
-                logger.debug(f"write_image 失败，尝试 to_image: {e}")
+                logger.debug("write_image 失败，尝试 to_image: %s", e)
                 if os.path.exists(tmp_path):
                     os.unlink(tmp_path)
                 img_bytes = pio.to_image(fig, format='png', width=1400, height=700, scale=2)
                 buffer.write(img_bytes)
         except Exception as e:
-            logger.warning(f"Plotly 图片导出失败: {e}")
+            logger.warning("Plotly 图片导出失败: %s", e)
             raise
         return buffer.getvalue()
         
@@ -761,21 +762,23 @@ def generate_plot_from_result(
     """
     if not result:
         return None
-    if use_plotly and PLOTLY_AVAILABLE:
-        png = _generate_plot_with_plotly(
-            result, alertname, alert_time,
-            legend_label_whitelist=legend_label_whitelist,
+    # 绘图与导出持锁串行，见 PLOT_LOCK 说明
+    with PLOT_LOCK:
+        if use_plotly and PLOTLY_AVAILABLE:
+            png = _generate_plot_with_plotly(
+                result, alertname, alert_time,
+                legend_label_whitelist=legend_label_whitelist,
+            )
+            if png:
+                return png
+        _setup_matplotlib_cjk_font()
+        warnings.filterwarnings(
+            "ignore",
+            message=".*Glyph.*missing from font",
+            category=UserWarning,
+            module="matplotlib",
         )
-        if png:
-            return png
-    _setup_matplotlib_cjk_font()
-    warnings.filterwarnings(
-        "ignore",
-        message=".*Glyph.*missing from font",
-        category=UserWarning,
-        module="matplotlib",
-    )
-    return _generate_plot_with_matplotlib(result, alertname, alert_time, legend_label_whitelist)
+        return _generate_plot_with_matplotlib(result, alertname, alert_time, legend_label_whitelist)
 
 
 def generate_plot_from_generator_url(
@@ -908,7 +911,7 @@ def generate_plot_from_generator_url(
         t0 = _time.perf_counter()
         metric_status = "ok"
         try:
-            session = requests.Session()
+            session = get_query_session()
             response = request_with_metrics(
                 session,
                 "POST",
@@ -1030,30 +1033,32 @@ def generate_plot_from_generator_url(
         if result and len(result) > max_series:
             result = result[:max_series]
 
-        # 优先使用 Plotly 生成更美观的图表
-        if use_plotly and PLOTLY_AVAILABLE:
-            plotly_result = _generate_plot_with_plotly(
+        # 绘图与导出持锁串行，见 PLOT_LOCK 说明
+        with PLOT_LOCK:
+            # 优先使用 Plotly 生成更美观的图表
+            if use_plotly and PLOTLY_AVAILABLE:
+                plotly_result = _generate_plot_with_plotly(
+                    result, alertname, alert_time,
+                    legend_label_whitelist=legend_label_whitelist,
+                )
+                if plotly_result:
+                    return plotly_result
+                logger.info("Plotly 出图失败，回退到 matplotlib")
+
+            # 使用 Matplotlib 生成图表（备选方案）
+            _setup_matplotlib_cjk_font()
+            warnings.filterwarnings(
+                "ignore",
+                message=".*Glyph.*missing from font",
+                category=UserWarning,
+                module="matplotlib",
+            )
+            png = _generate_plot_with_matplotlib(
                 result, alertname, alert_time,
                 legend_label_whitelist=legend_label_whitelist,
             )
-            if plotly_result:
-                return plotly_result
-            logger.info("Plotly 出图失败，回退到 matplotlib")
-
-        # 使用 Matplotlib 生成图表（备选方案）
-        _setup_matplotlib_cjk_font()
-        warnings.filterwarnings(
-            "ignore",
-            message=".*Glyph.*missing from font",
-            category=UserWarning,
-            module="matplotlib",
-        )
-        png = _generate_plot_with_matplotlib(
-            result, alertname, alert_time,
-            legend_label_whitelist=legend_label_whitelist,
-        )
-        if png is not None:
-            return png
+            if png is not None:
+                return png
         logger.info("Prometheus query_range 结果无法解析为曲线，跳过出图")
         return None
     except requests.RequestException as exc:
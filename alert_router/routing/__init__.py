@@ -1,10 +1,11 @@
 """
 路由模块
 """
-from .routing import route, match
+from .routing import compile_routing, route, match
 from .jenkins_dedup import should_skip_jenkins_firing
 
 __all__ = [
+    "compile_routing",
     "route",
     "match",
     "should_skip_jenkins_firing",
@@ -16,6 +16,9 @@ logger = logging.getLogger("alert-router")
 # 进程内 Grafana 去重缓存（key -> 过期时间戳）
 _GRAFANA_DEDUP_CACHE: Dict[str, float] = {}
 _GRAFANA_DEDUP_LOCK = RLock()
+# 过期 key 清理需全表扫描，最多每隔该秒数做一次；查询时本身会比较过期时间，未及时清理的 key 不影响结果
+_PRUNE_INTERVAL_SECONDS = 60
+_GRAFANA_DEDUP_LAST_PRUNE_AT = 0.0
 
 
 def _build_dedup_key(alert: dict, alert_status: str) -> Optional[str]:
@@ -51,6 +54,7 @@ def should_skip_grafana_duplicate(
     - 相同 fingerprint + status 在 ttl_seconds 内只发送第一次，后续跳过
     - resolved 后若 clear_on_resolved=true 则清理 key，下次 firing 会再发
     """
+    global _GRAFANA_DEDUP_LAST_PRUNE_AT
     dedup_cfg = (config or {}).get("grafana_dedup", {}) or {}
     if not dedup_cfg.get("enabled", True):
         return False
@@ -64,11 +68,14 @@ def should_skip_grafana_duplicate(
     now = time.time()
 
     with _GRAFANA_DEDUP_LOCK:
-        expired_keys = [k for k, exp in _GRAFANA_DEDUP_CACHE.items() if exp <= now]
-        if expired_keys:
-            for k in expired_keys:
-                _GRAFANA_DEDUP_CACHE.pop(k, None)
-            logger.debug(f"Grafana 去重缓存清理了 {len(expired_keys)} 个过期 key")
+        # 清理过期 key，避免缓存无限增长（按间隔节流，避免每条告警都扫描整个缓存）
+        if now - _GRAFANA_DEDUP_LAST_PRUNE_AT >= _PRUNE_INTERVAL_SECONDS:
+            _GRAFANA_DEDUP_LAST_PRUNE_AT = now
+            expired_keys = [k for k, exp in _GRAFANA_DEDUP_CACHE.items() if exp <= now]
+            if expired_keys:
+                for k in expired_keys:
+                    _GRAFANA_DEDUP_CACHE.pop(k, None)
+                logger.debug("Grafana 去重缓存清理了 %d 个过期 key", len(expired_keys))
 
         if alert_status in ("resolved", "ok"):
             if clear_on_resolved:
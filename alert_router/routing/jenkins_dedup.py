@@ -14,6 +14,9 @@ logger = logging.getLogger("alert-router")
 # 进程内 Jenkins 去重缓存（key -> 过期时间戳）
 _JENKINS_DEDUP_CACHE: Dict[str, float] = {}
 _JENKINS_DEDUP_LOCK = RLock()
+# 过期 key 清理需全表扫描，最多每隔该秒数做一次；查询时本身会比较过期时间，未及时清理的 key 不影响结果
+_PRUNE_INTERVAL_SECONDS = 60
+_JENKINS_DEDUP_LAST_PRUNE_AT = 0.0
 
 
 def _build_dedup_key(alert: dict, labels: dict) -> Optional[str]:
@@ -46,6 +49,7 @@ def should_skip_jenkins_firing(alert: dict, labels: dict, alert_status: str, con
     - status=firing：在去重窗口内仅首次发送，后续跳过
     - status=resolved 且 clear_on_resolved=true：清理该 key
     """
+    global _JENKINS_DEDUP_LAST_PRUNE_AT
     dedup_cfg = (config or {}).get("jenkins_dedup", {}) or {}
     if not dedup_cfg.get("enabled", True):
         return False
@@ -59,18 +63,20 @@ def should_skip_jenkins_firing(alert: dict, labels: dict, alert_status: str, con
     now = time.time()
 
     with _JENKINS_DEDUP_LOCK:
-        # 清理过期 key，避免缓存无限增长
-        expired_keys = [k for k, exp in _JENKINS_DEDUP_CACHE.items() if exp <= now]
-        if expired_keys:
-            for k in expired_keys:
-                _JENKINS_DEDUP_CACHE.pop(k, None)
-            logger.debug(f"Jenkins 去重缓存清理了 {len(expired_keys)} 个过期 key")
+        # 清理过期 key，避免缓存无限增长（按间隔节流，避免每条告警都扫描整个缓存）
+        if now - _JENKINS_DEDUP_LAST_PRUNE_AT >= _PRUNE_INTERVAL_SECONDS:
+            _JENKINS_DEDUP_LAST_PRUNE_AT = now
+            expired_keys = [k for k, exp in _JENKINS_DEDUP_CACHE.items() if exp <= now]
+            if expired_keys:
+                for k in expired_keys:
+                    _JENKINS_DEDUP_CACHE.pop(k, None)
+                logger.debug("Jenkins 去重缓存清理了 %d 个过期 key", len(expired_keys))
 
         if alert_status == "resolved":
             if clear_on_resolved:
                 if key in _JENKINS_DEDUP_CACHE:
                     _JENKINS_DEDUP_CACHE.pop(key, None)
-                    logger.debug(f"Jenkins 去重：告警 {labels.get('alertname', 'Unknown')} resolved，已清理去重缓存 key: {key}")
+                    logger.debug("Jenkins 去重：告警 %s resolved，已清理去重缓存 key: %s", labels.get("alertname", "Unknown"), key)
             return False
 
         if alert_status != "firing":
@@ -78,9 +84,9 @@ def should_skip_jenkins_firing(alert: dict, labels: dict, alert_status: str, con
 
         expires_at = _JENKINS_DEDUP_CACHE.get(key)
         if expires_at and expires_at > now:
-            logger.debug(f"Jenkins 去重：告警 {labels.get('alertname', 'Unknown')} 命中去重窗口，跳过发送 (key: {key}, 剩余时间: {int(expires_at - now)}秒)")
+            logger.debug("Jenkins 去重：告警 %s 命中去重窗口，跳过发送 (key: %s, 剩余时间: %d秒)", labels.get("alertname", "Unknown"), key, int(expires_at - now))
             return True
 
         _JENKINS_DEDUP_CACHE[key] = now + max(1, ttl_seconds)
-        logger.debug(f"Jenkins 去重：告警 {labels.get('alertname', 'Unknown')} 首次发送，已记录去重 key: {key} (TTL: {ttl_seconds}秒)")
+        logger.debug("Jenkins 去重：告警 %s 首次发送，已记录去重 key: %s (TTL: %s秒)", labels.get("alertname", "Unknown"), key, ttl_seconds)
         return False
@@ -2,24 +2,90 @@
 路由匹配模块
 """
 import re
-from typing import Dict, List
+from typing import Any, Dict, List, Tuple
 
 from ..core.logging_config import get_logger
 
 logger = get_logger("alert-router")
 
-# 正则缓存，避免重复编译
-_REGEX_CACHE: Dict[str, re.Pattern] = {}
 _DEFAULT_RULE_WARNED = False
 
+# 条件匹配方式：精确匹配 / 正则匹配
+_MODE_EXACT = 0
+_MODE_REGEX = 1
 
-def _regex_search(pattern: str, text: str) -> bool:
-    """带缓存的正则匹配"""
-    compiled = _REGEX_CACHE.get(pattern)
-    if compiled is None:
-        compiled = re.compile(pattern)
-        _REGEX_CACHE[pattern] = compiled
-    return compiled.search(text) is not None
+# 正则表达式特征字符
+_REGEX_CHARS = frozenset("*^$|()[]+?{}")
+
+# 已编译的路由条件：id(cond) -> (cond, [(标签名, 匹配方式, 字面值或已编译正则), ...])
+# 同时保存 cond 本身，保证缓存存活期间 id 不会被其它对象复用
+_COMPILED_CONDITIONS: Dict[int, Tuple[Dict[str, Any], List[Tuple[str, int, Any]]]] = {}
+
+
+def _compile_value(v: Any) -> Tuple[int, Any]:
+    """
+    把单个条件值预先分类为精确匹配或正则匹配（正则在此一次性编译）
+
+    支持的正则格式：.*pattern.*、^...$、pattern1|pattern2 等；否则精确匹配。
+    """
+    if not isinstance(v, str):
+        return _MODE_EXACT, v
+
+    # 检查是否包含正则表达式特征字符
+    has_regex_chars = any(char in _REGEX_CHARS for char in v)
+    # 检查是否为简化的正则表达式格式（.*pattern.*, .*pattern, pattern.*）
+    is_simple_regex = v.startswith(".*") or v.endswith(".*")
+    if not (has_regex_chars or is_simple_regex):
+        return _MODE_EXACT, v
+
+    # 构建正则表达式模式
+    if v.startswith("^") or v.endswith("$"):
+        # 锚定匹配（已包含锚定符）
+        pattern = v
+    elif v.startswith(".*") and v.endswith(".*"):
+        # 去掉首尾的 .*，使用 search
+        pattern = v[2:-2]
+    elif v.startswith(".*"):
+        # 去掉开头的 .*，匹配结尾
+        pattern = v[2:] + "$"
+    elif v.endswith(".*"):
+        # 去掉结尾的 .*，匹配开头
+        pattern = "^" + v[:-2]
+    else:
+        # 直接使用正则表达式
+        pattern = v
+
+    try:
+        return _MODE_REGEX, re.compile(pattern)
+    except re.error:
+        # 正则表达式错误，回退到精确匹配
+        logger.warning("正则表达式错误: %s，使用精确匹配", v)
+        return _MODE_EXACT, v
+
+
+def _compile_condition(cond: Dict[str, Any]) -> List[Tuple[str, int, Any]]:
+    """获取路由条件的编译结果（每个条件 dict 只编译一次）"""
+    cached = _COMPILED_CONDITIONS.get(id(cond))
+    if cached is not None and cached[0] is cond:
+        return cached[1]
+    compiled = [(k,) + _compile_value(v) for k, v in cond.items()]
+    # 条件之间为“且”关系，顺序不影响结果：精确匹配（一次字典查找 + 比较）排在前面，
+    # 不满足时直接返回，避免先执行正则搜索
+    compiled.sort(key=lambda item: item[1] != _MODE_EXACT)
+    _COMPILED_CONDITIONS[id(cond)] = (cond, compiled)
+    return compiled
+
+
+def compile_routing(config: Dict) -> None:
+    """
+    启动时预编译全部路由规则的匹配条件，请求路径上不再做分类与正则编译
+
+    Args:
+        config: 配置字典（包含 routing 规则）
+    """
+    for rule in config.get("routing", []) or []:
+        if "match" in rule:
+            _compile_condition(rule["match"])
 
 
 def match(labels: Dict[str, str], cond: Dict[str, str]) -> bool:
@@ -29,51 +95,16 @@ def match(labels: Dict[str, str], cond: Dict[str, str]) -> bool:
     支持的正则格式：.*pattern.*、^...$、pattern1|pattern2 等；否则精确匹配。
     中文完全支持，如 severity: "严重"、severity: "critical|灾难"。
     """
-    for k, v in cond.items():
+    for k, mode, expected in _compile_condition(cond):
         label_value = labels.get(k)
         if label_value is None:
             return False
-        
-        label_str = str(label_value)
-        
-        # 检查是否包含正则表达式特征字符
-        regex_chars = ["*", "^", "$", "|", "(", ")", "[", "]", "+", "?", "{", "}"]
-        has_regex_chars = any(char in v for char in regex_chars)
-        
-        # 检查是否为简化的正则表达式格式（.*pattern.*, .*pattern, pattern.*）
-        is_simple_regex = v.startswith(".*") or v.endswith(".*")
-        
-        # 如果包含正则表达式特征字符或者是简化的正则格式，尝试正则匹配
-        if has_regex_chars or is_simple_regex:
-            try:
-                # 构建正则表达式模式
-                if v.startswith("^") or v.endswith("$"):
-                    # 锚定匹配（已包含锚定符）
-                    pattern = v
-                elif v.startswith(".*") and v.endswith(".*"):
-                    # 去掉首尾的 .*，使用 search
-                    pattern = v[2:-2]
-                elif v.startswith(".*"):
-                    # 去掉开头的 .*，匹配结尾
-                    pattern = v[2:] + "$"
-                elif v.endswith(".*"):
-                    # 去掉结尾的 .*，匹配开头
-                    pattern = "^" + v[:-2]
-                else:
-                    # 直接使用正则表达式
-                    pattern = v
-                
-                if not _regex_search(pattern, label_str):
-                    return False
-            except re.error:
-                # 正则表达式错误，回退到精确匹配
-                logger.warning(f"正则表达式错误: {v}，使用精确匹配")
-                if labels.get(k) != v:
-                    return False
-        else:
-            # 精确匹配
-            if labels.get(k) != v:
+        if mode == _MODE_REGEX:
+            if expected.search(str(label_value)) is None:
                 return False
+        elif label_value != expected:
+            # 精确匹配
+            return False
     return True
 
 
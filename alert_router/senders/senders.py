@@ -7,7 +7,8 @@
 """
 import json
 import logging
-from typing import Optional, Dict
+import threading
+from typing import Dict, Optional, Tuple
 
 import requests
 from requests.adapters import HTTPAdapter
@@ -30,27 +31,41 @@ TIMEOUTS = {
     "webhook": 10,
 }
 
+# Webhook 请求头：模板渲染结果按 UTF-8 JSON 原样发送
+_WEBHOOK_HEADERS = {"Content-Type": "application/json; charset=utf-8"}
+
 # HTTP 连接池配置
 # 使用连接池复用连接，提高性能
 # 注意：在生产环境中，会话会长期复用，通常不需要手动清理
 # 如果需要清理（例如测试环境），可以调用 clear_session_cache()
-_session_cache: Dict[str, requests.Session] = {}
+_session_cache: Dict[Optional[Tuple[Tuple[str, str], ...]], requests.Session] = {}
+# 多个渠道在线程池中并发发送，创建会话时加锁，避免同一代理重复建池
+_session_lock = threading.Lock()
+# 单个目标主机（如 api.telegram.org）的最大保持连接数：需覆盖并发发送线程数
+# （AlertService 的告警处理线程 + 渠道发送线程），否则超出的连接用完即丢、下次重新握手（含 TLS / SOCKS）
+_POOL_MAXSIZE = 32
 
 
-def _get_session(proxy: Optional[Dict[str, str]] = None) -> requests.Session:
+def _get_session(proxy: Optional[Tuple[Tuple[str, str], ...]] = None) -> requests.Session:
     """
     获取或创建 HTTP 会话（带连接池）
-    
+
     Args:
-        proxy: 代理配置
-        
+        proxy: 代理配置（Channel.proxy，(协议, 代理地址) 元组）
+
     Returns:
         requests.Session 实例
     """
-    # 使用代理配置作为缓存键
-    cache_key = str(proxy) if proxy else "no_proxy"
-    
-    if cache_key not in _session_cache:
+    # 代理元组本身可哈希且已排序，直接作为缓存键
+    cache_key = proxy or None
+
+    session = _session_cache.get(cache_key)
+    if session is not None:
+        return session
+
+    with _session_lock:
+        if cache_key in _session_cache:
+            return _session_cache[cache_key]
         session = requests.Session()
         
         # 配置重试策略
@@ -63,8 +78,8 @@ def _get_session(proxy: Optional[Dict[str, str]] = None) -> requests.Session:
         
         # 配置 HTTP 适配器（连接池）
         adapter = HTTPAdapter(
-            pool_connections=10,  # 连接池大小
-            pool_maxsize=20,     # 最大连接数
+            pool_connections=10,  # 按主机缓存的连接池个数
+            pool_maxsize=_POOL_MAXSIZE,  # 每个主机的最大保持连接数
             max_retries=retry_strategy,
         )
         
@@ -73,11 +88,11 @@ def _get_session(proxy: Optional[Dict[str, str]] = None) -> requests.Session:
         
         # 设置代理
         if proxy:
-            session.proxies.update(proxy)
+            session.proxies.update(dict(proxy))
         
         _session_cache[cache_key] = session
-    
-    return _session_cache[cache_key]
+
+    return session
 
 
 def clear_session_cache():
@@ -87,9 +102,10 @@ def clear_session_cache():
     注意：在生产环境中通常不需要调用此函数，会话会长期复用以提高性能
     """
     global _session_cache
-    for session in _session_cache.values():
-        session.close()
-    _session_cache.clear()
+    with _session_lock:
+        for session in _session_cache.values():
+            session.close()
+        _session_cache.clear()
 
 
 def send_telegram(
@@ -161,7 +177,11 @@ def send_telegram(
     try:
         method = "sendPhoto" if photo_ok else "sendMessage"
         logger.info(
-            f"[Telegram] 渠道 [{ch.name}] 请求: {method}, chat_id={ch.chat_id}, parse_mode={parse_mode or '(无)'}"
+            "[Telegram] 渠道 [%s] 请求: %s, chat_id=%s, parse_mode=%s",
+            ch.name,
+            method,
+            ch.chat_id,
+            parse_mode or "(无)",
         )
         if logger.isEnabledFor(logging.DEBUG):
             # 在 JSON 日志中通过结构化字段输出 Telegram 请求 payload
@@ -177,7 +197,7 @@ def send_telegram(
             **kwargs,
         )
         response.raise_for_status()
-        logger.info(f"[Telegram] 渠道 [{ch.name}] 发送成功, 状态码: {response.status_code}")
+        logger.info("[Telegram] 渠道 [%s] 发送成功, 状态码: %s", ch.name, response.status_code)
         if logger.isEnabledFor(logging.DEBUG):
             try:
                 resp_json = response.json()
@@ -216,7 +236,8 @@ def send_telegram(
             and parse_mode
         ):
             logger.warning(
-                f"Telegram 返回 400 (渠道: {ch.name})，尝试以纯文本重发（去掉 parse_mode），保留图片"
+                "Telegram 返回 400 (渠道: %s)，尝试以纯文本重发（去掉 parse_mode），保留图片",
+                ch.name,
             )
             try:
                 # 纯文本下把 <br> 转为换行，避免在 Telegram 里显示成字面 "<br>"
@@ -251,40 +272,29 @@ def send_webhook(ch: Channel, body: str):
     
     try:
         _log_webhook_request(ch.name, ch.webhook_url, body)
-        # 尝试作为 JSON 发送
+        # 渲染后的模板本身就是要发送的 JSON 文本，直接按 UTF-8 字节发送，不再 loads 再由 requests 重新 dumps；
+        # 模板输出非合法 JSON 时原样发送（与此前的回退行为一致）
         if not body.strip():
-            logger.debug(f"Webhook body 为空 (渠道: {ch.name})，按空 JSON 发送")
-            json_body = {}
-        else:
-            json_body = json.loads(body)
-        response = _post_webhook(session, ch.webhook_url, ch.name, json=json_body, **kwargs)
+            logger.debug("Webhook body 为空 (渠道: %s)，按空 JSON 发送", ch.name)
+            body = "{}"
+        # requests 在 data=str 时会按 latin-1 编码，中文/emoji 会触发 UnicodeEncodeError，
+        # 因此显式编码为 UTF-8 bytes 并声明 charset
+        response = _post_webhook(
+            session,
+            ch.webhook_url,
+            ch.name,
+            data=body.encode("utf-8"),
+            headers=_WEBHOOK_HEADERS,
+            **kwargs,
+        )
         return response
-    except (json.JSONDecodeError, ValueError):
-        # 如果不是有效的 JSON，则作为原始数据发送
-        logger.debug(f"Webhook body 非 JSON，以原始数据发送 (渠道: {ch.name})")
-        try:
-            # requests 在 data=str 时会按 latin-1 编码，中文/emoji 会触发 UnicodeEncodeError
-            # 回退路径强制使用 UTF-8 bytes，并显式声明 charset
-            utf8_headers = {"Content-Type": "application/json; charset=utf-8"}
-            response = _post_webhook(
-                session,
-                ch.webhook_url,
-                ch.name,
-                data=body.encode("utf-8"),
-                headers=utf8_headers,
-                **kwargs,
-            )
-            return response
-        except requests.exceptions.RequestException as e:
-            _log_webhook_error(ch.name, e)
-            raise
     except requests.exceptions.RequestException as e:
         _log_webhook_error(ch.name, e)
         raise
 
 
 def _log_webhook_request(channel_name: str, url: str, body: str):
-    logger.info(f"发送 Webhook 消息到渠道 [{channel_name}]，URL: {url}")
+    logger.info("发送 Webhook 消息到渠道 [%s]，URL: %s", channel_name, url)
     if logger.isEnabledFor(logging.DEBUG):
         # 发送前记录下游 Webhook 请求体（可能是 JSON 字符串或其他格式）
         logger.debug(
@@ -307,7 +317,7 @@ def _post_webhook(
         **kwargs,
     )
     response.raise_for_status()
-    logger.info(f"Webhook 消息发送成功 (渠道: {channel_name})，响应状态码: {response.status_code}")
+    logger.info("Webhook 消息发送成功 (渠道: %s)，响应状态码: %s", channel_name, response.status_code)
     if logger.isEnabledFor(logging.DEBUG):
         try:
             resp_json = response.json()
@@ -324,20 +334,20 @@ def _post_webhook(
 
 
 def _log_send_error(channel_type: str, channel_name: str, error: Exception):
-    logger.error(f"发送 {channel_type} 消息失败 (渠道: {channel_name}): {error}")
+    logger.error("发送 %s 消息失败 (渠道: %s): %s", channel_type, channel_name, error)
 
 
 def _log_telegram_error(channel_name: str, error: Exception):
     """记录 Telegram 发送失败，并输出 API 返回的 description 便于排查 400/401 等."""
-    logger.error(f"发送 Telegram 消息失败 (渠道: {channel_name}): {error}")
+    logger.error("发送 Telegram 消息失败 (渠道: %s): %s", channel_name, error)
     if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
         try:
             body = error.response.json()
             desc = body.get("description", body.get("error", error.response.text))
-            logger.error(f"Telegram API 响应说明: {desc}")
+            logger.error("Telegram API 响应说明: %s", desc)
         except Exception:
             if error.response.text:
-                logger.error(f"Telegram API 原始响应: {error.response.text[:500]}")
+                logger.error("Telegram API 原始响应: %s", error.response.text[:500])
 
 
 def _log_webhook_error(channel_name: str, e: requests.exceptions.RequestException):
@@ -346,8 +356,10 @@ def _log_webhook_error(channel_name: str, e: requests.exceptions.RequestExceptio
         code = e.response.status_code
         if code in (401, 404, 410):
             logger.warning(
-                f"Webhook 发送失败 (渠道: {channel_name}): HTTP {code}，"
-                "请检查该渠道的 Webhook URL 是否有效、未过期或已被删除（非代码错误）。"
+                "Webhook 发送失败 (渠道: %s): HTTP %s，"
+                "请检查该渠道的 Webhook URL 是否有效、未过期或已被删除（非代码错误）。",
+                channel_name,
+                code,
             )
             return
-    logger.error(f"发送 Webhook 消息失败 (渠道: {channel_name}): {e}")
+    logger.error("发送 Webhook 消息失败 (渠道: %s): %s", channel_name, e)
@@ -4,9 +4,11 @@
 from .alert_service import AlertService
 from .image_service import ImageService
 from .channel_filter import ChannelFilter
+from .response_cache import WebhookResponseCache
 
 __all__ = [
     "AlertService",
     "ImageService",
     "ChannelFilter",
+    "WebhookResponseCache",
 ]
@@ -3,19 +3,25 @@
 
 将业务逻辑从 app.py 中分离出来，使 app.py 只负责 HTTP 路由和请求处理
 """
+import contextvars
 import logging
-from typing import Dict, List, Optional
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from requests.exceptions import HTTPError, RequestException, Timeout, ConnectionError as RequestsConnectionError
 
 from ..routing.grafana_dedup import should_skip_grafana_duplicate
 from ..routing.jenkins_dedup import should_skip_jenkins_firing
-from ..routing.routing import route
+from ..routing.routing import compile_routing, route
 from ..senders.senders import send_telegram, send_webhook
-from ..templates.template_renderer import render
+from ..templates.template_renderer import preload_templates, render
 from .image_service import ImageService
 from .channel_filter import ChannelFilter
 from ..adapters.alert_normalizer import normalize
+from ..core.models import Channel
+from ..core.utils import convert_to_cst
 from ..core.metrics import (
     AlertsDedupSkippedTotal,
     AlertsReceivedTotal,
@@ -33,6 +39,40 @@ from ..core.metrics import (
 
 logger = logging.getLogger("alert-router")
 
+# 单条告警向多个渠道发送时的默认并发线程数（发送为网络 I/O，线程在等待响应时释放 GIL；可由 concurrency.send_workers 覆盖）
+_SEND_MAX_WORKERS = 16
+# 同一 webhook 内多条告警并发处理的默认线程数（与发送线程池分开，避免互相等待造成死锁；可由 concurrency.alert_workers 覆盖）
+_ALERT_MAX_WORKERS = 8
+# 跨请求路由结果缓存的最大条目数（按路由相关标签组合计，超出时淘汰最久未使用的）
+_ROUTE_CACHE_MAX_ENTRIES = 1024
+
+
+def _freeze_label(value: Any) -> Any:
+    """把标签值转为可哈希形式（Prometheus 合并告警后标签值可能是列表）"""
+    if isinstance(value, list):
+        return tuple(_freeze_label(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze_label(v)) for k, v in value.items()))
+    return value
+
+
+def _channel_result(alertname: str, channel_name: str, **fields: Any) -> dict:
+    """构建单个渠道的处理结果（alert / channel 在前，其余字段按状态附加）"""
+    result = {"alert": alertname, "channel": channel_name}
+    result.update(fields)
+    return result
+
+
+def _record_sent(channel_name: str, alert: dict, alertname: str, alert_status: str, outcome: str) -> None:
+    """记录渠道发送结果指标（按渠道 / 告警名 / 严重级别）；指标异常不影响主流程"""
+    try:
+        severity = (alert.get("labels") or {}).get("severity") or "unknown"
+        inc_alerts_sent(channel_name, outcome)
+        inc_alerts_sent_by_name(channel_name, alertname, alert_status, outcome)
+        inc_alerts_sent_by_severity(channel_name, severity, outcome)
+    except Exception:
+        pass
+
 
 class AlertService:
     """告警处理服务"""
@@ -50,6 +90,47 @@ class AlertService:
         self.channel_filter = ChannelFilter(channels)
         # 传入 channel_filter 实例，避免 ImageService 重复创建
         self.image_service = ImageService(config, channels, channel_filter=self.channel_filter)
+        # 路由条件在启动时完成分类与正则编译
+        compile_routing(config)
+        # 路由规则中 match 条件引用到的标签名；只有这些标签影响路由结果，用作路由缓存的键
+        self._route_label_keys: Tuple[str, ...] = tuple(sorted({
+            key
+            for rule in config.get("routing", [])
+            for key in (rule.get("match") or {})
+        }))
+        # 路由结果缓存：路由相关标签 -> 渠道列表；路由规则只读，相同标签组合跨请求复用
+        self._route_cache: "OrderedDict[tuple, List[str]]" = OrderedDict()
+        self._route_lock = threading.Lock()
+        # 渠道分发计划缓存：(渠道列表, 告警状态) -> ((渠道名, 渠道配置, 是否可发送), ...)
+        # 渠道配置只读，计划只与这两个参数有关，跨请求复用
+        self._dispatch_plans: Dict[Tuple[Tuple[str, ...], str], Tuple[Tuple[str, Optional[Channel], bool], ...]] = {}
+        # 标题前缀来自只读配置，启动时取一次
+        self._title_prefix = (config.get("defaults") or {}).get("title_prefix", "[ALERT]")
+        # 启用渠道的模板在启动时编译好，请求路径上只做渲染
+        preload_templates(
+            channels[name].template for name in self.channel_filter.eligible_names("firing")
+        )
+        concurrency_cfg = config.get("concurrency", {}) or {}
+        # 告警处理线程池：同一 webhook 中相互独立的多条告警并发处理
+        self._alert_executor = ThreadPoolExecutor(
+            max_workers=max(1, int(concurrency_cfg.get("alert_workers", _ALERT_MAX_WORKERS))),
+            thread_name_prefix="alert-process",
+        )
+        # 渠道发送线程池：同一告警的多个渠道并发发送，耗时由各渠道之和降为最慢的一个
+        self._send_executor = ThreadPoolExecutor(
+            max_workers=max(1, int(concurrency_cfg.get("send_workers", _SEND_MAX_WORKERS))),
+            thread_name_prefix="alert-send",
+        )
+
+    def close(self) -> None:
+        """关闭线程池，等待已提交的告警处理与发送完成（应用关闭时调用）"""
+        self._alert_executor.shutdown(wait=True)
+        self._send_executor.shutdown(wait=True)
+
+    @staticmethod
+    def _submit(executor: ThreadPoolExecutor, fn, *args, **kwargs):
+        """提交任务到线程池；每个任务复制一份 contextvars，使线程内日志仍带当前请求的 traceId"""
+        return executor.submit(contextvars.copy_context().run, fn, *args, **kwargs)
     
     def process_webhook(self, payload: dict) -> dict:
         """
@@ -95,25 +176,40 @@ class AlertService:
             except Exception:
                 pass
 
-        alert_summary = ", ".join(a.get("labels", {}).get("alertname", "?") for a in alerts)
-        logger.info(f"[处理] 收到告警请求: {len(alerts)} 条 [{alert_summary}]")
+        if logger.isEnabledFor(logging.INFO):
+            alert_summary = ", ".join(a.get("labels", {}).get("alertname", "?") for a in alerts)
+            logger.info("[处理] 收到告警请求: %d 条 [%s]", len(alerts), alert_summary)
+
+        # 去重判断会读写进程内缓存，按到达顺序串行完成，保证同一批次内的重复告警只放行第一条
+        skipped = [self._check_duplicate(alert) for alert in alerts]
+        pending = [alert for alert, skip in zip(alerts, skipped) if skip is None]
+
+        if len(pending) <= 1:
+            processed = [self._process_single_alert(alert) for alert in pending]
+        else:
+            futures = [
+                self._submit(self._alert_executor, self._process_single_alert, alert)
+                for alert in pending
+            ]
+            # 按告警顺序收集结果；未预期异常与串行时一样向上抛出
+            processed = [future.result() for future in futures]
 
         results = []
-        for alert in alerts:
-            result = self._process_single_alert(alert)
-            results.extend(result)
+        processed_iter = iter(processed)
+        for skip in skipped:
+            results.extend(skip if skip is not None else next(processed_iter))
 
         return {"ok": True, "sent": results}
-    
-    def _process_single_alert(self, alert: dict) -> List[dict]:
+
+    def _check_duplicate(self, alert: dict) -> Optional[List[dict]]:
         """
-        处理单条告警
-        
+        告警去重检查（Jenkins / Grafana）
+
         Args:
             alert: 告警对象
-            
+
         Returns:
-            处理结果列表
+            命中去重时返回跳过结果列表，否则返回 None
         """
         labels = alert.get("labels", {})
         alertname = labels.get("alertname") or "Unknown"
@@ -121,7 +217,7 @@ class AlertService:
 
         # Jenkins 告警去重
         if should_skip_jenkins_firing(alert, labels, alert_status, self.config):
-            logger.info(f"告警 {alertname} 命中 Jenkins 去重窗口，跳过重复 firing 通知")
+            logger.info("告警 %s 命中 Jenkins 去重窗口，跳过重复 firing 通知", alertname)
             try:
                 AlertsDedupSkippedTotal.labels(type="jenkins").inc()
             except Exception:
@@ -136,7 +232,7 @@ class AlertService:
 
         # Grafana 告警去重（同一 fingerprint+status 短时间窗口内只发一次）
         if source == "grafana" and should_skip_grafana_duplicate(alert, alert_status, self.config):
-            logger.info(f"告警 {alertname} 命中 Grafana 去重窗口，跳过重复通知")
+            logger.info("告警 %s 命中 Grafana 去重窗口，跳过重复通知", alertname)
             try:
                 AlertsDedupSkippedTotal.labels(type="grafana").inc()
             except Exception:
@@ -147,6 +243,23 @@ class AlertService:
                 "alert_status": alert_status,
             }]
 
+        return None
+    
+    def _process_single_alert(self, alert: dict) -> List[dict]:
+        """
+        处理单条告警（去重检查已在 _check_duplicate 中完成）
+        
+        Args:
+            alert: 告警对象
+            
+        Returns:
+            处理结果列表
+        """
+        labels = alert.get("labels", {})
+        alertname = labels.get("alertname") or "Unknown"
+        alert_status = alert.get("status", "firing")
+        source = alert.get("_source") or labels.get("_source")
+
         # 路由到渠道（使用原始 labels，并附带内部来源用于匹配）
         receiver = alert.get("_receiver")
         match_labels = dict(labels)
@@ -154,8 +267,8 @@ class AlertService:
             match_labels["_source"] = source
         if receiver:
             match_labels["_receiver"] = receiver
-        target_channels = route(match_labels, self.config)
-        logger.info(f"[处理] 告警 {alertname} 路由到渠道: {target_channels}")
+        target_channels = self._route(match_labels)
+        logger.info("[处理] 告警 %s 路由到渠道: %s", alertname, target_channels)
         # 记录路由到各渠道的次数
         for ch_name in target_channels:
             try:
@@ -178,43 +291,122 @@ class AlertService:
             )
         except Exception as img_err:
             logger.warning(
-                f"告警 {alertname} 趋势图生成异常，将仅发送文本: {img_err}",
+                "告警 %s 趋势图生成异常，将仅发送文本: %s",
+                alertname,
+                img_err,
                 exc_info=True,
             )
 
         # 发送到各个渠道（无图时自动走纯文本）
         send_mode = "图片+文本" if image_bytes else "纯文本"
-        logger.info(f"[发送] 告警 {alertname} 将向 {len(target_channels)} 个渠道发送 (方式: {send_mode})")
-        results = []
-        sent_channels = []
+        logger.info("[发送] 告警 %s 将向 %d 个渠道发送 (方式: %s)", alertname, len(target_channels), send_mode)
+        send_kwargs = dict(
+            alert=alert,
+            alertname=alertname,
+            alert_status=alert_status,
+            ctx=ctx,
+            image_bytes=image_bytes,
+            source=source,
+        )
+        plan = self._dispatch_plan(target_channels, alert_status)
+        if len(plan) <= 1:
+            results = [
+                self._send_to_channel(
+                    channel_name=channel_name,
+                    channel=channel,
+                    eligible=eligible,
+                    **send_kwargs,
+                )
+                for channel_name, channel, eligible in plan
+            ]
+        else:
+            futures = [
+                self._submit(
+                    self._send_executor,
+                    self._send_to_channel,
+                    channel_name=channel_name,
+                    channel=channel,
+                    eligible=eligible,
+                    **send_kwargs,
+                )
+                for channel_name, channel, eligible in plan
+            ]
+            # 按渠道顺序收集结果；未预期异常与串行时一样向上抛出
+            results = [future.result() for future in futures]
 
-        for channel_name in target_channels:
-            result = self._send_to_channel(
-                channel_name=channel_name,
-                alert=alert,
-                alertname=alertname,
-                alert_status=alert_status,
-                ctx=ctx,
-                image_bytes=image_bytes,
-                source=source,
-            )
-            results.append(result)
-            
-            if result.get("status") == "sent":
-                sent_channels.append(channel_name)
+        sent_channels = [r["channel"] for r in results if r.get("status") == "sent"]
 
         if sent_channels:
-            channels_str = ", ".join(sent_channels)
             logger.info(
-                f"[发送] 告警 {alertname} 已发送到 {len(sent_channels)} 个渠道: "
-                f"{channels_str} (状态: {alert_status})"
+                "[发送] 告警 %s 已发送到 %d 个渠道: %s (状态: %s)",
+                alertname,
+                len(sent_channels),
+                ", ".join(sent_channels),
+                alert_status,
             )
         for r in results:
             if r.get("error"):
-                logger.warning(f"[发送] 告警 {alertname} 渠道 {r.get('channel')} 失败: {r.get('error')}")
+                logger.warning("[发送] 告警 %s 渠道 %s 失败: %s", alertname, r.get("channel"), r.get("error"))
 
         return results
     
+    def _route(self, match_labels: dict) -> List[str]:
+        """
+        路由告警（路由相关标签相同的告警只计算一次，结果跨请求复用）
+
+        Args:
+            match_labels: 用于匹配的标签（含 _source / _receiver）
+
+        Returns:
+            渠道名称列表（只读，多条告警共享）
+        """
+        key = tuple(_freeze_label(match_labels.get(k)) for k in self._route_label_keys)
+        # 锁只保护缓存读写；路由计算放在锁外，避免一次慢计算阻塞其它线程的缓存命中
+        with self._route_lock:
+            target_channels = self._route_cache.get(key)
+            if target_channels is not None:
+                self._route_cache.move_to_end(key)
+                return target_channels
+        # 路由只取决于只读配置，并发未命中时重复计算无害，写入时以先到者为准
+        target_channels = route(match_labels, self.config)
+        with self._route_lock:
+            cached = self._route_cache.get(key)
+            if cached is not None:
+                return cached
+            self._route_cache[key] = target_channels
+            while len(self._route_cache) > _ROUTE_CACHE_MAX_ENTRIES:
+                self._route_cache.popitem(last=False)
+        return target_channels
+
+    def _dispatch_plan(
+        self,
+        target_channels: List[str],
+        alert_status: str,
+    ) -> Tuple[Tuple[str, Optional[Channel], bool], ...]:
+        """
+        获取渠道分发计划（同一渠道列表 + 告警状态只解析一次）
+
+        Args:
+            target_channels: 路由得到的渠道名称列表
+            alert_status: 告警状态
+
+        Returns:
+            按渠道顺序排列的 (渠道名, 渠道配置或 None, 是否可发送) 元组
+        """
+        # 状态来自请求体，取值不受控：只区分 resolved 与其它（与渠道过滤规则一致），缓存键集合有界
+        status_key = "resolved" if alert_status == "resolved" else "firing"
+        key = (tuple(target_channels), status_key)
+        plan = self._dispatch_plans.get(key)
+        if plan is None:
+            # 计算结果只取决于只读配置，并发下重复计算无害，不加锁
+            eligible = self.channel_filter.eligible_names(status_key)
+            plan = tuple(
+                (name, self.channels.get(name), name in eligible)
+                for name in target_channels
+            )
+            self._dispatch_plans[key] = plan
+        return plan
+
     def _build_template_context(self, alert: dict, labels: dict) -> dict:
         """
         构建模板渲染上下文
@@ -226,26 +418,69 @@ class AlertService:
         Returns:
             模板上下文字典
         """
-        # 安全获取 title_prefix，如果不存在则使用默认值
-        defaults = self.config.get("defaults", {})
-        title_prefix = defaults.get("title_prefix", "[ALERT]")
         alertname = labels.get("alertname") or "Unknown"
 
         return {
-            "title": f"{title_prefix} {alertname}".strip(),
+            "title": f"{self._title_prefix} {alertname}".strip(),
             "status": alert.get("status", "unknown"),
             "labels": labels,
             "annotations": alert.get("annotations", {}),
-            "startsAt": alert.get("startsAt", ""),
-            "endsAt": alert.get("endsAt", ""),
+            # 时间在构建上下文时统一转换一次，各渠道渲染时不再重复解析
+            "startsAt": convert_to_cst(alert.get("startsAt", "")),
+            "endsAt": convert_to_cst(alert.get("endsAt", "")),
             "generatorURL": alert.get("generatorURL", ""),
             # Grafana webhook 顶层的 receiver（通知策略名），供模板按策略分支而非依赖 alertname 展示名
             "receiver": alert.get("_receiver") or "",
         }
     
+    def _ineligible_result(
+        self,
+        channel_name: str,
+        channel: Optional[Channel],
+        alert: dict,
+        alertname: str,
+        alert_status: str,
+    ) -> dict:
+        """
+        渠道不可发送时，判断具体原因并返回跳过结果
+
+        Args:
+            channel_name: 渠道名称
+            channel: 渠道配置（不存在时为 None）
+            alert: 告警对象
+            alertname: 告警名称
+            alert_status: 告警状态
+
+        Returns:
+            跳过 / 错误结果字典
+        """
+        if not channel:
+            error_msg = f"渠道不存在: {channel_name}"
+            logger.warning("告警 %s: %s", alertname, error_msg)
+            _record_sent(channel_name, alert, alertname, alert_status, "skipped")
+            return _channel_result(alertname, channel_name, error=error_msg)
+
+        # 检查渠道是否启用
+        if not channel.enabled:
+            logger.debug("告警 %s 跳过已禁用的渠道: %s", alertname, channel_name)
+            _record_sent(channel_name, alert, alertname, alert_status, "skipped")
+            return _channel_result(alertname, channel_name, skipped="渠道已禁用")
+
+        # 检查是否发送 resolved 状态
+        if alert_status == "resolved" and not channel.send_resolved:
+            logger.debug(
+                "告警 %s 跳过 resolved 状态（渠道 %s 配置为不发送 resolved）",
+                alertname,
+                channel_name,
+            )
+            _record_sent(channel_name, alert, alertname, alert_status, "skipped")
+            return _channel_result(alertname, channel_name, skipped="resolved 状态已禁用")
+
     def _send_to_channel(
         self,
         channel_name: str,
+        channel: Optional[Channel],
+        eligible: bool,
         alert: dict,
         alertname: str,
         alert_status: str,
@@ -258,6 +493,8 @@ class AlertService:
         
         Args:
             channel_name: 渠道名称
+            channel: 渠道配置（不存在时为 None）
+            eligible: 渠道对当前告警状态是否可发送（来自分发计划）
             alert: 告警对象
             alertname: 告警名称
             alert_status: 告警状态
@@ -268,41 +505,9 @@ class AlertService:
         Returns:
             发送结果字典
         """
-        channel = self.channels.get(channel_name)
-        if not channel:
-            error_msg = f"渠道不存在: {channel_name}"
-            logger.warning(f"告警 {alertname}: {error_msg}")
-            try:
-                inc_alerts_sent(channel_name, "skipped")
-                inc_alerts_sent_by_name(channel_name, alertname, alert_status, "skipped")
-                inc_alerts_sent_by_severity(channel_name, (alert.get("labels") or {}).get("severity") or "unknown", "skipped")
-            except Exception:
-                pass
-            return {"alert": alertname, "channel": channel_name, "error": error_msg}
-
-        # 检查渠道是否启用
-        if not channel.enabled:
-            logger.debug(f"告警 {alertname} 跳过已禁用的渠道: {channel_name}")
-            try:
-                inc_alerts_sent(channel_name, "skipped")
-                inc_alerts_sent_by_name(channel_name, alertname, alert_status, "skipped")
-                inc_alerts_sent_by_severity(channel_name, (alert.get("labels") or {}).get("severity") or "unknown", "skipped")
-            except Exception:
-                pass
-            return {"alert": alertname, "channel": channel_name, "skipped": "渠道已禁用"}
-
-        # 检查是否发送 resolved 状态
-        if alert_status == "resolved" and not channel.send_resolved:
-            logger.debug(
-                f"告警 {alertname} 跳过 resolved 状态（渠道 {channel_name} 配置为不发送 resolved）"
-            )
-            try:
-                inc_alerts_sent(channel_name, "skipped")
-                inc_alerts_sent_by_name(channel_name, alertname, alert_status, "skipped")
-                inc_alerts_sent_by_severity(channel_name, (alert.get("labels") or {}).get("severity") or "unknown", "skipped")
-            except Exception:
-                pass
-            return {"alert": alertname, "channel": channel_name, "skipped": "resolved 状态已禁用"}
+        # 可发送与否已在分发计划中确定；只有不可发送时才逐项判断跳过原因
+        if not eligible:
+            return self._ineligible_result(channel_name, channel, alert, alertname, alert_status)
 
         import time as _time
 
@@ -316,29 +521,38 @@ class AlertService:
                 and bool(image_bytes)
             )
             logger.info(
-                f"[发送] 告警 {alertname} -> 渠道 [{channel_name}] "
-                f"(类型: {channel.type}, 方式: {'图片+文本' if use_image else '纯文本'}), 内容长度={len(body)}"
+                "[发送] 告警 %s -> 渠道 [%s] (类型: %s, 方式: %s), 内容长度=%d",
+                alertname,
+                channel_name,
+                channel.type,
+                "图片+文本" if use_image else "纯文本",
+                len(body),
             )
             if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"[发送] 渠道 [{channel_name}] 将发送的内容:\n{body}")
+                logger.debug("[发送] 渠道 [%s] 将发送的内容:\n%s", channel_name, body)
 
             # 发送消息
             if channel.type == "telegram":
                 if use_image:
                     try:
                         send_telegram(channel, body, photo_bytes=image_bytes)
-                        logger.info(f"告警 {alertname} 渠道 {channel_name} 图片发送成功")
+                        logger.info("告警 %s 渠道 %s 图片发送成功", alertname, channel_name)
                     except Exception as img_err:
                         logger.warning(
-                            f"告警 {alertname} 渠道 {channel_name} 图片发送失败，"
-                            f"自动回退文本发送: {img_err}"
+                            "告警 %s 渠道 %s 图片发送失败，自动回退文本发送: %s",
+                            alertname,
+                            channel_name,
+                            img_err,
                         )
                         try:
                             send_telegram(channel, body)
-                            logger.info(f"告警 {alertname} 渠道 {channel_name} 文本回退发送成功")
+                            logger.info("告警 %s 渠道 %s 文本回退发送成功", alertname, channel_name)
                         except Exception as fallback_err:
                             logger.error(
-                                f"告警 {alertname} 渠道 {channel_name} 文本回退发送失败: {fallback_err}",
+                                "告警 %s 渠道 %s 文本回退发送失败: %s",
+                                alertname,
+                                channel_name,
+                                fallback_err,
                                 exc_info=True,
                             )
                             raise
@@ -353,18 +567,8 @@ class AlertService:
                 )
             except Exception:
                 pass
-            try:
-                inc_alerts_sent(channel_name, "success")
-                inc_alerts_sent_by_name(channel_name, alertname, alert_status, "success")
-                inc_alerts_sent_by_severity(channel_name, (alert.get("labels") or {}).get("severity") or "unknown", "success")
-            except Exception:
-                pass
-            return {
-                "alert": alertname,
-                "channel": channel_name,
-                "status": "sent",
-                "alert_status": alert_status,
-            }
+            _record_sent(channel_name, alert, alertname, alert_status, "success")
+            return _channel_result(alertname, channel_name, status="sent", alert_status=alert_status)
         except RequestException as e:
             error_msg = str(e)
             # 404/401/410 为 Webhook URL 配置问题，不打印堆栈
@@ -376,12 +580,17 @@ class AlertService:
             if is_config_error:
                 # Webhook 发送层已记录了该类配置错误，这里避免重复 warning 造成日志噪音
                 logger.info(
-                    f"告警 {alertname} 渠道 {channel_name} 发送失败(配置问题): "
-                    "请检查 Webhook URL 是否有效、未过期或已被删除"
+                    "告警 %s 渠道 %s 发送失败(配置问题): "
+                    "请检查 Webhook URL 是否有效、未过期或已被删除",
+                    alertname,
+                    channel_name,
                 )
             else:
                 logger.error(
-                    f"告警 {alertname} 发送到渠道 {channel_name} 失败: {error_msg}",
+                    "告警 %s 发送到渠道 %s 失败: %s",
+                    alertname,
+                    channel_name,
+                    error_msg,
                     exc_info=True,
                 )
             # 记录发送失败及原因
@@ -401,24 +610,23 @@ class AlertService:
                     except Exception:
                         pass
             try:
-                inc_alerts_sent(channel_name, "failure")
                 inc_alerts_send_failure(channel_name, reason)
-                inc_alerts_sent_by_name(channel_name, alertname, alert_status, "failure")
-                inc_alerts_sent_by_severity(channel_name, (alert.get("labels") or {}).get("severity") or "unknown", "failure")
             except Exception:
                 pass
-            return {"alert": alertname, "channel": channel_name, "error": error_msg}
+            _record_sent(channel_name, alert, alertname, alert_status, "failure")
+            return _channel_result(alertname, channel_name, error=error_msg)
         except Exception as e:
             error_msg = str(e)
             logger.critical(
-                f"告警 {alertname} 发送到渠道 {channel_name} 发生未预期错误: {error_msg}",
+                "告警 %s 发送到渠道 %s 发生未预期错误: %s",
+                alertname,
+                channel_name,
+                error_msg,
                 exc_info=True,
             )
             try:
-                inc_alerts_sent(channel_name, "failure")
                 inc_alerts_send_failure(channel_name, "unknown")
-                inc_alerts_sent_by_name(channel_name, alertname, alert_status, "failure")
-                inc_alerts_sent_by_severity(channel_name, (alert.get("labels") or {}).get("severity") or "unknown", "failure")
             except Exception:
                 pass
+            _record_sent(channel_name, alert, alertname, alert_status, "failure")
             raise
@@ -3,7 +3,7 @@
 
 提取渠道过滤逻辑，消除重复代码
 """
-from typing import Dict, List
+from typing import Dict, FrozenSet, List
 
 from ..core.models import Channel
 
@@ -19,6 +19,24 @@ class ChannelFilter:
             channels: 渠道字典
         """
         self.channels = channels
+        # 渠道是否可发送只取决于配置，加载时一次算好，请求路径上只做集合查找
+        self._eligible_firing: FrozenSet[str] = frozenset(
+            name for name, ch in channels.items() if ch.enabled
+        )
+        self._eligible_resolved: FrozenSet[str] = frozenset(
+            name for name in self._eligible_firing if channels[name].send_resolved
+        )
+        self._image_firing: FrozenSet[str] = frozenset(
+            name for name in self._eligible_firing
+            if channels[name].type == "telegram" and channels[name].image_enabled
+        )
+        self._image_resolved: FrozenSet[str] = self._image_firing & self._eligible_resolved
+
+    def eligible_names(self, alert_status: str) -> FrozenSet[str]:
+        """返回该告警状态下可发送的渠道名集合（已启用，resolved 时还需开启 send_resolved）"""
+        if alert_status == "resolved":
+            return self._eligible_resolved
+        return self._eligible_firing
     
     def filter_image_channels(
         self,
@@ -35,19 +53,8 @@ class ChannelFilter:
         Returns:
             需要图片的渠道列表
         """
-        image_channels = []
-        for channel_name in target_channels:
-            channel = self.channels.get(channel_name)
-            if not channel:
-                continue
-            if channel.type != "telegram" or not channel.enabled:
-                continue
-            if self._should_skip_by_status(channel, alert_status):
-                continue
-            if not channel.image_enabled:
-                continue
-            image_channels.append(channel)
-        return image_channels
+        eligible = self._image_resolved if alert_status == "resolved" else self._image_firing
+        return [self.channels[name] for name in target_channels if name in eligible]
     
     def filter_enabled_channels(
         self,
@@ -64,17 +71,5 @@ class ChannelFilter:
         Returns:
             启用的渠道列表
         """
-        enabled_channels = []
-        for channel_name in target_channels:
-            channel = self.channels.get(channel_name)
-            if not channel or not channel.enabled:
-                continue
-            if self._should_skip_by_status(channel, alert_status):
-                continue
-            enabled_channels.append(channel)
-        return enabled_channels
-
-    @staticmethod
-    def _should_skip_by_status(channel: Channel, alert_status: str) -> bool:
-        """检查是否应该跳过该渠道（基于告警状态）"""
-        return alert_status == "resolved" and not channel.send_resolved
+        eligible = self.eligible_names(alert_status)
+        return [self.channels[name] for name in target_channels if name in eligible]
@@ -29,6 +29,49 @@ class ImageService:
         self.config = config
         self.channels = channels or {}
         self._channel_filter = channel_filter
+        # 出图配置只在启动时解析一次，请求路径上不再做 dict 取值与 int() 转换
+        self._prometheus_cfg = self._parse_prometheus_cfg(config.get("prometheus_image", {}) or {})
+        self._grafana_cfg = self._parse_grafana_cfg(config.get("grafana_image", {}) or {})
+
+    @staticmethod
+    def _parse_common_cfg(image_cfg: Dict) -> Dict:
+        """解析 Prometheus / Grafana 出图的公共配置项"""
+        return {
+            "enabled": bool(image_cfg.get("enabled", True)),
+            "use_proxy": bool(image_cfg.get("use_proxy", False)),
+            "prometheus_url": image_cfg.get("prometheus_url") or None,
+            "lookback_minutes": int(image_cfg.get("lookback_minutes", 15)),
+            "step": str(image_cfg.get("step", "30s")),
+            "timeout_seconds": int(image_cfg.get("timeout_seconds", 8)),
+            "max_series": int(image_cfg.get("max_series", 8)),
+        }
+
+    @classmethod
+    def _parse_prometheus_cfg(cls, image_cfg: Dict) -> Dict:
+        """解析 prometheus_image 配置"""
+        cfg = cls._parse_common_cfg(image_cfg)
+        # 从配置读取绘图引擎（默认使用 plotly）
+        cfg["use_plotly"] = str(image_cfg.get("plot_engine", "plotly")).lower() == "plotly"
+        legend_whitelist = image_cfg.get("legend_label_whitelist")
+        if legend_whitelist is not None and not isinstance(legend_whitelist, list):
+            legend_whitelist = None
+        cfg["legend_label_whitelist"] = legend_whitelist
+        # 数据源：auto（按 generatorURL 推断）/ prometheus / victoriametrics；仅 Prometheus 时 inject_labels 生效
+        datasource_type = image_cfg.get("datasource")
+        if datasource_type is not None and not isinstance(datasource_type, str):
+            datasource_type = None
+        cfg["datasource_type"] = datasource_type
+        inject_labels = image_cfg.get("inject_labels")
+        cfg["inject_labels"] = inject_labels if isinstance(inject_labels, bool) else None
+        return cfg
+
+    @classmethod
+    def _parse_grafana_cfg(cls, image_cfg: Dict) -> Dict:
+        """解析 grafana_image 配置"""
+        cfg = cls._parse_common_cfg(image_cfg)
+        cfg["grafana_url"] = image_cfg.get("grafana_url") or None
+        cfg["grafana_api_token"] = image_cfg.get("grafana_api_token") or None
+        return cfg
     
     def generate_image(
         self,
@@ -86,8 +129,8 @@ class ImageService:
         Returns:
             图片字节（如果生成失败则返回 None）
         """
-        image_cfg = self.config.get("prometheus_image", {}) or {}
-        if not image_cfg.get("enabled", True):
+        image_cfg = self._prometheus_cfg
+        if not image_cfg["enabled"]:
             # 配置关闭，不视为失败
             return None
 
@@ -102,17 +145,14 @@ class ImageService:
             return None
 
         # 根据配置决定是否使用代理
-        use_proxy = image_cfg.get("use_proxy", False)
         plot_proxy = None
-        if use_proxy:
+        if image_cfg["use_proxy"]:
             # 如果启用代理，从渠道配置获取代理设置
             plot_proxy = next(
-                (c.proxy for c in image_channels if c.proxy),
+                (dict(c.proxy) for c in image_channels if c.proxy),
                 None
             )
 
-        prometheus_url = image_cfg.get("prometheus_url") or None
-        
         # 根据告警状态选择时间：firing 用 startsAt，resolved 用 endsAt
         alert_time = (
             alert.get("endsAt")
@@ -120,34 +160,22 @@ class ImageService:
             else alert.get("startsAt")
         )
 
-        # 从配置读取绘图引擎（默认使用 plotly）
-        plot_engine = image_cfg.get("plot_engine", "plotly")
-        use_plotly = plot_engine.lower() == "plotly"
-
-        legend_whitelist = image_cfg.get("legend_label_whitelist")
-        if legend_whitelist is not None and not isinstance(legend_whitelist, list):
-            legend_whitelist = None
-        # 数据源：auto（按 generatorURL 推断）/ prometheus / victoriametrics；仅 Prometheus 时 inject_labels 生效
-        datasource_type = image_cfg.get("datasource")
-        if datasource_type is not None and not isinstance(datasource_type, str):
-            datasource_type = None
-        inject_labels = image_cfg.get("inject_labels")
         try:
             image_bytes = generate_plot_from_generator_url(
                 alert.get("generatorURL", ""),
-                prometheus_url=prometheus_url,
+                prometheus_url=image_cfg["prometheus_url"],
                 proxies=plot_proxy,
-                lookback_minutes=int(image_cfg.get("lookback_minutes", 15)),
-                step=str(image_cfg.get("step", "30s")),
-                timeout_seconds=int(image_cfg.get("timeout_seconds", 8)),
-                max_series=int(image_cfg.get("max_series", 8)),
+                lookback_minutes=image_cfg["lookback_minutes"],
+                step=image_cfg["step"],
+                timeout_seconds=image_cfg["timeout_seconds"],
+                max_series=image_cfg["max_series"],
                 alertname=alertname,
                 alert_time=alert_time,
-                use_plotly=use_plotly,
+                use_plotly=image_cfg["use_plotly"],
                 alert_labels=alert.get("labels") or {},
-                legend_label_whitelist=legend_whitelist,
-                datasource_type=datasource_type,
-                inject_labels=inject_labels if isinstance(inject_labels, bool) else None,
+                legend_label_whitelist=image_cfg["legend_label_whitelist"],
+                datasource_type=image_cfg["datasource_type"],
+                inject_labels=image_cfg["inject_labels"],
             )
         except Exception as exc:
             logger.warning("Prometheus 趋势图生成异常: %s", exc, exc_info=True)
@@ -158,13 +186,13 @@ class ImageService:
                 pass
 
         if image_bytes:
-            logger.info(f"告警 {alertname} 已生成趋势图，将优先按图片发送 Telegram")
+            logger.info("告警 %s 已生成趋势图，将优先按图片发送 Telegram", alertname)
             try:
                 ImageGeneratedTotal.labels(source="prometheus", status="ok").inc()
             except Exception:
                 pass
         else:
-            logger.info(f"告警 {alertname} 未生成趋势图，将按文本发送 Telegram")
+            logger.info("告警 %s 未生成趋势图，将按文本发送 Telegram", alertname)
             try:
                 ImageGeneratedTotal.labels(source="prometheus", status="fail").inc()
             except Exception:
@@ -191,8 +219,8 @@ class ImageService:
         Returns:
             图片字节（如果生成失败则返回 None）
         """
-        image_cfg = self.config.get("grafana_image", {}) or {}
-        if not image_cfg.get("enabled", True):
+        image_cfg = self._grafana_cfg
+        if not image_cfg["enabled"]:
             return None
 
         # 过滤出需要图片的 Telegram 渠道
@@ -205,19 +233,14 @@ class ImageService:
             return None
 
         # 根据配置决定是否使用代理
-        use_proxy = image_cfg.get("use_proxy", False)
         plot_proxy = None
-        if use_proxy:
+        if image_cfg["use_proxy"]:
             # 如果启用代理，从渠道配置获取代理设置
             plot_proxy = next(
-                (c.proxy for c in image_channels if c.proxy),
+                (dict(c.proxy) for c in image_channels if c.proxy),
                 None
             )
 
-        grafana_url = image_cfg.get("grafana_url") or None
-        grafana_api_token = image_cfg.get("grafana_api_token") or None
-        prometheus_url = image_cfg.get("prometheus_url") or None
-        
         # 根据告警状态选择时间：firing 用 startsAt，resolved 用 endsAt
         alert_time = (
             alert.get("endsAt")
@@ -227,22 +250,22 @@ class ImageService:
 
         image_bytes = generate_plot_from_grafana_generator_url(
             alert.get("generatorURL", ""),
-            grafana_url=grafana_url,
-            grafana_api_token=grafana_api_token,
-            prometheus_url=prometheus_url,
+            grafana_url=image_cfg["grafana_url"],
+            grafana_api_token=image_cfg["grafana_api_token"],
+            prometheus_url=image_cfg["prometheus_url"],
             proxies=plot_proxy,
-            lookback_minutes=int(image_cfg.get("lookback_minutes", 15)),
-            step=str(image_cfg.get("step", "30s")),
-            timeout_seconds=int(image_cfg.get("timeout_seconds", 8)),
-            max_series=int(image_cfg.get("max_series", 8)),
+            lookback_minutes=image_cfg["lookback_minutes"],
+            step=image_cfg["step"],
+            timeout_seconds=image_cfg["timeout_seconds"],
+            max_series=image_cfg["max_series"],
             alertname=alertname,
             alert_time=alert_time,
         )
         
         if image_bytes:
-            logger.info(f"告警 {alertname} 已生成趋势图，将优先按图片发送 Telegram")
+            logger.info("告警 %s 已生成趋势图，将优先按图片发送 Telegram", alertname)
         else:
-            logger.info(f"告警 {alertname} 未生成趋势图，将按文本发送 Telegram")
+            logger.info("告警 %s 未生成趋势图，将按文本发送 Telegram", alertname)
         
         return image_bytes
     
@@ -0,0 +1,74 @@
+"""
+Webhook 响应缓存
+
+上游重试（Grafana / Alertmanager 超时重发）会在几秒内推送字节完全相同的请求体。
+按请求体哈希缓存最近的处理结果，短时间内的重复请求直接返回上次结果，
+跳过 JSON 解析、去重、路由、出图与发送。
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, Optional, Tuple
+
+
+class WebhookResponseCache:
+    """按请求体哈希缓存处理结果（带 TTL 的 LRU）"""
+
+    def __init__(self, config: Dict):
+        """
+        初始化响应缓存
+
+        Args:
+            config: 配置字典（读取 webhook_cache 节点）
+        """
+        cache_cfg = (config or {}).get("webhook_cache", {}) or {}
+        self.enabled = bool(cache_cfg.get("enabled", True))
+        self.ttl_seconds = float(cache_cfg.get("ttl_seconds", 10))
+        self.max_entries = max(1, int(cache_cfg.get("max_entries", 1024)))
+        # key -> (过期时间戳, 响应)；按写入顺序排列，超出容量时淘汰最旧的
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def key_for(body: bytes) -> bytes:
+        """计算请求体哈希（blake2b 128 位，足以区分不同负载）"""
+        return hashlib.blake2b(body, digest_size=16).digest()
+
+    def get(self, key: bytes) -> Optional[dict]:
+        """
+        查询缓存
+
+        Args:
+            key: 请求体哈希
+
+        Returns:
+            未过期的缓存响应，不存在或已过期时返回 None
+        """
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at <= time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            return response
+
+    def put(self, key: bytes, response: dict) -> None:
+        """
+        写入缓存（仅应写入处理成功的响应，失败的请求需要允许上游重试）
+
+        Args:
+            key: 请求体哈希
+            response: 处理结果
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -1,14 +1,57 @@
 """
 模板渲染模块
 """
-from typing import Dict, Any
-from jinja2 import Environment, FileSystemLoader
+import os
+from typing import Dict, Any, Iterable, Optional
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, TemplateError
+from ..core.logging_config import get_logger
 from ..core.utils import convert_to_cst, mask_ssh_fingerprint, replace_times_in_description, url_to_link
 
+logger = get_logger("alert-router")
+
+# 模板编译结果的磁盘缓存目录：多 worker / 重启时直接加载字节码，省去重复解析编译
+_BYTECODE_CACHE_DIR = ".jinja_cache"
+
+
+class _BestEffortBytecodeCache(FileSystemBytecodeCache):
+    """写缓存失败（磁盘满、目录变只读等）时不让模板加载失败：记录一次告警后停止写缓存"""
+
+    def __init__(self, directory: str) -> None:
+        super().__init__(directory)
+        self._dump_disabled = False
+
+    def dump_bytecode(self, bucket) -> None:
+        if self._dump_disabled:
+            return
+        try:
+            super().dump_bytecode(bucket)
+        except OSError as e:
+            self._dump_disabled = True
+            logger.warning("模板字节码缓存写入失败，已停用写缓存: %s", e)
+
+
+def _create_bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    """创建模板字节码缓存；目录不可写时不启用（只影响启动耗时，不影响渲染）"""
+    try:
+        os.makedirs(_BYTECODE_CACHE_DIR, exist_ok=True)
+    except OSError:
+        return None
+    # 目录已存在但只读（如 systemd ProtectSystem=strict）时写缓存会让模板加载失败，直接不启用
+    if not os.access(_BYTECODE_CACHE_DIR, os.W_OK):
+        return None
+    return _BestEffortBytecodeCache(_BYTECODE_CACHE_DIR)
+
+
 env = Environment(
     loader=FileSystemLoader("templates"),
     trim_blocks=True,  # 移除模板标签后的第一个换行
-    lstrip_blocks=True  # 移除模板标签前的空格
+    lstrip_blocks=True,  # 移除模板标签前的空格
+    # 模板输出 JSON（Slack 等）与 Telegram HTML 文本，均按原样拼接，不做 HTML 自动转义
+    autoescape=False,
+    # 模板文件只在部署时变更：关闭每次取模板时的 mtime 检查，编译结果不淘汰
+    auto_reload=False,
+    cache_size=-1,
+    bytecode_cache=_create_bytecode_cache(),
 )
 
 # 注册自定义过滤器
@@ -16,6 +59,35 @@ env.filters["url_to_link"] = url_to_link
 env.filters["convert_to_cst"] = convert_to_cst
 env.filters["mask_ssh_fingerprint"] = mask_ssh_fingerprint
 
+# 模板名 -> 已编译模板，热路径上直接取，不再经过 loader
+_compiled_templates: Dict[str, Template] = {}
+
+
+def get_compiled_template(template: str) -> Template:
+    """获取已编译模板（首次使用时编译并缓存）"""
+    compiled = _compiled_templates.get(template)
+    if compiled is None:
+        compiled = env.get_template(template)
+        _compiled_templates[template] = compiled
+    return compiled
+
+
+def preload_templates(templates: Iterable[str]) -> None:
+    """
+    启动时预编译模板，避免首条告警承担编译开销
+
+    Args:
+        templates: 模板文件名列表
+    """
+    for template in templates:
+        if not template:
+            continue
+        try:
+            get_compiled_template(template)
+        except TemplateError as e:
+            # 模板缺失或语法错误不阻止启动，发送时仍按原逻辑报错
+            logger.warning("预编译模板失败: %s: %s", template, e)
+
 
 def render(template: str, ctx: Dict[str, Any]) -> str:
     """
@@ -28,14 +100,24 @@ def render(template: str, ctx: Dict[str, Any]) -> str:
     Returns:
         str: 渲染后的文本
     """
-    # 转换时间为 CST
-    if ctx.get("startsAt"):
-        ctx["startsAt"] = convert_to_cst(ctx["startsAt"])
-    if ctx.get("endsAt"):
-        ctx["endsAt"] = convert_to_cst(ctx["endsAt"])
-    
+    # 同一告警的 ctx 会被多个渠道并发渲染，需要修改时只改副本，不回写调用方的 ctx；
+    # AlertService 构建上下文时已转换好时间，通常无需复制
+    overrides: Dict[str, Any] = {}
+
+    # 转换时间为 CST（已是本地格式时原样返回）
+    for key in ("startsAt", "endsAt"):
+        value = ctx.get(key)
+        if value:
+            converted = convert_to_cst(value)
+            if converted != value:
+                overrides[key] = converted
+
     # 替换 description 中的时间（仅对 Slack 模板）
     if template.endswith(".json.j2") and ctx.get("annotations", {}).get("description"):
-        ctx["annotations"]["description"] = replace_times_in_description(ctx["annotations"]["description"])
-    
-    return env.get_template(template).render(**ctx)
+        annotations = dict(ctx["annotations"])
+        annotations["description"] = replace_times_in_description(annotations["description"])
+        overrides["annotations"] = annotations
+
+    if overrides:
+        ctx = {**ctx, **overrides}
+    return get_compiled_template(template).render(**ctx)
@@ -11,14 +11,26 @@ FastAPI 应用主入口
 import json
 import logging
 import os
+import sys
 import time
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Optional
 
+import anyio.to_thread
 from fastapi import FastAPI, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse
 from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from alert_router.core.config import load_config
-from alert_router.core.logging_config import new_trace_id, set_trace_id, setup_logging
+from alert_router.core.logging_config import (
+    new_trace_id,
+    route_to_queue,
+    set_trace_id,
+    setup_logging,
+    stop_logging,
+)
 from alert_router.core.metrics import (
     HttpServerRequestDuration,
     HttpServerRequestsTotal,
@@ -27,6 +39,17 @@ from alert_router.core.metrics import (
     inc_webhook_error,
 )
 
+# 尝试使用 orjson 解析请求体与序列化响应（可选，未安装时回退标准库 json）
+# orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，下方异常处理无需区分
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse
+    _json_loads = orjson.loads
+    _DEFAULT_RESPONSE_CLASS = ORJSONResponse
+except ImportError:
+    _json_loads = json.loads
+    _DEFAULT_RESPONSE_CLASS = JSONResponse
+
 # 加载配置（config 只读配置，不初始化日志）
 CONFIG, CHANNELS = load_config()
 # 由 app 在启动时显式初始化日志（仅此一处），避免重复 handler 导致同一条日志打两遍
@@ -35,13 +58,81 @@ setup_logging(**CONFIG["logging"])
 logger = logging.getLogger("alert-router")
 log_cfg = CONFIG["logging"]
 logger.info(
-    f"配置加载完成，共 {len(CHANNELS)} 个渠道；"
-    f"日志: level={log_cfg.get('level', 'INFO')}, 文件={log_cfg.get('log_dir', 'logs')}/{log_cfg.get('log_file', 'alert-router.log')}"
+    "配置加载完成，共 %d 个渠道；日志: level=%s, 文件=%s/%s",
+    len(CHANNELS),
+    log_cfg.get("level", "INFO"),
+    log_cfg.get("log_dir", "logs"),
+    log_cfg.get("log_file", "alert-router.log"),
 )
 
 # 初始化服务实例（在应用启动时创建，避免重复加载配置）
 from alert_router.services.alert_service import AlertService
+from alert_router.services.response_cache import WebhookResponseCache
 _alert_service = AlertService(CONFIG, CHANNELS)
+# 字节完全相同的重试请求在短时间内直接返回上次结果
+_response_cache = WebhookResponseCache(CONFIG)
+
+# 由只读配置派生的统计值只算一次（复用渠道过滤器预先算好的可发送集合）
+_ENABLED_CHANNEL_COUNT = len(_alert_service.channel_filter.eligible_names("firing"))
+# 监听地址同样来自只读配置，启动日志与直接启动入口共用
+_SERVER_CONFIG = CONFIG.get("server", {}) or {}
+_SERVER_HOST = _SERVER_CONFIG.get("host")
+_SERVER_PORT = _SERVER_CONFIG.get("port")
+# server.host 写成 unix:/path/to.sock 时监听 UNIX 域套接字（部署在同机 nginx 之后，省去本机 TCP 协议栈）
+_SERVER_UDS = (
+    _SERVER_HOST[len("unix:"):]
+    if isinstance(_SERVER_HOST, str) and _SERVER_HOST.startswith("unix:")
+    else None
+)
+# uvicorn 访问日志默认关闭：webhook 处理本身已有日志与 Prometheus 请求指标，逐请求再写一行收益很小
+# 开启时（server.access_log: true）访问日志走与业务日志相同的后台队列，不在事件循环线程上写 stderr
+_SERVER_ACCESS_LOG = bool(_SERVER_CONFIG.get("access_log", False))
+
+
+@dataclass(frozen=True)
+class _ServerCfg:
+    """直接启动时从环境变量读取的进程参数（启动时解析并校验一次）"""
+    workers: int
+    timeout: int
+    limit_concurrency: int
+
+
+def _env_int(name: str, default: int, low: int, high: Optional[int] = None) -> int:
+    """读取整数环境变量并校验范围，非法值在启动时直接报错而不是运行中才暴露"""
+    raw = os.getenv(name)
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ValueError(f"环境变量 {name} 必须是整数，当前值: {raw!r}") from None
+    if value < low or (high is not None and value > high):
+        bound = f"[{low}, {high}] 范围内" if high is not None else f"不小于 {low}"
+        raise ValueError(f"环境变量 {name} 必须{bound}，当前值: {value}")
+    return value
+
+
+def _load_server_cfg() -> _ServerCfg:
+    """解析 WORKERS / TIMEOUT / LIMIT_CONCURRENCY"""
+    default_workers = (os.cpu_count() or 1) * 2 + 1
+    # 进程数优先级：WORKERS > WEB_CONCURRENCY（uvicorn/gunicorn 通用约定）> CPU 核数 * 2 + 1
+    workers_env = "WORKERS" if os.getenv("WORKERS") else "WEB_CONCURRENCY"
+    workers = _env_int(workers_env, default_workers, 1)
+    if workers > default_workers:
+        # 不设上限（容器里 cpu_count 可能小于实际配额），只提示内存占用随进程数增长
+        logger.warning(
+            "%s=%d 超过建议值 CPU 核数 * 2 + 1 = %d，每个 worker 独立占用内存，请确认机器资源充足",
+            workers_env, workers, default_workers,
+        )
+    return _ServerCfg(
+        workers=workers,
+        timeout=_env_int("TIMEOUT", 30, 1, 300),
+        # 单个 worker 同时处理的连接+请求上限，超出直接返回 503（Alertmanager/Grafana 会重试），过载时不无限排队
+        limit_concurrency=_env_int("LIMIT_CONCURRENCY", 1024, 1, 65535),
+    )
+
+# run_in_threadpool 使用的 AnyIO 默认线程上限（默认 40）；webhook 处理含出图/发送等阻塞 I/O，适当放宽
+_THREADPOOL_TOKENS = 100
 
 
 @asynccontextmanager
@@ -50,6 +141,10 @@ async def lifespan(_app: FastAPI):
     应用生命周期管理（替代已弃用的 on_event）
     """
     # 启动时的初始化
+    anyio.to_thread.current_default_thread_limiter().total_tokens = _THREADPOOL_TOKENS
+    # uvicorn 在 worker 内先按自身 log_config 配置日志再启动应用，此处接管访问日志才不会被覆盖
+    if _SERVER_ACCESS_LOG:
+        route_to_queue("uvicorn.access")
     logger.info("=" * 60)
     logger.info("Alert Router 服务启动")
     # 打印已加载的路由规则，便于核对 _receiver 等匹配是否生效
@@ -58,11 +153,11 @@ async def lifespan(_app: FastAPI):
             logger.info("路由规则[%d] match=%s send_to=%s", idx, r["match"], r.get("send_to", []))
         elif r.get("default"):
             logger.info("路由规则[%d] default=True send_to=%s", idx, r.get("send_to", []))
-    server_config = CONFIG.get("server", {})
-    host = server_config.get("host")
-    port = server_config.get("port")
-    logger.info(f"监听地址: {host}:{port}")
-    logger.info(f"已启用渠道数: {sum(1 for ch in CHANNELS.values() if ch.enabled)}/{len(CHANNELS)}")
+    if _SERVER_UDS:
+        logger.info("监听地址: unix:%s", _SERVER_UDS)
+    else:
+        logger.info("监听地址: %s:%s", _SERVER_HOST, _SERVER_PORT)
+    logger.info("已启用渠道数: %d/%d", _ENABLED_CHANNEL_COUNT, len(CHANNELS))
     logger.info("=" * 60)
     
     yield
@@ -71,20 +166,31 @@ async def lifespan(_app: FastAPI):
     logger.info("=" * 60)
     logger.info("Alert Router 服务正在关闭...")
     logger.info("等待正在处理的请求完成...")
+
+    # 关闭渠道发送线程池（等待已提交的发送完成）
+    try:
+        _alert_service.close()
+        logger.info("已关闭渠道发送线程池")
+    except Exception as e:
+        logger.warning("关闭渠道发送线程池时出错: %s", e)
     
     # 关闭 requests 会话（清理连接池）
     try:
         from alert_router.senders.senders import clear_session_cache
         clear_session_cache()
+        from alert_router.plotters.base import close_query_session
+        close_query_session()
         logger.info("已清理 HTTP 会话缓存")
     except Exception as e:
-        logger.warning(f"清理 HTTP 会话缓存时出错: {e}")
+        logger.warning("清理 HTTP 会话缓存时出错: %s", e)
     
     logger.info("Alert Router 服务已关闭")
     logger.info("=" * 60)
+    # 最后停止后台日志线程，确保上面的关闭日志已写入文件
+    stop_logging()
 
 
-app = FastAPI(lifespan=lifespan, redirect_slashes=False)
+app = FastAPI(lifespan=lifespan, redirect_slashes=False, default_response_class=_DEFAULT_RESPONSE_CLASS)
 
 
 @app.middleware("http")
@@ -148,7 +254,16 @@ async def webhook(req: Request):
     timer = WebhookRequestDuration.time()
     status_label = "ok"
     try:
-        payload = await req.json()
+        # 直接读取原始字节并只解析一次；非对象类型的负载尽早拒绝，不进入线程池
+        raw = await req.body()
+        cache_key = _response_cache.key_for(raw)
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("命中 Webhook 响应缓存（相同请求体 %ss 内重复），直接返回上次结果", _response_cache.ttl_seconds)
+            return cached
+        payload = _json_loads(raw)
+        if not isinstance(payload, dict):
+            raise ValueError(f"Webhook 负载必须为 JSON 对象，实际为 {type(payload).__name__}")
         status = payload.get("status")
         alerts_count = len(payload.get("alerts", [])) if payload.get("alerts") else 0
         logger.info("接收数据状态=%s, 告警数量=%s", status, alerts_count)
@@ -167,7 +282,8 @@ async def webhook(req: Request):
             # 在 JSON 日志中以结构化字段输出完整 payload，避免再 dumps 成字符串。
             logger.debug("接收完整 Webhook 负载", extra={"payload": payload})
 
-        result = _handle_webhook(payload)
+        # 路由/出图/发送均为阻塞调用，放到线程池执行，避免阻塞事件循环影响其他请求
+        result = await run_in_threadpool(_handle_webhook, payload)
         ok = result.get("ok", False)
         sent = result.get("sent", [])
         logger.info("Webhook 处理完成, 成功=%s, 发送结果数=%s", ok, len(sent))
@@ -175,6 +291,8 @@ async def webhook(req: Request):
             # 异常结果也以结构化字段附加，便于日志平台按字段查看。
             logger.warning("Webhook 处理结果异常", extra={"webhook_result": result})
             status_label = "error"
+        else:
+            _response_cache.put(cache_key, result)
         return result
     except json.JSONDecodeError as e:
         logger.warning("JSON 解析失败: %s", e)
@@ -216,30 +334,40 @@ if __name__ == "__main__":
     # 直接启动入口（从 config.yaml 读取配置）
     import uvicorn
     
-    # 从已加载的配置读取服务器设置（复用 CONFIG，避免重复加载）
-    server_config = CONFIG.get("server", {})
-    if not server_config:
+    # 服务器设置已在模块加载时从 CONFIG 读取（复用 CONFIG，避免重复加载）
+    if not _SERVER_CONFIG:
         raise ValueError("config.yaml 中必须配置 server 节点")
     
-    host = server_config.get("host")
-    port = server_config.get("port")
+    host = _SERVER_HOST
+    port = _SERVER_PORT
     
     if host is None:
         raise ValueError("config.yaml 中必须配置 server.host")
-    if port is None:
+    if port is None and not _SERVER_UDS:
         raise ValueError("config.yaml 中必须配置 server.port")
     
-    # 从环境变量读取工作进程数和超时时间（如果设置了）
-    workers = int(os.getenv("WORKERS", 4))
-    timeout = int(os.getenv("TIMEOUT", 30))
+    # 从环境变量读取工作进程数、超时与并发上限（如果设置了），非法值直接报错
+    server_cfg = _load_server_cfg()
     
+    # uvloop 不支持 Windows，该平台回退到默认 asyncio 事件循环；httptools 各平台均可用
+    loop = "asyncio" if sys.platform == "win32" else "uvloop"
+
     # 启动 uvicorn 服务器
     uvicorn.run(
         "app:app",
         host=host,
         port=port,
-        workers=workers,
-        timeout_keep_alive=timeout,
+        uds=_SERVER_UDS,
+        workers=server_cfg.workers,
+        loop=loop,
+        http="httptools",
+        interface="asgi3",
+        # 监听队列：告警风暴时瞬时连接较多，避免内核默认 backlog 丢弃 SYN
+        backlog=2048,
+        limit_concurrency=server_cfg.limit_concurrency,
+        timeout_keep_alive=server_cfg.timeout,
+        # 停止时最多等待进行中的请求 10 秒（小于 systemd TimeoutStopSec）
+        timeout_graceful_shutdown=10,
         log_level="info",
-        access_log=True,
+        access_log=_SERVER_ACCESS_LOG,
     )
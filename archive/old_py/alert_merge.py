@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+同一批告警的字段合并（web-hook.py / webhook-telegram.py 共用）
+"""
+
+# 合并多条告警时只保留第一条取值的字段
+FIRST_ONLY_KEYS = ("时间", "summary")
+
+
+def merge_alert_fields(alert_fields):
+    """
+    合并同一批告警的字段：同名字段的不同取值去重后以换行+制表符连接（后出现的在前），
+    时间/summary 取第一条告警的值。集合判重，整体 O(N·K)
+    """
+    merged = {}
+    for fields in alert_fields:
+        for k, v in fields.items():
+            values = merged.get(k)
+            if values is None:
+                merged[k] = {v: None}  # dict 作有序集合，保留出现顺序
+            elif k not in FIRST_ONLY_KEYS:
+                values.setdefault(v, None)
+    return {k: "\n\t".join(reversed(list(values))) for k, values in merged.items()}
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""
+通知发送的 POST 重试（old_py 下各 webhook 脚本共用）
+
+发消息的 POST 不是幂等的：只在确定请求没有送达服务端（建立连接失败）或服务端明确拒绝（429/5xx）时重试；
+读超时等请求可能已被处理的情况不重试，避免 Telegram/Slack 收到重复消息。
+"""
+
+import random
+import time
+
+import requests
+from urllib3.exceptions import ProtocolError
+
+# 发送失败重试次数（含首次），退避时间按次数翻倍并加随机抖动
+SEND_RETRIES = 3
+SEND_BACKOFF_SECONDS = 0.5
+# 服务端要求的等待（Retry-After / retry_after）最长只等这么久，避免长时间占住请求线程
+MAX_RETRY_AFTER_SECONDS = 10
+
+
+def post_with_retry(url, session=None, **kwargs):
+    """POST 并在连接失败或 429/5xx 时按指数退避（带抖动）重试，429 优先按服务端要求的时间等待；返回最后一次响应
+
+    session 为空时用 requests.post，其余参数原样传给 post（timeout 等由调用方给出）。
+    """
+    post = session.post if session is not None else requests.post
+    for attempt in range(1, SEND_RETRIES + 1):
+        try:
+            res = post(url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            if attempt == SEND_RETRIES or not _is_connect_error(e):
+                raise
+            delay = _backoff_delay(attempt)
+        else:
+            if (res.status_code != 429 and res.status_code < 500) or attempt == SEND_RETRIES:
+                return res
+            delay = _retry_after(res) or _backoff_delay(attempt)
+        time.sleep(delay)
+
+
+def _is_connect_error(exc):
+    """请求确定没有送达服务端：连接超时，或建立连接失败（不含收发过程中连接被断开）"""
+    if isinstance(exc, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(exc, requests.exceptions.ConnectionError):
+        # ReadTimeout 等：请求可能已被服务端处理
+        return False
+    cause = exc.args[0] if exc.args else None
+    reason = getattr(cause, "reason", cause)
+    # ProtocolError：请求已发出、读响应时连接被断开
+    return not isinstance(reason, ProtocolError) and not isinstance(cause, ProtocolError)
+
+
+def _backoff_delay(attempt):
+    """第 attempt 次失败后的等待：指数退避 + 随机抖动，避免多个实例同时重试"""
+    base = SEND_BACKOFF_SECONDS * (2 ** (attempt - 1))
+    return base + random.uniform(0, base)
+
+
+def _retry_after(res):
+    """服务端要求的等待秒数：Retry-After 头或 Telegram 429 的 parameters.retry_after；取不到返回 None"""
+    value = res.headers.get("Retry-After")
+    if value is None and res.status_code == 429:
+        try:
+            value = (res.json().get("parameters") or {}).get("retry_after")
+        except (ValueError, AttributeError):
+            value = None
+    try:
+        return min(max(float(value), 0.0), MAX_RETRY_AFTER_SECONDS)
+    except (TypeError, ValueError):
+        return None
@@ -1,16 +1,27 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
-import json
+import atexit
 import logging
 import html
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from urllib3.util.retry import Retry
 from flask import Flask, request, jsonify
 
+from http_retry import post_with_retry
+from json_util import JsonRepr
+from log_queue import setup_queue_logging
+
 # ========= 写死的基础配置（按你要求） =========
 TG_BOT_TOKEN = "YOUR_BOT_TOKEN:YOUR_BOT_SECRET"  # 请替换为实际的 Telegram Bot Token
 TG_CHAT_ID = "YOUR_CHAT_ID"  # 请替换为实际的 Telegram Chat ID
@@ -36,17 +47,139 @@ TARGET_ERROR = "Failed to execute goal org.simplify4u.plugins:pgpverify-maven-pl
 # 回溯最近多少次 build（找 commit 对应的 build number）
 RECENT_BUILDS_TO_SCAN = 60
 
+# 并发探测 build commit 的线程数（与 Jenkins 会话连接池大小匹配）
+BUILD_PROBE_WORKERS = 16
+
+# 同一 webhook 内并发检查的告警项数
+ITEM_CHECK_WORKERS = 4
+
+# 单个 Jenkins master 同时进行中的请求上限（多个 webhook 请求并发时保护 Jenkins）
+JENKINS_MAX_CONCURRENCY = 8
+
+# 缓存（秒）：Alertmanager 每个 group_interval 都会重发同一告警，避免每次重扫 build、重下日志
+BUILD_META_CACHE_TTL = 24 * 3600  # 已结束 build 的 commit/分支/结果，不再变化
+RUNNING_BUILD_META_CACHE_TTL = 30  # 运行中 build 的元数据（同一告警检查过程内复用）
+CONSOLE_CACHE_TTL = 600  # 已结束 build 的 consoleText 关键字扫描结果
+COMMIT_BUILD_CACHE_TTL = 600  # (job, commit) -> build number
+HTTP_VALIDATOR_CACHE_TTL = 3600  # api/json 的 ETag/Last-Modified 与响应，用于条件 GET
+
 # ========= 日志 =========
-logging.basicConfig(
-    filename="/tmp/jenkins_webhook_tg.log",
-    level=logging.INFO,
-    format='{"time":"%(asctime)s","level":"%(levelname)s","traceId":"-","message":"%(message)s"}',
-    datefmt="%Y-%m-%d %H:%M:%S",
-)
+# 请求线程只把日志放入内存队列，由后台线程写文件（见 log_queue.py）
+_LOG_LISTENER = setup_queue_logging("/tmp/jenkins_webhook_tg.log")
+
+
+# ========= Jenkins 响应 JSON 解析 =========
+try:
+    import orjson  # 可选依赖：比标准库 json 快数倍
+except ImportError:
+    orjson = None
+
 
 app = Flask(__name__)
 
 
+# ========= HTTP 会话（连接池复用，避免每次请求重新 TCP/TLS 握手） =========
+def _new_session(
+    trust_env: bool = True,
+    proxies: Optional[Dict[str, str]] = None,
+    retry: Optional[Retry] = None,
+) -> requests.Session:
+    s = requests.Session()
+    s.trust_env = trust_env
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=32,
+        max_retries=retry or Retry(total=2, backoff_factor=0.2, status_forcelist=[500, 502, 503, 504]),
+    )
+    s.mount("http://", adapter)
+    s.mount("https://", adapter)
+    if proxies:
+        s.proxies.update(proxies)
+    return s
+
+
+# Jenkins 直连：不读取 http_proxy/https_proxy 环境变量
+_JENKINS_SESSION = _new_session(trust_env=False, proxies=JENKINS_PROXIES)
+_JENKINS_AUTH = HTTPBasicAuth(JENKINS_USER, JENKINS_TOKEN) if (JENKINS_USER and JENKINS_TOKEN) else None
+# Telegram 固定走 TG_PROXIES
+# 发送消息的重试由 post_with_retry 负责（连接失败与 429/5xx），适配器本身不重试
+_TG_SESSION = _new_session(proxies=TG_PROXIES, retry=Retry(0, read=False))
+
+
+# 并发探测 build commit 的线程池（共享 _JENKINS_SESSION 的连接池）；只执行单个 Jenkins 请求，不再向线程池提交任务
+_PROBE_EXECUTOR = ThreadPoolExecutor(max_workers=BUILD_PROBE_WORKERS, thread_name_prefix="jenkins-probe")
+# 同一 webhook 内多条告警项并发检查的线程池（与探测线程池分开，避免互相等待造成死锁）
+_ITEM_EXECUTOR = ThreadPoolExecutor(max_workers=ITEM_CHECK_WORKERS, thread_name_prefix="jenkins-item")
+
+
+@atexit.register
+def _close_sessions() -> None:
+    _ITEM_EXECUTOR.shutdown(wait=False)
+    _PROBE_EXECUTOR.shutdown(wait=False)
+    _JENKINS_SESSION.close()
+    _TG_SESSION.close()
+
+
+# ========= 进程内 TTL 缓存 =========
+_MISS = object()
+
+
+class _TTLCache:
+    """带过期时间的 LRU 缓存（线程安全）"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return _MISS
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return _MISS
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Any, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+_BUILD_META_CACHE = _TTLCache(maxsize=4096, ttl=BUILD_META_CACHE_TTL)
+_CONSOLE_CACHE = _TTLCache(maxsize=512, ttl=CONSOLE_CACHE_TTL)
+_COMMIT_BUILD_CACHE = _TTLCache(maxsize=1024, ttl=COMMIT_BUILD_CACHE_TTL)
+# url -> (ETag, Last-Modified, 已解析 JSON)；已结束 build 的元数据直接由 _BUILD_META_CACHE 命中，不再发请求
+_HTTP_VALIDATOR_CACHE = _TTLCache(maxsize=2048, ttl=HTTP_VALIDATOR_CACHE_TTL)
+
+
+# ========= 并发控制 =========
+# Jenkins 主机 -> 信号量：限制对同一 master 的并发请求数
+_JENKINS_SLOTS: Dict[str, threading.BoundedSemaphore] = {}
+_JENKINS_SLOTS_LOCK = threading.Lock()
+
+# (jenkins_base, job, commit) -> 进行中的 build 扫描；并发的相同告警只扫一次，其余等待结果
+_INFLIGHT_SCANS: Dict[Tuple[str, str, str], Future] = {}
+_INFLIGHT_LOCK = threading.Lock()
+
+
+def _jenkins_slot(url: str) -> threading.BoundedSemaphore:
+    host = urlsplit(url).netloc
+    with _JENKINS_SLOTS_LOCK:
+        slot = _JENKINS_SLOTS.get(host)
+        if slot is None:
+            slot = threading.BoundedSemaphore(JENKINS_MAX_CONCURRENCY)
+            _JENKINS_SLOTS[host] = slot
+        return slot
+
+
 # ----------------- Telegram -----------------
 def tg_send(text: str) -> Dict[str, Any]:
     """发送 HTML 消息到 Telegram（走代理）"""
@@ -57,20 +190,47 @@ def tg_send(text: str) -> Dict[str, Any]:
         "parse_mode": "HTML",
         "disable_web_page_preview": False,
     }
-    r = requests.post(url, data=data, timeout=10, proxies=TG_PROXIES)
+    r = post_with_retry(url, session=_TG_SESSION, data=data, timeout=10)
     r.raise_for_status()
     return r.json()
 
 
 # ----------------- Jenkins HTTP -----------------
-def jenkins_get(url: str) -> requests.Response:
+def jenkins_get(url: str, headers: Optional[Dict[str, str]] = None) -> requests.Response:
     """
     Jenkins API 请求：强制直连，不走任何代理（也不读取环境变量 proxy）
     """
-    auth = HTTPBasicAuth(JENKINS_USER, JENKINS_TOKEN) if (JENKINS_USER and JENKINS_TOKEN) else None
-    s = requests.Session()
-    s.trust_env = False  # ✅ 不读取 http_proxy/https_proxy
-    return s.get(url, timeout=15, auth=auth)
+    with _jenkins_slot(url):
+        return _JENKINS_SESSION.get(url, timeout=15, auth=_JENKINS_AUTH, headers=headers)
+
+
+def jenkins_get_json(url: str) -> Tuple[int, Any]:
+    """
+    条件 GET Jenkins api/json：带上次的 ETag / Last-Modified，304 时直接复用缓存的解析结果
+    返回 (状态码, JSON)；非 200 时 JSON 为 None（304 按 200 返回）
+    """
+    cached = _HTTP_VALIDATOR_CACHE.get(url)
+    headers: Dict[str, str] = {}
+    if cached is not _MISS:
+        etag, last_modified, _ = cached
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+    r = jenkins_get(url, headers=headers or None)
+    if r.status_code == 304 and cached is not _MISS:
+        return 200, cached[2]
+    if r.status_code != 200:
+        return r.status_code, None
+
+    # orjson 直接解析响应字节，省去 requests 的编码探测与解码
+    data = orjson.loads(r.content) if orjson is not None else r.json()
+    etag = r.headers.get("ETag")
+    last_modified = r.headers.get("Last-Modified")
+    if etag or last_modified:
+        _HTTP_VALIDATOR_CACHE.set(url, (etag, last_modified, data))
+    return 200, data
 
 
 def build_jenkins_job_url(jenkins_base: str, job_name: str) -> str:
@@ -97,6 +257,14 @@ def normalize_build_status(raw: Optional[str]) -> str:
     return s
 
 
+# Jenkins job 路径前缀 -> 环境展示名（未列出的前缀原样展示）
+_ENV_MAP = {
+    "uat": "EB预发",
+    "pro": "EB生产",
+    "jp-prod-gray-ebpay": "EB生产灰度",
+}
+
+
 def job_env_and_task(job_name: str) -> Tuple[str, str]:
     """
     根据 jenkins_job 判断环境与任务
@@ -110,97 +278,155 @@ def job_env_and_task(job_name: str) -> Tuple[str, str]:
     prefix = parts[0]
     task = parts[1] if len(parts) > 1 else parts[0]
 
-    if prefix == "uat":
-        env = "EB预发"
-    elif prefix == "pro":
-        env = "EB生产"
-    elif prefix == "jp-prod-gray-ebpay":
-        env = "EB生产灰度"
-    else:
-        env = prefix
-
-    return env, task
+    return _ENV_MAP.get(prefix, prefix), task
 
 
 # ----------------- Jenkins Data Fetch -----------------
-def get_build_commit(jenkins_base: str, job_name: str, build_no: int) -> Optional[str]:
-    """取某次 build 的 check_commitID 参数值"""
-    job_url = build_jenkins_job_url(jenkins_base, job_name)
-    api = f"{job_url}{build_no}/api/json?tree=actions[parameters[name,value]]"
-    r = jenkins_get(api)
-    if r.status_code != 200:
-        return None
+class BuildMeta(NamedTuple):
+    """单次 build 的元数据（一次 Jenkins API 请求取全）"""
+    commit: Optional[str]  # check_commitID 参数值
+    branch: Optional[str]  # 去掉 origin/ 前缀的分支名
+    building: bool
+    result: Optional[str]
+
+
+def _strip_origin(s: str) -> str:
+    s = (s or "").strip()
+    return s[len("origin/"):] if s.startswith("origin/") else s
+
+
+def _parse_build_meta(data: Dict[str, Any]) -> BuildMeta:
+    actions = data.get("actions") or ()
+    # 第一个 check_commitID 参数即为 commit，找到即停
+    commit_value = next(
+        (
+            p.get("value")
+            for a in actions
+            for p in (a.get("parameters") or ())
+            if (p.get("name") or "").strip() == "check_commitID"
+        ),
+        None,
+    )
+    commit = str(commit_value or "").strip() or None
 
-    data = r.json()
-    for a in (data.get("actions") or []):
-        for p in (a.get("parameters") or []):
-            if (p.get("name") or "").strip() == "check_commitID":
-                v = str(p.get("value") or "").strip()
-                return v or None
-    return None
+    branch: Optional[str] = None
+    for a in actions:
+        # 分支来自 BuildData：lastBuiltRevision.branch[].name，buildsByBranchName 的 key 作为 fallback
+        if a.get("_class") == "hudson.plugins.git.util.BuildData":
+            rev = a.get("lastBuiltRevision") or {}
+            for b in (rev.get("branch") or []):
+                name = (b.get("name") or "").strip()
+                if name:
+                    branch = _strip_origin(name)
+                    break
+            if branch is None:
+                bb = a.get("buildsByBranchName") or {}
+                if isinstance(bb, dict):
+                    for k in bb.keys():
+                        if k:
+                            branch = _strip_origin(str(k))
+                            break
+            if branch is not None:
+                break
+    return BuildMeta(
+        commit=commit,
+        branch=branch,
+        building=bool(data.get("building")),
+        result=data.get("result"),
+    )
 
 
-def get_build_branch(jenkins_base: str, job_name: str, build_no: int) -> Optional[str]:
+def get_build_meta(jenkins_base: str, job_name: str, build_no: int) -> Optional[BuildMeta]:
     """
-    从 Jenkins build API 的 BuildData 获取分支：
-    - actions[] _class == hudson.plugins.git.util.BuildData
-      - lastBuiltRevision.branch[].name -> origin/master-pgpverify-error
-      - buildsByBranchName 的 key 也可作为 fallback
-    返回时去掉 origin/ 前缀
+    一次请求取某次 build 的 commit、分支、是否运行中、结果；请求失败返回 None。
+    已结束的 build 元数据不再变化，缓存 BUILD_META_CACHE_TTL 秒；运行中的只短暂缓存（分支等信息可能尚未产生）
     """
+    cache_key = (jenkins_base, job_name, build_no)
+    cached = _BUILD_META_CACHE.get(cache_key)
+    if cached is not _MISS:
+        return cached
+
     job_url = build_jenkins_job_url(jenkins_base, job_name)
     api = (
         f"{job_url}{build_no}/api/json?"
-        f"tree=actions[_class,lastBuiltRevision[branch[name]],buildsByBranchName]"
+        f"tree=building,result,"
+        f"actions[_class,parameters[name,value],lastBuiltRevision[branch[name]],buildsByBranchName]"
     )
-    r = jenkins_get(api)
-    if r.status_code != 200:
+    status, data = jenkins_get_json(api)
+    if status != 200:
         return None
 
-    data = r.json()
-    actions = data.get("actions") or []
+    meta = _parse_build_meta(data)
+    _BUILD_META_CACHE.set(cache_key, meta, ttl=RUNNING_BUILD_META_CACHE_TTL if meta.building else None)
+    return meta
 
-    def _strip_origin(s: str) -> str:
-        s = (s or "").strip()
-        return s[len("origin/"):] if s.startswith("origin/") else s
 
-    for a in actions:
-        if a.get("_class") != "hudson.plugins.git.util.BuildData":
-            continue
-
-        rev = a.get("lastBuiltRevision") or {}
-        branches = rev.get("branch") or []
-        for b in branches:
-            name = (b.get("name") or "").strip()
-            if name:
-                return _strip_origin(name)
+def get_build_commit(jenkins_base: str, job_name: str, build_no: int) -> Optional[str]:
+    """取某次 build 的 check_commitID 参数值"""
+    meta = get_build_meta(jenkins_base, job_name, build_no)
+    return meta.commit if meta else None
 
-        bb = a.get("buildsByBranchName") or {}
-        if isinstance(bb, dict) and bb:
-            for k in bb.keys():
-                if k:
-                    return _strip_origin(str(k))
 
-    return None
+def get_build_branch(jenkins_base: str, job_name: str, build_no: int) -> Optional[str]:
+    """
+    从 Jenkins build API 的 BuildData 获取分支：
+    - actions[] _class == hudson.plugins.git.util.BuildData
+      - lastBuiltRevision.branch[].name -> origin/master-pgpverify-error
+      - buildsByBranchName 的 key 也可作为 fallback
+    返回时去掉 origin/ 前缀
+    """
+    meta = get_build_meta(jenkins_base, job_name, build_no)
+    return meta.branch if meta else None
 
 
 def find_build_number_by_commit(jenkins_base: str, job_name: str, commit: str) -> Optional[int]:
     """
     优先 lastBuild/lastFailedBuild，再扫最近 N 个 build
-    对每个 build 调用 get_build_commit() 比对 check_commitID
+    对每个 build 调用 get_build_commit() 比对 check_commitID（元数据一次取全，命中后分支等无需再请求）
     """
     commit = (commit or "").strip()
     if not commit:
         return None
 
+    # 同一告警重发时直接复用上次定位结果，跳过整轮 build 扫描
+    cache_key = (jenkins_base, job_name, commit)
+    cached = _COMMIT_BUILD_CACHE.get(cache_key)
+    if cached is not _MISS:
+        return cached
+
+    # single-flight：同一 (job, commit) 已有线程在扫描时直接等待其结果，避免重复扫描打满 Jenkins
+    with _INFLIGHT_LOCK:
+        inflight = _INFLIGHT_SCANS.get(cache_key)
+        owner = inflight is None
+        if owner:
+            inflight = Future()
+            _INFLIGHT_SCANS[cache_key] = inflight
+    if not owner:
+        return inflight.result()
+
+    try:
+        build_no = _scan_build_number_by_commit(jenkins_base, job_name, commit)
+        if build_no is not None:
+            _COMMIT_BUILD_CACHE.set(cache_key, build_no)
+        inflight.set_result(build_no)
+        return build_no
+    except BaseException as e:
+        inflight.set_exception(e)
+        raise
+    finally:
+        # 结果已写入缓存，之后的请求直接命中缓存
+        with _INFLIGHT_LOCK:
+            _INFLIGHT_SCANS.pop(cache_key, None)
+
+
+def _scan_build_number_by_commit(jenkins_base: str, job_name: str, commit: str) -> Optional[int]:
     job_url = build_jenkins_job_url(jenkins_base, job_name)
     api = f"{job_url}api/json?tree=lastBuild[number],lastFailedBuild[number],builds[number]"
-    r = jenkins_get(api)
-    if r.status_code != 200:
-        logging.warning("Jenkins job api 请求失败: %s code=%s", api, r.status_code)
+    status, data = jenkins_get_json(api)
+    if status != 200:
+        logging.warning("Jenkins job api 请求失败: %s code=%s", api, status)
         return None
 
-    data = r.json()
     candidates: List[int] = []
 
     lb = (data.get("lastBuild") or {}).get("number")
@@ -216,22 +442,99 @@ def find_build_number_by_commit(jenkins_base: str, job_name: str, commit: str) -
         if isinstance(n, int) and n not in candidates:
             candidates.append(n)
 
-    for build_no in candidates:
-        b_commit = get_build_commit(jenkins_base, job_name, build_no)
-        if b_commit == commit:
-            return build_no
+    # 候选很少时并发没有收益，保持顺序请求
+    if len(candidates) <= 2:
+        for build_no in candidates:
+            b_commit = get_build_commit(jenkins_base, job_name, build_no)
+            if b_commit == commit:
+                return build_no
+        return None
+
+    return _probe_builds_concurrently(jenkins_base, job_name, commit, candidates)
 
-    return None
 
+def _probe_builds_concurrently(jenkins_base: str, job_name: str, commit: str, candidates: List[int]) -> Optional[int]:
+    """
+    并发调用 get_build_commit()，结果与顺序扫描一致：返回候选列表中最靠前的命中 build。
+    一旦某个命中之前的候选都已完成，就取消其余尚未开始的请求并返回。
+    """
+    futures = {
+        _PROBE_EXECUTOR.submit(get_build_commit, jenkins_base, job_name, build_no): idx
+        for idx, build_no in enumerate(candidates)
+    }
+    pending = set(futures)
+    done_idx = set()
+    best_idx: Optional[int] = None
+    try:
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                idx = futures[fut]
+                done_idx.add(idx)
+                try:
+                    matched = fut.result() == commit
+                except Exception:
+                    logging.exception("探测 build commit 失败: job=%s build=%s", job_name, candidates[idx])
+                    matched = False
+                if matched and (best_idx is None or idx < best_idx):
+                    best_idx = idx
+            if best_idx is not None and all(i in done_idx for i in range(best_idx)):
+                return candidates[best_idx]
+        return candidates[best_idx] if best_idx is not None else None
+    finally:
+        for fut in pending:
+            fut.cancel()
+
+
+def contains_target_in_console(jenkins_base: str, job_name: str, build_no: int, needle: str) -> Optional[bool]:
+    """
+    流式扫描 Jenkins consoleText 是否包含关键字（不把整份日志读入内存，命中即断开）
+    返回 True/False；请求失败返回 None。build 已结束时结果不再变化，缓存 CONSOLE_CACHE_TTL 秒
+    """
+    cache_key = (jenkins_base, job_name, build_no, needle)
+    cached = _CONSOLE_CACHE.get(cache_key)
+    if cached is not _MISS:
+        return cached
+
+    # 先确认 build 是否已结束，再拉日志：仍在运行的 build 日志会继续增长，不能缓存
+    finished = is_build_finished(jenkins_base, job_name, build_no)
 
-def fetch_console_text(jenkins_base: str, job_name: str, build_no: int) -> Optional[str]:
-    """拉 Jenkins consoleText"""
     job_url = build_jenkins_job_url(jenkins_base, job_name)
     log_url = f"{job_url}{build_no}/consoleText"
-    r = jenkins_get(log_url)
-    if r.status_code == 200:
-        return r.text
-    return None
+    # 直接在原始字节上查找（bytes 的查找为 C 实现），不做 UTF-8 解码
+    needle_bytes = needle.encode("utf-8")
+    # 保留上一块末尾 len(needle)-1 字节，避免关键字跨块被切断
+    keep = max(len(needle_bytes) - 1, 0)
+    found = False
+    with _jenkins_slot(log_url), _JENKINS_SESSION.get(
+        log_url,
+        timeout=15,
+        auth=_JENKINS_AUTH,
+        stream=True,
+        headers={"Accept-Encoding": "gzip"},
+    ) as r:
+        if r.status_code != 200:
+            return None
+        tail = b""
+        for chunk in r.iter_content(chunk_size=65536):
+            if not chunk:
+                continue
+            # 跨块边界只需检查 tail + 本块开头 keep 字节，不必每块都拼接整块数据
+            if (tail and needle_bytes in tail + chunk[:keep]) or needle_bytes in chunk:
+                found = True
+                break
+            if keep:
+                tail = chunk[-keep:] if len(chunk) >= keep else (tail + chunk)[-keep:]
+
+    if finished:
+        _CONSOLE_CACHE.set(cache_key, found)
+    return found
+
+
+def is_build_finished(jenkins_base: str, job_name: str, build_no: int) -> bool:
+    """build 是否已结束（请求失败时按未结束处理，即不缓存）"""
+    meta = get_build_meta(jenkins_base, job_name, build_no)
+    return meta is not None and not meta.building
 
 
 # ----------------- Alertmanager Parse & Format -----------------
@@ -272,34 +575,82 @@ def parse_alertmanager_payload(payload: Dict[str, Any]) -> List[Dict[str, Any]]:
     return results
 
 
+# 单条告警项的消息模板：字段先统一转义，再一次 format_map 生成整段文本
+_MSG_HEADER = "🔴 <b>Jenkins 构建失败（PGP签名校验失败）</b>\n<b>━━━━━━━━━━━━━━</b>"
+_ITEM_TMPL = (
+    "<b>{idx}) 环境:</b> <code>{env}</code>\n"
+    "<b>任务:</b> <code>{task}</code>\n"
+    "<b>Jenkins Job:</b> <code>{job_name}</code>\n"
+    "<b>状态:</b> <u>{build_status}</u> <i>({am_status})</i>\n"
+    "<b>分支:</b> {branch}\n"
+    "<b>Commit:</b> <code>{commit}</code>\n"
+    "<b>Build:</b> <code>{build_number}</code>\n"
+    "<b>结论:</b> <b>PGP签名校验失败</b>\n"
+    "<b>──────────────</b>"
+)
+
+
 def fmt_message(items: List[Dict[str, Any]]) -> str:
-    icon = "🔴"
-    title = "Jenkins 构建失败（PGP签名校验失败）"
-    now = (datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
-    
-    lines = [
-        f"{icon} <b>{title}</b>",
-        "<b>━━━━━━━━━━━━━━</b>",
-    ]
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    esc = html.escape
 
+    parts = [_MSG_HEADER]
     for idx, i in enumerate(items, 1):
         job_name_raw = i.get("job_name", "N/A")
         env, task = job_env_and_task(job_name_raw)
+        parts.append(_ITEM_TMPL.format_map({
+            "idx": idx,
+            "env": esc(env),
+            "task": esc(task),
+            "job_name": esc(job_name_raw),
+            "build_status": esc(i.get("build_status", "N/A")),
+            "am_status": esc(i.get("am_status", "N/A")),
+            "branch": esc(i.get("branch", "N/A")),
+            "commit": esc(i.get("commit", "N/A")),
+            "build_number": esc(str(i.get("build_number", "N/A"))),
+        }))
+
+    parts.append(f"<b>时间:</b> {now}")
+    return "\n".join(parts)
+
+
+# ----------------- Item Check -----------------
+def check_item(it: Dict[str, Any]) -> bool:
+    """
+    检查单条告警项：定位 build、补全真实分支、拉日志匹配关键字。
+    命中返回 True（并写入 build_number / branch），否则 False。
+    """
+    job_name = it.get("job_name")
+    commit = it.get("commit")
+    jenkins_base = it.get("jenkins_base")
+
+    if not jenkins_base or not job_name or not commit or commit == "N/A":
+        return False
 
-        lines.extend([
-            f"<b>{idx}) 环境:</b> <code>{html.escape(env)}</code>",
-            f"<b>任务:</b> <code>{html.escape(task)}</code>",
-            f"<b>Jenkins Job:</b> <code>{html.escape(job_name_raw)}</code>",
-            f"<b>状态:</b> <u>{html.escape(i.get('build_status','N/A'))}</u> <i>({html.escape(i.get('am_status','N/A'))})</i>",
-            f"<b>分支:</b> {html.escape(i.get('branch', 'N/A'))}",
-            f"<b>Commit:</b> <code>{html.escape(i.get('commit','N/A'))}</code>",
-            f"<b>Build:</b> <code>{html.escape(str(i.get('build_number','N/A')))}</code>",
-            f"<b>结论:</b> <b>PGP签名校验失败</b>",
-            "<b>──────────────</b>",
-        ])
+    # 1) 定位 build
+    build_no = find_build_number_by_commit(jenkins_base, job_name, commit)
+    if build_no is None:
+        logging.info("未找到 commit 对应 build，忽略: job=%s commit=%s", job_name, commit)
+        return False
 
-    lines.append(f"<b>时间:</b> {(datetime.now()).strftime('%Y-%m-%d %H:%M:%S')}")
-    return "\n".join(lines)
+    # 2) 从 Jenkins API 获取真实分支（覆盖 UNDEFINED）；定位 build 时已随元数据一并取到，这里命中缓存
+    real_branch = get_build_branch(jenkins_base, job_name, build_no)
+    if real_branch:
+        it["branch"] = real_branch
+
+    # 3) 流式扫描日志检测关键字：命中才发 TG
+    hit = contains_target_in_console(jenkins_base, job_name, build_no, TARGET_ERROR)
+
+    if hit is None:
+        logging.info("拉取 consoleText 失败，忽略: job=%s build=%s", job_name, build_no)
+        return False
+
+    if hit:
+        it["build_number"] = build_no
+        return True
+
+    logging.info("未命中 pgpverify 关键字，忽略: job=%s build=%s commit=%s", job_name, build_no, commit)
+    return False
 
 
 # ----------------- Flask Webhook -----------------
@@ -307,44 +658,18 @@ def fmt_message(items: List[Dict[str, Any]]) -> str:
 def webhook():
     try:
         payload = request.get_json(force=True)
-        logging.info("收到告警: %s", json.dumps(payload, ensure_ascii=False))
+        logging.info("收到告警: %s", JsonRepr(payload))
 
         items = parse_alertmanager_payload(payload)
         if not items:
             return jsonify({"status": "ignored", "reason": "no alerts"}), 200
 
-        matched_items: List[Dict[str, Any]] = []
-
-        for it in items:
-            job_name = it.get("job_name")
-            commit = it.get("commit")
-            jenkins_base = it.get("jenkins_base")
-
-            if not jenkins_base or not job_name or not commit or commit == "N/A":
-                continue
-
-            # 1) 定位 build
-            build_no = find_build_number_by_commit(jenkins_base, job_name, commit)
-            if build_no is None:
-                logging.info("未找到 commit 对应 build，忽略: job=%s commit=%s", job_name, commit)
-                continue
-
-            # 2) 从 Jenkins API 获取真实分支（覆盖 UNDEFINED）
-            real_branch = get_build_branch(jenkins_base, job_name, build_no)
-            if real_branch:
-                it["branch"] = real_branch
-
-            # 3) 拉日志并检测关键字：命中才发 TG
-            log_text = fetch_console_text(jenkins_base, job_name, build_no)
-            if not log_text:
-                logging.info("拉取 consoleText 失败，忽略: job=%s build=%s", job_name, build_no)
-                continue
-
-            if TARGET_ERROR in log_text:
-                it["build_number"] = build_no
-                matched_items.append(it)
-            else:
-                logging.info("未命中 pgpverify 关键字，忽略: job=%s build=%s commit=%s", job_name, build_no, commit)
+        # 各告警项相互独立，并发检查；结果按原顺序汇总
+        if len(items) <= 1:
+            checked = [check_item(it) for it in items]
+        else:
+            checked = list(_ITEM_EXECUTOR.map(check_item, items))
+        matched_items: List[Dict[str, Any]] = [it for it, ok in zip(items, checked) if ok]
 
         if not matched_items:
             return jsonify({"status": "ignored", "reason": "no pgpverify keyword matched"}), 200
@@ -366,5 +691,10 @@ def webhook():
         return jsonify({"status": "ignored", "reason": f"exception: {type(e).__name__}", "message": str(e)}), 200
 
 
+# 生产环境用 gunicorn 运行（Flask 自带服务器仅用于本地调试）：
+#   gunicorn -w 2 -k gthread --threads 16 --reuse-port -b 0.0.0.0:8089 \
+#       --max-requests 10000 --max-requests-jitter 1000 --chdir archive/old_py 'jenkins_webhook_to_tg-new:app'
+# build/日志缓存与 single-flight 都在进程内，worker 数不宜多，并发主要靠线程；
+# 模块级线程池与会话需在 worker 内创建，不要加 --preload
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=8089)
\ No newline at end of file
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+"""
+JSON 工具（old_py 下各 webhook 脚本共用）
+
+orjson 为可选依赖：安装时用它（比标准库 json 快数倍），未安装时回退到标准库。
+"""
+
+import json
+
+try:
+    import orjson  # 可选依赖：比标准库 json 快数倍
+except ImportError:
+    orjson = None
+
+
+class JsonRepr:
+    """日志参数包装：记录真正输出时才序列化为 JSON，被级别过滤时不做任何序列化"""
+
+    __slots__ = ("obj",)
+
+    def __init__(self, obj):
+        self.obj = obj
+
+    def __str__(self):
+        if orjson is not None:
+            try:
+                return orjson.dumps(self.obj).decode("utf-8")
+            except TypeError:
+                pass
+        return json.dumps(self.obj, ensure_ascii=False, default=str)
+
+    __repr__ = __str__
+
+
+def json_body(obj):
+    """请求体 JSON 编码为 UTF-8 bytes：有 orjson 时直接得到 bytes，否则用标准库"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def json_loads(data):
+    """解析请求/响应体（bytes 或 str）"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_pretty(obj):
+    """缩进格式的 JSON 文本，仅用于日志"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, indent=2, ensure_ascii=False)
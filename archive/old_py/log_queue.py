@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+队列化日志（jenkins_webhook_to_tg-new.py / webhook_nginx_8081.py / webhook_easy_test_grafana.py 共用）
+
+请求线程只把日志记录放入内存队列，写文件由后台 QueueListener 线程完成，磁盘 I/O 不阻塞请求。
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = '{"time":"%(asctime)s","level":"%(levelname)s","traceId":"-","message":"%(message)s"}'
+LOG_DATEFMT = '%Y-%m-%d %H:%M:%S'
+
+
+class InProcessQueueHandler(QueueHandler):
+    """进程内队列 handler：入队时只固定 message，保留 exc_info 交给后台 FileHandler 格式化"""
+
+    def prepare(self, record):
+        # 入队前渲染 message，避免后台线程格式化时参数对象已被调用方修改
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def setup_queue_logging(filename, level=logging.INFO):
+    """根 logger 只挂队列 handler，由后台线程写入 filename；返回已启动的 QueueListener"""
+    # 日志格式不含线程/进程字段，创建记录时不必采集
+    logging.logThreads = False
+    logging.logProcesses = False
+    logging.logMultiprocessing = False
+
+    file_handler = logging.FileHandler(filename, encoding='utf-8')
+    file_handler.setFormatter(logging.Formatter(LOG_FORMAT, datefmt=LOG_DATEFMT))
+    log_queue = queue.SimpleQueue()
+    listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    logging.basicConfig(level=level, handlers=[InProcessQueueHandler(log_queue)])
+    listener.start()
+    # 退出时先写完队列中剩余日志（atexit 后注册先执行，早于 logging 自身的 shutdown）
+    atexit.register(listener.stop)
+    return listener
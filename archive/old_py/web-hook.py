@@ -7,14 +7,22 @@ import logging
 from flask import request, Flask    #flask模块
 from datetime import datetime,timezone,timedelta
 
+from alert_merge import merge_alert_fields
+from http_retry import post_with_retry
+from json_util import JsonRepr, json_body
+
 TELEGRAM_CHAT_ID = "YOUR_CHAT_ID"  # 请替换为实际的 Telegram Chat ID
 TELEGRAM_BOT_TOKEN = "YOUR_BOT_TOKEN:YOUR_BOT_SECRET"  # 请替换为实际的 Telegram Bot Token
 TELEGRAM_PROXY_URL = "http://10.8.16.64:13080"
 proxies = {"http": TELEGRAM_PROXY_URL, "https": TELEGRAM_PROXY_URL}
 
+# 复用连接：各渠道共用一个会话（连接池），不再每次发送都重新 TCP/TLS 握手；代理按请求传
+_session = requests.Session()
+
 # 设置日志配置
 logging.basicConfig(filename='/var/log/mango-hook.log', level=logging.INFO, format='{"time":"%(asctime)s","level":"%(levelname)s","traceId":"-","message":"%(message)s"}', datefmt='%Y-%m-%d %H:%M:%S')
 
+
 #Flask通用配置
 app = Flask(__name__)
 app.config['JSON_AS_ASCII'] = False
@@ -24,6 +32,11 @@ status_dict = {
     "resolved": {"✅✅✅✅  状态": "恢复"}
 }
 
+# 告警字段拼成 "key: value" 多行文本（各发送渠道共用）
+def _format_kv(content):
+    return "".join(f"{k}: {v}\n" for k, v in content.items())
+
+
 # 发送告警到 Telegram（支持代理）
 def send_to_telegram(content):
     try:
@@ -32,9 +45,7 @@ def send_to_telegram(content):
             return
 
         # 将 content 组织成文本（与 send_to_mango 相同风格）
-        data = ""
-        for k in content:
-            data += f"{k}: {content.get(k)}\n"
+        data = _format_kv(content)
 
         url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
         headers = {"Content-Type": "application/json; charset=UTF-8"}
@@ -43,8 +54,8 @@ def send_to_telegram(content):
             "text": data,
         }
 
-        logging.info("发送 Telegram 数据：%s", json.dumps(payload, ensure_ascii=False))
-        resp = requests.post(url, headers=headers, data=json.dumps(payload), timeout=15, proxies=proxies)
+        logging.info("发送 Telegram 数据：%s", JsonRepr(payload))
+        resp = post_with_retry(url, session=_session, headers=headers, data=json_body(payload), timeout=15, proxies=proxies)
 
         try:
             resp_json = resp.json()
@@ -52,44 +63,42 @@ def send_to_telegram(content):
             logging.error("Telegram 返回非 JSON：%s", resp.text)
         else:
             if not resp.ok or not resp_json.get("ok", False):
-                logging.error("Telegram 发送失败：HTTP %s, body=%s", resp.status_code, json.dumps(resp_json, ensure_ascii=False))
+                logging.error("Telegram 发送失败：HTTP %s, body=%s", resp.status_code, JsonRepr(resp_json))
             else:
-                logging.info("Telegram 返回：%s", json.dumps(resp_json, ensure_ascii=False))
+                logging.info("Telegram 返回：%s", JsonRepr(resp_json))
     except Exception as e:
         logging.exception("发送 Telegram 失败：%s", e)
 
 
 # 发送告警到Mango
 def send_to_mango(content):
-    logging.info(f"send_to_mango数据内容日志: {content}")
-    data = ''
-    for i in content:
-        data += i + ': ' + content.get(i) + '\n'
+    logging.info("send_to_mango数据内容日志: %s", content)
+    data = _format_kv(content)
     # 记录处理后的日志
-    logging.info(f"处理日志信息: {data}")
+    logging.info("处理日志信息: %s", data)
     request_header = {"content-type": "application/json; charset=UTF-8","Authorization": "YOUR_MANGO_AUTH_TOKEN"}  # 请替换为实际的 Mango 认证 Token
     push_tx_data = {"targetname": "YOUR_TARGET_NAME","text": data,"chatType":"2","model": "1"}  # 请替换为实际的目标名称
     push_url = 'https://trobot.ymtio.com/api/robot/YOUR_USERCODE:YOUR_SECRET/sendmessage_v2'  # 请替换为实际的 Mango Webhook URL
-    push_tx_data = json.dumps(push_tx_data)
+    push_tx_data = json_body(push_tx_data)
     #logging.info(push_tx_data)
     #logger.debug('告警数据：{}'.format(push_tx_data))
-    res= requests.post(url=push_url, headers=request_header, data=push_tx_data)
+    res = post_with_retry(push_url, session=_session, headers=request_header, data=push_tx_data, timeout=10)
     #处理返回的数据
     try:
         json_data = res.json()
     except ValueError:
         logging.error('无法解析的响应数据: %s', res.text)
     else:
-        logging.info('Mango数据返回响应：\n%s', json.dumps(json_data, indent=4, ensure_ascii=False))
+        logging.info('Mango数据返回响应：%s', JsonRepr(json_data))
 
 
 @app.route('/webhook/', methods=['POST'])
 def IssueCreate():
     data_dict = json.loads(request.data)
-    logging.info(f"求数据解析为json: {data_dict}")
+    logging.info("求数据解析为json: %s", data_dict)
     try:
         alerts_l = data_dict['alerts']
-        dict_last = {}
+        alert_fields = []
         for alert in alerts_l:
             dict_new = {}
             utc_dt = datetime.strptime(alert.get('startsAt'), '%Y-%m-%dT%H:%M:%S.%fZ')
@@ -102,15 +111,10 @@ def IssueCreate():
             dict_new["summary"] = "%s" % alert.get('annotations').get('summary')
             for pop_name in ["prometheus", "id", "image", "uid", "metrics_path", "endpoint", "job", "service", "name"]: 
                 dict_new.pop(pop_name,100)
+            alert_fields.append(dict_new)
 
-            for key1 in dict_new:
-                if key1 in dict_last.keys():
-                    if key1 != "时间" and key1 != "summary":
-                        if dict_new.get(key1) not in dict_last.get(key1):
-                                dict_last[key1] = dict_new.get(key1)+"\n\t"+dict_last.get(key1)
-                else:
-                    dict_last = dict_new
-        logging.info(f"发送告警数据日志: {dict_last}")
+        dict_last = merge_alert_fields(alert_fields)
+        logging.info("发送告警数据日志: %s", dict_last)
         send_to_mango(dict_last)
         # 同步发送到 Telegram
         send_to_telegram(dict_last)
@@ -120,5 +124,8 @@ def IssueCreate():
 
     return "OK"
 
+# 生产环境用 gunicorn 多进程 + 多线程运行（Flask 自带服务器仅用于本地调试）：
+#   gunicorn -w $(nproc) -k gthread --threads 16 --reuse-port -b 0.0.0.0:8082 \
+#       --max-requests 10000 --max-requests-jitter 1000 --chdir archive/old_py 'web-hook:app'
 if __name__ == '__main__':
     app.run(debug = False, host = '0.0.0.0', port = 8082)
\ No newline at end of file
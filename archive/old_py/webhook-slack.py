@@ -3,8 +3,10 @@ import json
 import requests
 import re
 from flask import Flask, request, jsonify
-from datetime import datetime
-from pytz import timezone, utc
+from datetime import datetime, timedelta
+
+from http_retry import post_with_retry
+from json_util import json_body
 
 app = Flask(__name__)
 logging.basicConfig(level=logging.INFO, format='{"time":"%(asctime)s","level":"%(levelname)s","traceId":"-","message":"%(message)s"}', datefmt='%Y-%m-%d %H:%M:%S')
@@ -17,55 +19,68 @@ status_dict = {
 # 代理设置（如不需要可设置为 None）
 proxies = { "http": "http://10.8.16.64:13080", "https": "http://10.8.16.64:13080"}
 
-# 设置北京时间
-beijing_tz = timezone("Asia/Shanghai")
+# 北京时间固定 UTC+8（无夏令时），输入均为 UTC，直接加偏移即可
+BEIJING_OFFSET = timedelta(hours=8)
+ZERO_TIME = "0001-01-01T00:00:00Z"
 
-# 时间转换函数（精确处理毫秒和时区）
-def convert_to_beijing_time(utc_time_str):
-    try:
-        # 尝试解析 %Y-%m-%dT%H:%M:%S.%fZ 格式的时间（例如：2025-03-28T00:30:15.418Z）
+# 回退解析：2025-03-28 00:30:15.418 +0000 UTC，以及 fromisoformat 不支持的写法（如 9 位小数秒）
+_TIME_RE_ISO = re.compile(r"^(\d{4})-(\d{2})-(\d{2})[T ](\d{2}):(\d{2}):(\d{2})(?:\.(\d+))?(?:Z| \+0000 UTC)$")
+# description 中嵌入的 UTC 时间（严格匹配不破坏原有格式）
+_TIME_RE = re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3} \+0000 UTC)")
+
+def _parse_utc(utc_time_str):
+    """解析 UTC 时间为 naive datetime：ISO 8601（...Z）走 C 实现的 fromisoformat，其余走正则"""
+    if utc_time_str.endswith("Z"):
         try:
-            utc_time = datetime.strptime(utc_time_str, "%Y-%m-%dT%H:%M:%S.%fZ")
+            return datetime.fromisoformat(utc_time_str[:-1])
         except ValueError:
-            # 如果解析失败，尝试解析 %Y-%m-%d %H:%M:%S.%f +0000 UTC 格式的时间（例如：2025-03-28 00:30:15.418 +0000 UTC）
-            utc_time = datetime.strptime(utc_time_str, "%Y-%m-%d %H:%M:%S.%f +0000 UTC")
-
-        # 设置为 UTC 时区
-        utc_time = utc.localize(utc_time)
-        
-        # 将时间转换为北京时间（UTC+8）
-        beijing_time = utc_time.astimezone(beijing_tz)
-        
-        # 返回格式化后的时间
-        return beijing_time.strftime("%Y-%m-%d %H:%M:%S")
+            pass
+    m = _TIME_RE_ISO.match(utc_time_str)
+    if m is None:
+        raise ValueError(f"不支持的时间格式: {utc_time_str!r}")
+    year, month, day, hour, minute, second, _ = m.groups()
+    return datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
+
+# 时间转换函数（不走 strptime 与异常回退链）
+def convert_to_beijing_time(utc_time_str):
+    # Alertmanager 用零值时间表示“尚未恢复”
+    if utc_time_str == ZERO_TIME:
+        return "未知时间"
+    try:
+        utc_time = _parse_utc(utc_time_str)
+        # 将时间转换为北京时间（UTC+8）并格式化（只精确到秒，毫秒不参与输出）
+        return (utc_time + BEIJING_OFFSET).strftime("%Y-%m-%d %H:%M:%S")
     except Exception as e:
-        logging.error(f"时间转换失败: {e}")
+        logging.error("时间转换失败: %s", e)
         return "未知时间"
 
+def _replace_match(match):
+    return convert_to_beijing_time(match.group(0))
+
 # 替换描述中的时间（严格匹配不破坏原有格式）
 def replace_times_in_description(description):
     try:
-        # 精确匹配时间部分的正则表达式
-        time_pattern = r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}\.\d{3} \+0000 UTC)"
-        
-        # 定义替换函数
-        def replace_match(match):
-            original_time = match.group(0)
-            beijing_time = convert_to_beijing_time(original_time)
-            return beijing_time
-        
         # 使用正则替换所有匹配项
-        updated_description = re.sub(time_pattern, replace_match, description)
-        return updated_description
+        return _TIME_RE.sub(_replace_match, description)
     except Exception as e:
-        logging.error(f"替换时间失败: {e}")
+        logging.error("替换时间失败: %s", e)
         return description
 
-def send_to_slack(content):
-    logging.info(f"send_to_slack数据内容日志:\n{json.dumps(content, indent=2, ensure_ascii=False)}")
-    request_header = {"Content-Type": "application/json; charset=UTF-8"}
-    push_url = 'https://hooks.slack.com/services/YOUR_WORKSPACE/YOUR_CHANNEL/YOUR_TOKEN'  # 请替换为实际的 Slack Webhook URL
+# 同一批告警合并为一条 Slack 消息：每条告警一个 section，之间用 divider 分隔
+# Slack 单条消息最多 50 个 block，单个 section 文本最多 3000 字符
+SLACK_MAX_ALERTS_PER_MESSAGE = 25
+SLACK_SECTION_MAX_CHARS = 3000
 
+SLACK_WEBHOOK_URL = 'https://hooks.slack.com/services/YOUR_WORKSPACE/YOUR_CHANNEL/YOUR_TOKEN'  # 请替换为实际的 Slack Webhook URL
+
+# 复用连接：同一批次的多次 POST 不再重复 TCP/TLS 握手
+_session = requests.Session()
+if proxies:
+    _session.proxies.update(proxies)
+
+
+def format_alert_text(content):
+    """把单条告警格式化为 Slack mrkdwn 文本"""
     status_key = content.get("status", "")
     status_info = status_dict.get(status_key, {"状态": "未知"})
 
@@ -101,20 +116,39 @@ def send_to_slack(content):
     mention = annotations.get("mention", "@默认用户")
     text_lines.append(f"\n{mention}")
 
-    # 生成最终的 Slack 消息
-    push_slack_data = {
-        "text": "\n".join(text_lines),
-        "username": "平台健康度告警"
-    }
+    return "\n".join(text_lines)
 
-    logging.info(f"发送到 Slack 的数据:\n{json.dumps(push_slack_data, indent=2, ensure_ascii=False)}")
 
-    try:
-        res = requests.post(url=push_url, headers=request_header, data=json.dumps(push_slack_data), proxies=proxies)
-        res.raise_for_status()
-        logging.info(f"Slack返回响应:\n{res.text}")
-    except requests.exceptions.RequestException as e:
-        logging.error(f"Slack 发送请求失败: {e}")
+def send_to_slack(alerts):
+    """一批告警合并为尽量少的 Slack 消息发送（通常一次 POST）"""
+    request_header = {"Content-Type": "application/json; charset=UTF-8"}
+    texts = [format_alert_text(alert) for alert in alerts]
+
+    for i in range(0, len(texts), SLACK_MAX_ALERTS_PER_MESSAGE):
+        chunk = texts[i:i + SLACK_MAX_ALERTS_PER_MESSAGE]
+        blocks = []
+        for text in chunk:
+            if blocks:
+                blocks.append({"type": "divider"})
+            blocks.append({
+                "type": "section",
+                "text": {"type": "mrkdwn", "text": text[:SLACK_SECTION_MAX_CHARS]},
+            })
+        push_slack_data = {
+            # text 作为通知摘要与不支持 blocks 时的回退内容
+            "text": "\n\n".join(chunk),
+            "blocks": blocks,
+            "username": "平台健康度告警"
+        }
+
+        logging.info("发送到 Slack 的数据: %d 条告警", len(chunk))
+
+        try:
+            res = post_with_retry(SLACK_WEBHOOK_URL, session=_session, timeout=10, headers=request_header, data=json_body(push_slack_data))
+            res.raise_for_status()
+            logging.info("Slack返回响应: %s", res.text)
+        except requests.exceptions.RequestException as e:
+            logging.error("Slack 发送请求失败: %s", e)
 
 @app.route("/webhook", methods=["POST"])
 def alertmanager_webhook():
@@ -123,15 +157,19 @@ def alertmanager_webhook():
         if not data:
             return jsonify({"error": "Invalid JSON"}), 400
 
-        logging.info(f"收到 Alertmanager 告警: {json.dumps(data, indent=2, ensure_ascii=False)}")
-        
-        for alert in data.get("alerts", []):
-            send_to_slack(alert)  
-        
+        logging.info("收到 Alertmanager 告警: %s", json.dumps(data, ensure_ascii=False))
+
+        alerts = data.get("alerts", [])
+        if alerts:
+            send_to_slack(alerts)
+
         return jsonify({"status": "success"})
     except Exception as e:
-        logging.error(f"处理 Webhook 失败: {e}")
+        logging.error("处理 Webhook 失败: %s", e)
         return jsonify({"error": "Internal Server Error"}), 500
 
+# 生产环境用 gunicorn 多进程 + 多线程运行（Flask 自带服务器仅用于本地调试）：
+#   gunicorn -w $(nproc) -k gthread --threads 16 --reuse-port -b 0.0.0.0:9081 \
+#       --max-requests 10000 --max-requests-jitter 1000 --chdir archive/old_py 'webhook-slack:app'
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=9081, debug=True)
\ No newline at end of file
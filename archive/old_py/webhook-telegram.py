@@ -1,17 +1,24 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
-import json
 import requests,logging
 from flask import request, Flask    #flask模块
 from datetime import datetime,timezone,timedelta
 
+from alert_merge import merge_alert_fields
+from http_retry import post_with_retry
+from json_util import JsonRepr, json_body
+
 proxies = { "http": "http://10.8.16.64:13080", "https": "http://10.8.16.64:13080"}
 
+# 复用连接：各渠道共用一个会话（连接池），不再每次发送都重新 TCP/TLS 握手；代理按请求传
+_session = requests.Session()
+
 
 # 设置日志配置
 logging.basicConfig(filename='/var/log/mango-hook.log', level=logging.INFO, format='{"time":"%(asctime)s","level":"%(levelname)s","traceId":"-","message":"%(message)s"}', datefmt='%Y-%m-%d %H:%M:%S')
 
+
 #Flask通用配置
 app = Flask(__name__)
 app.url_map.strict_slashes = False  # 允许 /webhook 与 /webhook/ 都匹配，避免 308
@@ -22,85 +29,106 @@ status_dict = {
     "resolved": {"✅✅✅✅  状态": "恢复"}
 }
 
+# 告警字段拼成 "key: value" 多行文本（各发送渠道共用）
+def _format_kv(content):
+    return "".join(f"{k}: {v}\n" for k, v in content.items())
+
+
 def SendMango2(content):
-    data = {'text': ''}
-    logging.info(f"SendMango数据内容日志: {content}")
-    for i in content:
-        data['text'] += i + ': ' + content.get(i) + '\n'
-    logging.info("数据格式: %s, %s", data, str(type(data)))
-    res = requests.get("http://dc-tw-ebpay-pro-alarm.zfit999.com/alarm/grafana/pushToSlack",params=data)
+    logging.info("SendMango数据内容日志: %s", content)
+    data = {'text': _format_kv(content)}
+    logging.info("数据格式: %s, %s", data, type(data))
+    res = requests.get("http://dc-tw-ebpay-pro-alarm.zfit999.com/alarm/grafana/pushToSlack",params=data, timeout=10)
     logging.info("响应状态类型: %s, URL: %s", res.text, res.url)
 
+# Telegram 单条消息上限 4096 字符，留出余量按 4000 切分
+TELEGRAM_MAX_CHARS = 4000
+
+def split_text(text, limit=TELEGRAM_MAX_CHARS):
+    """按行把长文本切成不超过 limit 的片段（单行超长时硬切）"""
+    chunks = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        if len(current) + len(line) > limit:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
 # dc_telegram 告警发送
 def send_to_telegram(content):
     logging.info("send_to_telegram 数据内容日志: %s", content)
 
     # 组装文本
-    telegram_monitr = ""
-    for key, value in content.items():
-        telegram_monitr += f"{key}: {value}\n"
+    telegram_monitr = _format_kv(content)
 
     chatid = 'YOUR_CHAT_ID'  # 请替换为实际的 Telegram Chat ID
     auth_token = 'YOUR_BOT_TOKEN:YOUR_BOT_SECRET'  # 请替换为实际的 Telegram Bot Token
     telegram_url = f'https://api.telegram.org/bot{auth_token}/sendMessage'
-    payload = {"chat_id": chatid, "text": telegram_monitr}
 
-    try:
-        logging.info("Telegram 请求 URL: %s", telegram_url)
-        logging.info("Telegram 请求 payload: %s", payload)
-        logging.info("Telegram 代理: %s", proxies)
-
-        res = requests.post(
-            url=telegram_url,
-            data=payload,          # Telegram 支持表单
-            timeout=10,            # 加超时避免卡线程
-            verify=False,
-            proxies=proxies
-        )
-
-        logging.info("Telegram响应状态码: %s", res.status_code)
-        logging.info("Telegram响应内容: %s", res.text)
-    except Exception as e:
-        logging.exception("发送 Telegram 失败: %s", e)
+    # 合并后的文本通常一次发完；超过 Telegram 长度上限时才拆成多条
+    for text in split_text(telegram_monitr):
+        payload = {"chat_id": chatid, "text": text}
+        try:
+            logging.info("Telegram 请求 URL: %s", telegram_url)
+            logging.info("Telegram 请求 payload: %s", payload)
+            logging.info("Telegram 代理: %s", proxies)
+
+            res = post_with_retry(
+                telegram_url,
+                session=_session,
+                data=payload,          # Telegram 支持表单
+                timeout=10,            # 加超时避免卡线程
+                verify=False,
+                proxies=proxies
+            )
+
+            logging.info("Telegram响应状态码: %s", res.status_code)
+            logging.info("Telegram响应内容: %s", res.text)
+        except Exception as e:
+            logging.exception("发送 Telegram 失败: %s", e)
 
 def SendMango(content):
-    data = {'text': ''}
-    logging.info(f"SendMango数据内容日志: {content}")
-    for i in content:
-        data['text'] += i + ': ' + content.get(i) + '\n'
-    logging.info("数据格式: %s, %s", data, str(type(data)))
-    res = requests.get("http://risk-manager.ebpay.org:30040/risk-manager/alarm",params=data)
+    logging.info("SendMango数据内容日志: %s", content)
+    data = {'text': _format_kv(content)}
+    logging.info("数据格式: %s, %s", data, type(data))
+    res = requests.get("http://risk-manager.ebpay.org:30040/risk-manager/alarm",params=data, timeout=10)
     logging.info("响应状态类型: %s, URL: %s", res.text, res.url)
 
 
 def Send_grafana(content):
-    data = {'text': ''}
-    logging.info(f"Send_grafana数据内容日志: {content}")
-    for i in content:
-        data['text'] += i + ': ' + content.get(i) + '\n'
-    logging.info("数据格式: %s, %s", data, str(type(data)))
-    res = requests.post("http://10.104.166.1:31833/api/v1/ebpay",data=data)
+    logging.info("Send_grafana数据内容日志: %s", content)
+    data = {'text': _format_kv(content)}
+    logging.info("数据格式: %s, %s", data, type(data))
+    res = requests.post("http://10.104.166.1:31833/api/v1/ebpay",data=data, timeout=10)
     logging.info("响应状态类型: %s, URL: %s", res.text, res.url)
 
 
 # 发送告警到Mango
 def send_to_mango(content):
-    data = ''
-    for i in content:
-        data += i + ': ' + content.get(i) + '\n'
+    data = _format_kv(content)
     request_header = {"content-type": "application/json; charset=UTF-8","Authorization": "YOUR_MANGO_AUTH_TOKEN"}  # 请替换为实际的 Mango 认证 Token
     push_tx_data = {"targetname": "YOUR_TARGET_NAME","text": data,"chatType":"2","model": "1"}  # 请替换为实际的目标名称
     push_url = 'https://trobot.ymtio.com/api/robot/YOUR_USERCODE:YOUR_SECRET/sendmessage_v2'  # 请替换为实际的 Mango Webhook URL
-    push_tx_data = json.dumps(push_tx_data)
+    push_tx_data = json_body(push_tx_data)
     #logger.debug('告警数据：{}'.format(push_tx_data))
-    res= requests.post(url=push_url, headers=request_header, data=push_tx_data)
+    res = post_with_retry(push_url, session=_session, headers=request_header, data=push_tx_data, timeout=10)
     #处理返回的数据
     try:
         json_data = res.json()
     except ValueError:
         logging.error('无法解析的响应数据: %s', res.text)
     else:
-        logging.info('Mango数据返回响应: \n%s', json.dumps(json_data, indent=4, ensure_ascii=False))
+        logging.info('Mango数据返回响应: %s', JsonRepr(json_data))
 
 
 @app.route('/webhook', methods=['POST'])
@@ -110,7 +138,7 @@ def IssueCreate():
     #print (data_dict)
     try:
         alerts_l = data_dict['alerts']
-        dict_last = {}
+        alert_fields = []
         for alert in alerts_l:
             dict_new = {}
             utc_dt = datetime.strptime(alert.get('startsAt'), '%Y-%m-%dT%H:%M:%S.%fZ')
@@ -123,18 +151,18 @@ def IssueCreate():
             dict_new["summary"] = "%s" % alert.get('annotations').get('summary')
             for pop_name in ["prometheus", "id", "image", "uid", "metrics_path", "endpoint", "job", "service", "name"]: 
                 dict_new.pop(pop_name,100)
-
-            for key1 in dict_new:
-                if key1 in dict_last.keys():
-                    if key1 != "时间" and key1 != "summary":
-                        if dict_new.get(key1) not in dict_last.get(key1) and dict_last.get('monitor_name') == dict_new.get('monitor_name') and dict_last.get('project') == dict_new.get('project'):
-                                dict_last[key1] = dict_new.get(key1)+"\n\t"+dict_last.get(key1)
-                        elif dict_new.get(key1) not in dict_last.get(key1) and 'monitor_name' not in dict_last.keys():
-                                dict_last[key1] = dict_new.get(key1)+"\n\t"+dict_last.get(key1)
-                else:
-                    dict_last = dict_new
+            alert_fields.append(dict_new)
+
+        # 第一条告警带 monitor_name 时，只合并 monitor_name/project 与之相同的告警
+        first = alert_fields[0] if alert_fields else {}
+        if 'monitor_name' in first:
+            alert_fields = [
+                f for f in alert_fields
+                if f.get('monitor_name') == first['monitor_name'] and f.get('project') == first.get('project')
+            ]
+        dict_last = merge_alert_fields(alert_fields)
         #print(dict_last)
-        logging.info(f"发送告警数据日志: {dict_last}")
+        logging.info("发送告警数据日志: %s", dict_last)
         # 先发 Telegram，便于快速确认是否进入到这里；其余通道失败也不影响 TG
         logging.info("准备发送 Telegram 告警(Pre): %s", dict_last)
         try:
@@ -166,5 +194,8 @@ def IssueCreate():
 
     return "OK"
 
+# 生产环境用 gunicorn 多进程 + 多线程运行（Flask 自带服务器仅用于本地调试）：
+#   gunicorn -w $(nproc) -k gthread --threads 16 --reuse-port -b 0.0.0.0:8081 \
+#       --max-requests 10000 --max-requests-jitter 1000 --chdir archive/old_py 'webhook-telegram:app'
 if __name__ == '__main__':
     app.run(debug = False, host = '0.0.0.0', port = 8081)
\ No newline at end of file
@@ -1,10 +1,12 @@
 # 导入所需的库
-import json
 import logging
 from datetime import datetime, timezone, timedelta
-from dateutil import parser
 from flask import Flask, request
 import requests
+from requests.adapters import HTTPAdapter
+from http_retry import post_with_retry
+from json_util import json_body, json_loads, json_pretty
+from log_queue import setup_queue_logging
 import re
 
 TELEGRAM_BOT_TOKEN = "YOUR_BOT_TOKEN:YOUR_BOT_SECRET"  # 请替换为实际的 Telegram Bot Token
@@ -12,39 +14,74 @@ CHAT_ID = "YOUR_CHAT_ID"  # 请替换为实际的 Telegram Chat ID
 
 proxies = { "http": "http://10.8.16.64:13080", "https": "http://10.8.16.64:13080"}
 
+# 共享会话：各通知渠道复用 keep-alive 连接，避免每条告警都重新 TCP/TLS 握手
+# 代理只有部分渠道使用，仍按请求传 proxies
+SESSION = requests.Session()
+# 重试由 post_with_retry 负责（只重试连接失败与 429/5xx），适配器本身不重试
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+# 所有外发请求的超时（连接, 读取），下游卡住时不会永久占住处理线程
+SEND_TIMEOUT = (3, 10)
+
 #定义状态字典，用于在警告消息中显示状态
 status_dict = {
     "firing": {"❌❌❌❌ 状态": "告警"},
     "resolved": {"✅✅✅✅ 状态": "恢复"}
 }
+# firing/resolved 以外的状态（个别 Alertmanager/Grafana 版本会发）按未知处理，不让整批告警因 KeyError 中断
+_UNKNOWN_STATUS = {"⚠️ 状态": "未知"}
+
+# Grafana 旧版 valueString 中 B 表达式的当前值：var='B' labels={...} value=123
+_VALUE_B_RE = re.compile(r"var='B' labels=\{.*?\} value=(\d+)")
 
-# 配置日志
-logging.basicConfig(filename='/tmp/grafana_mango.log', level=logging.INFO, format='{"time":"%(asctime)s","level":"%(levelname)s","traceId":"-","message":"%(message)s"}', datefmt='%Y-%m-%d %H:%M:%S')
+# 配置日志：请求线程只把日志放入内存队列，由后台线程写文件（见 log_queue.py）
+_LOG_LISTENER = setup_queue_logging('/tmp/grafana_mango.log')
 
 # 初始化 Flask
 app = Flask(__name__)
 app.config['JSON_AS_ASCII'] = False
 
+# 北京时间
+CST = timezone(timedelta(hours=8))
+# ISO 8601 时间中的小数秒
+_FRACTION_RE = re.compile(r"\.(\d+)")
+
+
+def parse_iso_time(value):
+    """解析 Alertmanager/Grafana 的 RFC3339 时间（如 2024-01-02T03:04:05.123Z），走 C 实现的 fromisoformat"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # Python 3.11 之前 fromisoformat 只接受 3 或 6 位小数秒，Grafana 时间为纳秒精度：统一截断/补齐到 6 位
+        return datetime.fromisoformat(
+            _FRACTION_RE.sub(lambda m: '.' + m.group(1)[:6].ljust(6, '0'), value, count=1)
+        )
+
 #定义函数来格式化警告消息
 def format_alert(alert):
     dict_new = {}
     # 把开始时间从UTC转化为CST时间
-    utc_dt = parser.parse(alert.get('startsAt'))
-    cst_time = utc_dt.astimezone(timezone(timedelta(hours=8))).strftime("%Y-%m-%d %H:%M:%S")
+    utc_dt = parse_iso_time(alert.get('startsAt'))
+    # isoformat 不经 libc strftime；去掉时区避免输出 +08:00 后缀
+    cst_time = utc_dt.astimezone(CST).replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')
     #获取警告状态
     alert_status = alert.get('status')
     #更新警告状态
-    dict_new.update(status_dict[alert_status])
+    dict_new.update(status_dict.get(alert_status, _UNKNOWN_STATUS))
     #增加时间信息
     dict_new.update({"时间": cst_time})
     #增加标签信息
     dict_new.update(alert.get('labels'))
-    try:
     # 如果'B'在values字段中存在，则将当前值增加到警告值信息
-        dict_new.update({"当前值": alert.get('values').get('B')})
-    except AttributeError as e:
-    #如果values字段获取不到，则在valueString字段中获取B对应的当前值并加入告警信息
-        match = re.search(r"var='B' labels={.*?} value=(\d+)", alert.get('valueString'))
+    values = alert.get('values')
+    if isinstance(values, dict) and 'B' in values:
+        dict_new.update({"当前值": values['B']})
+    else:
+        #如果values字段获取不到，则在valueString字段中获取B对应的当前值并加入告警信息
+        match = _VALUE_B_RE.search(alert.get('valueString') or '')
         if match:
             value = int(match.group(1))
             dict_new.update({"当前值": value})
@@ -53,13 +90,42 @@ def format_alert(alert):
             dict_new.update({"当前值": "获取当前值异常,请检查app-gateway接口是否故障"})
     return dict_new
 
-#定义函数向告警接收端发送警告
-def send_alert(alert_dict):
-    #定义请求头部
-    request_header = {
-        "content-type": "application/json; charset=UTF-8",
-        "Authorization": "YOUR_MANGO_AUTH_TOKEN"  # 请替换为实际的 Mango 认证 Token
-    }
+# Mango 固定的请求头部
+_MANGO_HEADERS = {
+    "content-type": "application/json; charset=UTF-8",
+    "Authorization": "YOUR_MANGO_AUTH_TOKEN"  # 请替换为实际的 Mango 认证 Token
+}
+
+#把格式化后的告警拼成 "key: value" 多行文本，每条告警只拼一次，各渠道共用
+def format_alert_text(alert_dict):
+    return '\n'.join(f'{k}: {v}' for k, v in alert_dict.items())
+
+# 同一次 webhook 的多条告警合并发送，告警之间的分隔
+ALERT_SEPARATOR = '\n\n---\n\n'
+# Telegram 单条消息上限 4096 字符
+TELEGRAM_MAX_CHARS = 4096
+
+def pack_texts(texts, limit):
+    """把多条告警文本用分隔符拼成尽量少的消息，每条不超过 limit 字符（单条告警超长时硬切）"""
+    messages = []
+    current = ''
+    for text in texts:
+        while len(text) > limit:
+            if current:
+                messages.append(current)
+                current = ''
+            messages.append(text[:limit])
+            text = text[limit:]
+        if current and len(current) + len(ALERT_SEPARATOR) + len(text) > limit:
+            messages.append(current)
+            current = ''
+        current = current + ALERT_SEPARATOR + text if current else text
+    if current:
+        messages.append(current)
+    return messages
+
+#定义函数向告警接收端发送警告（一批告警合并为一条消息）
+def send_alert(texts):
     #定义请求URL
     #push_url = 'https://trobot.ymtio.com/api/robot/usercod_60007578:56b1a6161d6c4b51aaa94ad4fb5b1398/sendmessage_v2'
     push_url = 'https://trobot.ymtio.com/api/robot/YOUR_USERCODE:YOUR_SECRET/sendmessage_v2'  # 请替换为实际的 Mango Webhook URL
@@ -68,61 +134,66 @@ def send_alert(alert_dict):
         "targetname": "1002583630",
         # 1002583630 测试
         # 1002582895 生产
-        "text": '\n'.join([f'{k}: {v}' for k, v in alert_dict.items()]),
+        "text": ALERT_SEPARATOR.join(texts),
         "chatType": "2",
         "model": "1"
     }
     #把数据转换为JSON格式
-    push_tx_data = json.dumps(push_tx_data)
+    push_tx_data = json_body(push_tx_data)
     #发送POST请求
-    res = requests.post(url=push_url, headers=request_header, data=push_tx_data)
+    res = post_with_retry(push_url, session=SESSION, headers=_MANGO_HEADERS, data=push_tx_data, timeout=SEND_TIMEOUT)
     #处理返回的数据
     try:
         json_data = res.json()
     except ValueError:
         logging.error('无法解析的响应数据: %s', res.text)
     else:
-        logging.info('Mango数据返回响应：\n%s', json.dumps(json_data, indent=4, ensure_ascii=False))
+        # 缩进 JSON 只用于排查，DEBUG 未开启时不做重新编码
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug('Mango数据返回响应：\n%s', json_pretty(json_data))
 
-def send_telegram_alert(alert_dict):
-    message_text = '\n'.join([f'{k}: {v}' for k, v in alert_dict.items()])
+def send_telegram_alert(texts):
     telegram_url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": CHAT_ID,
-        "text": message_text,
-        "parse_mode": "HTML"
-    }
+    #超过单条消息上限时才拆成多条
+    for message in pack_texts(texts, TELEGRAM_MAX_CHARS):
+        payload = {
+            "chat_id": CHAT_ID,
+            "text": message,
+            "parse_mode": "HTML"
+        }
+        try:
+            res = post_with_retry(telegram_url, session=SESSION, data=payload, proxies=proxies, timeout=SEND_TIMEOUT)
+            res.raise_for_status()
+            # 响应体用不到，只记录状态码，不做解码
+            logging.info('Telegram告警发送成功: %s', res.status_code)
+        except requests.exceptions.RequestException as e:
+            logging.error('发送Telegram告警失败: %s', str(e))
+
+# Flask路由设置
+@app.route('/webhook/', methods=['POST'])
+def handle_webhook():
+    #解析请求数据
+    data_dict = json_loads(request.data)
+    #记录数据字典
+    logging.info("收到的数据字典: %s", data_dict)
     try:
-        res = requests.post(telegram_url, data=payload, proxies=proxies, timeout=10)
-        res.raise_for_status()
-        logging.info('Telegram告警发送成功: %s', res.text)
-    except requests.exceptions.RequestException as e:
-        logging.error('发送Telegram告警失败: %s', str(e))
+        #从数据字典中获取警告信息
+        alerts = data_dict['alerts']
+        #格式化每一个警告，整批告警每个渠道只发一次
+        texts = [format_alert_text(format_alert(alert)) for alert in alerts]
+        #发送警告
+        if texts:
+            send_alert(texts)
+            send_telegram_alert(texts)
+    except KeyError as e:
+        # 如果捕获到KeyError，则记录错误信息
+        logging.error('数据格式错误: 没有 "alerts" 字段. 错误信息: %s', str(e))
+    #返回确认信息
+    return "OK"
 
-# 判断是否为��程序，如果是则执行以下代码
+# 生产环境用 gunicorn 多进程 + 多线程运行（Flask 自带服务器仅用于本地调试）：
+#   gunicorn -w $(nproc) -k gthread --threads 16 --reuse-port -b 0.0.0.0:8083 \
+#       --max-requests 10000 --max-requests-jitter 1000 --chdir archive/old_py 'webhook_easy_test_grafana:app'
+# 模块级会话与日志监听线程需在 worker 内创建，不要加 --preload
 if __name__ == '__main__':
-    # Flask路由设置
-    @app.route('/webhook/', methods=['POST'])
-    def handle_webhook():
-        #解析请求数据
-        data_dict = json.loads(request.data)
-        #记录数据字典
-        logging.info("收到的数据字典: %s", data_dict)
-        try:
-            #从数据字典中获取警告信息
-            alerts = data_dict['alerts']
-            #处理每一个警告
-            for alert in alerts:
-                #格式化警告
-                alert_dict = format_alert(alert)
-                #发送警告
-                send_alert(alert_dict)
-                send_telegram_alert(alert_dict)
-        except KeyError as e:
-            # 如果捕获到KeyError，则记录错误信息
-            logging.error('数据格式错误: 没有 "alerts" 字段. 错误信息: %s', str(e))
-        #返回确认信息
-        return "OK"
-
-    # 运行 Flask 服务器
     app.run(debug = False, host = '0.0.0.0', port = 8083)
\ No newline at end of file
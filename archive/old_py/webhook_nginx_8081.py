@@ -1,48 +1,140 @@
 # 导入所需的库
+import hashlib
 import json
 import logging
+import threading
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone, timedelta
-from dateutil import parser
 from flask import Flask, request
 import requests
+from requests.adapters import HTTPAdapter
+from http_retry import post_with_retry
+from json_util import json_body, json_loads, json_pretty
+from log_queue import setup_queue_logging
 import re
 
+try:
+    import orjson  # 可选依赖：比标准库 json 快数倍，直接输出 bytes
+except ImportError:
+    orjson = None
+from concurrent.futures import ThreadPoolExecutor
+
 #定义状态字典，用于在警告消息中显示状态
 status_dict = {
     "firing": {"❌❌❌❌ 状态": "告警"},
     "resolved": {"✅✅✅✅ 状态": "恢复"}
 }
+# firing/resolved 以外的状态（个别 Alertmanager/Grafana 版本会发）按未知处理，不让整批告警因 KeyError 中断
+_UNKNOWN_STATUS = {"⚠️ 状态": "未知"}
+
+# Grafana 旧版 valueString 中 B 表达式的当前值：var='B' labels={...} value=123
+_VALUE_B_RE = re.compile(r"var='B' labels=\{.*?\} value=(\d+)")
 
 proxies = { "http": "http://10.8.16.64:13080", "https": "http://10.8.16.64:13080"}
 
-# 配置日志
-logging.basicConfig(filename='/tmp/mango.log', level=logging.INFO, format='{"time":"%(asctime)s","level":"%(levelname)s","traceId":"-","message":"%(message)s"}', datefmt='%Y-%m-%d %H:%M:%S')
+# 共享会话：各通知渠道复用 keep-alive 连接，避免每条告警都重新 TCP/TLS 握手
+# 代理只有部分渠道使用，仍按请求传 proxies
+SESSION = requests.Session()
+# 重试由 post_with_retry 负责（只重试连接失败与 429/5xx），适配器本身不重试
+_adapter = HTTPAdapter(pool_connections=32, pool_maxsize=64)
+SESSION.mount('https://', _adapter)
+SESSION.mount('http://', _adapter)
+# 所有外发请求的超时（连接, 读取），下游卡住时不会永久占住处理线程
+SEND_TIMEOUT = (3, 10)
+
+# 各通知渠道并发发送的线程数（同时处理的多个 webhook 共用）
+SEND_WORKERS = 16
+_send_executor = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix="notify")
+
+# 告警去重：同一告警（labels 相同）以相同状态在窗口内重复推送时只通知一次
+# Alertmanager/Grafana 每个 group_interval 都会重发仍在 firing 的告警；状态变化（恢复、再次告警）总会通知
+DEDUP_WINDOW_SECONDS = 600
+DEDUP_MAX_ENTRIES = 4096
+_seen_alerts = OrderedDict()  # 指纹 -> (status, 过期时间 monotonic)
+_seen_lock = threading.Lock()
+
+
+def alert_fingerprint(alert):
+    """告警指纹：labels 按 key 排序后的哈希"""
+    labels = alert.get('labels') or {}
+    if orjson is not None:
+        labels_json = orjson.dumps(labels, option=orjson.OPT_SORT_KEYS)
+    else:
+        labels_json = json.dumps(labels, sort_keys=True, ensure_ascii=False).encode('utf-8')
+    return hashlib.blake2b(labels_json, digest_size=16).digest()
+
+
+def claim_alert(fp, status):
+    """登记一条待通知的告警：窗口内已以相同状态通知过（或正在通知）返回 False，否则记录并返回 True"""
+    now = time.monotonic()
+    with _seen_lock:
+        seen = _seen_alerts.get(fp)
+        if seen is not None and seen[0] == status and seen[1] > now:
+            return False
+        _seen_alerts[fp] = (status, now + DEDUP_WINDOW_SECONDS)
+        _seen_alerts.move_to_end(fp)
+        # 超出容量时淘汰最早记录的指纹
+        while len(_seen_alerts) > DEDUP_MAX_ENTRIES:
+            _seen_alerts.popitem(last=False)
+    return True
+
+
+def release_alert(fp, status):
+    """格式化或发送失败时撤销登记，让 Alertmanager 的重试能重新通知"""
+    with _seen_lock:
+        seen = _seen_alerts.get(fp)
+        if seen is not None and seen[0] == status:
+            del _seen_alerts[fp]
+
+# 配置日志：请求线程只把日志放入内存队列，由后台线程写文件（见 log_queue.py）
+_LOG_LISTENER = setup_queue_logging('/tmp/mango.log')
 
 # 初始化 Flask
 app = Flask(__name__)
 app.url_map.strict_slashes = False 
 app.config['JSON_AS_ASCII'] = False
 
+# 北京时间
+CST = timezone(timedelta(hours=8))
+# ISO 8601 时间中的小数秒
+_FRACTION_RE = re.compile(r"\.(\d+)")
+
+
+def parse_iso_time(value):
+    """解析 Alertmanager/Grafana 的 RFC3339 时间（如 2024-01-02T03:04:05.123Z），走 C 实现的 fromisoformat"""
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        # Python 3.11 之前 fromisoformat 只接受 3 或 6 位小数秒，Grafana 时间为纳秒精度：统一截断/补齐到 6 位
+        return datetime.fromisoformat(
+            _FRACTION_RE.sub(lambda m: '.' + m.group(1)[:6].ljust(6, '0'), value, count=1)
+        )
+
 #定义函数来格式化警告消息
 def format_alert(alert):
     dict_new = {}
     # 把开始时间从UTC转化为CST时间
-    utc_dt = parser.parse(alert.get('startsAt'))
-    cst_time = utc_dt.astimezone(timezone(timedelta(hours=8))).strftime("%Y-%m-%d %H:%M:%S")
+    utc_dt = parse_iso_time(alert.get('startsAt'))
+    # isoformat 不经 libc strftime；去掉时区避免输出 +08:00 后缀
+    cst_time = utc_dt.astimezone(CST).replace(tzinfo=None).isoformat(sep=' ', timespec='seconds')
     #获取警告状态
     alert_status = alert.get('status')
     #更新警告状态
-    dict_new.update(status_dict[alert_status])
+    dict_new.update(status_dict.get(alert_status, _UNKNOWN_STATUS))
     #增加时间信息
     dict_new.update({"时间": cst_time})
     #增加标签信息
     dict_new.update(alert.get('labels'))
-    try:
     # 如果'B'在values字段中存在，则将当前值增加到警告值信息
-        dict_new.update({"当前值": alert.get('values').get('B')})
-    except AttributeError as e:
-    #如果values字段获取不到，则在valueString字段中获取B对应的当前值并加入告警信息
-        match = re.search(r"var='B' labels={.*?} value=(\d+)", alert.get('valueString'))
+    values = alert.get('values')
+    if isinstance(values, dict) and 'B' in values:
+        dict_new.update({"当前值": values['B']})
+    else:
+        #如果values字段获取不到，则在valueString字段中获取B对应的当前值并加入告警信息
+        match = _VALUE_B_RE.search(alert.get('valueString') or '')
         if match:
             value = int(match.group(1))
             dict_new.update({"当前值": value})
@@ -50,124 +142,221 @@ def format_alert(alert):
             dict_new.update({"当前值": "获取当前值异常,请检查es是否故障"})
     return dict_new
 
-#定义函数向告警接收端发送警告
-def send_alert(alert_dict):
-    #定义请求头部
-    request_header = {
-        "content-type": "application/json; charset=UTF-8",
-        "Authorization": "YOUR_MANGO_AUTH_TOKEN"  # 请替换为实际的 Mango 认证 Token
-    }
+# 各渠道固定的请求头部
+_MANGO_HEADERS = {
+    "content-type": "application/json; charset=UTF-8",
+    "Authorization": "YOUR_MANGO_AUTH_TOKEN"  # 请替换为实际的 Mango 认证 Token
+}
+_SLACK_HEADERS = {
+    "content-type": "application/json; charset=UTF-8"
+}
+
+#把格式化后的告警拼成 "key: value" 多行文本，每条告警只拼一次，各渠道共用
+def format_alert_text(alert_dict):
+    return '\n'.join(f'{k}: {v}' for k, v in alert_dict.items())
+
+# 同一次 webhook 的多条告警按渠道合并发送，告警之间的分隔
+ALERT_SEPARATOR = '\n\n---\n\n'
+# Telegram 单条消息上限 4096 字符
+TELEGRAM_MAX_CHARS = 4096
+# Slack 单条消息最多 50 个 block，单个 section 文本最多 3000 字符
+SLACK_MAX_BLOCKS = 50
+SLACK_SECTION_MAX_CHARS = 3000
+SLACK_MENTION = '<@U070YD6L19R>'
+
+def pack_texts(texts, limit):
+    """把多条告警文本用分隔符拼成尽量少的消息，每条不超过 limit 字符（单条告警超长时硬切）"""
+    messages = []
+    current = ''
+    for text in texts:
+        while len(text) > limit:
+            if current:
+                messages.append(current)
+                current = ''
+            messages.append(text[:limit])
+            text = text[limit:]
+        if current and len(current) + len(ALERT_SEPARATOR) + len(text) > limit:
+            messages.append(current)
+            current = ''
+        current = current + ALERT_SEPARATOR + text if current else text
+    if current:
+        messages.append(current)
+    return messages
+
+#定义函数向告警接收端发送警告（一批告警合并为一条消息）
+def send_alert(texts):
     #定义请求URL
 #    push_url = 'https://trobot.ymtio.com/api/robot/usercod_60007578:56b1a6161d6c4b51aaa94ad4fb5b1398/sendmessage_v2'
     push_url = 'https://trobot.ymtio.com/api/robot/YOUR_USERCODE:YOUR_SECRET/sendmessage_v2'  # 请替换为实际的 Mango Webhook URL
     #定义要发送的数据
     push_tx_data = {
         "targetname": "YOUR_TARGET_NAME",  # 请替换为实际的目标名称
-        "text": '\n'.join([f'{k}: {v}' for k, v in alert_dict.items()]),
+        "text": ALERT_SEPARATOR.join(texts),
         "chatType": "2",
         "model": "1"
     }
     #把数据转换为JSON格式
-    push_tx_data = json.dumps(push_tx_data)
+    push_tx_data = json_body(push_tx_data)
     #发送POST请求
-    res = requests.post(url=push_url, headers=request_header, data=push_tx_data)
+    res = post_with_retry(push_url, session=SESSION, headers=_MANGO_HEADERS, data=push_tx_data, timeout=SEND_TIMEOUT)
+    # 4xx/5xx 抛出异常，由 handle_webhook 撤销这批告警的去重登记并返回 500
+    res.raise_for_status()
     #处理返回的数据
     try:
         json_data = res.json()
     except ValueError:
         logging.error('无法解析的响应数据: %s', res.text)
     else:
-        logging.info('Mango数据返回响应：\n%s', json.dumps(json_data, indent=4, ensure_ascii=False))
+        # 缩进 JSON 只用于排查，DEBUG 未开启时不做重新编码
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug('Mango数据返回响应：\n%s', json_pretty(json_data))
 
 # dc_telegram 告警发送
-def send_to_telegram(alert_dict):
-    logging.info(f"send_to_telegram数据内容日志: {alert_dict}")
-    data = ''
-    for i in alert_dict:
-        data += i + ': ' + str(alert_dict.get(i)) + '\n'
+def send_to_telegram(texts):
+    logging.info("send_to_telegram数据内容日志: %s", texts)
 
     #chatid='-4162282768'
     chatid='YOUR_CHAT_ID'  # 请替换为实际的 Telegram Chat ID
     auth_token = 'YOUR_BOT_TOKEN:YOUR_BOT_SECRET'  # 请替换为实际的 Telegram Bot Token 
     telegram_url='https://api.telegram.org/bot' + auth_token + '/sendMessage'
-    push_data = {
-        "chat_id": chatid,
-        "text": data  # 注意这里应该发送的是formatted data
-    }
-
-    requests.post(url=telegram_url, data=push_data, verify=False, proxies=proxies)
+    #超过单条消息上限时才拆成多条
+    for message in pack_texts(texts, TELEGRAM_MAX_CHARS):
+        push_data = {
+            "chat_id": chatid,
+            "text": message  # 注意这里应该发送的是formatted data
+        }
+        res = post_with_retry(telegram_url, session=SESSION, data=push_data, verify=False, proxies=proxies, timeout=SEND_TIMEOUT)
+        # 响应体用不到，只看状态码，不做解码；发送失败抛出异常
+        res.raise_for_status()
 
-def send_to_telegram_v2(alert_dict):
-    logging.info(f"send_to_telegram_v2数据内容日志: {alert_dict}")
-    data = ''
-    for i in alert_dict:
-        data += i + ': ' + str(alert_dict.get(i)) + '\n'
+def send_to_telegram_v2(texts):
+    logging.info("send_to_telegram_v2数据内容日志: %s", texts)
 
     chatid = 'YOUR_CHAT_ID'  # 请替换为实际的 Telegram Chat ID
     auth_token = 'YOUR_BOT_TOKEN:YOUR_BOT_SECRET'  # 请替换为实际的 Telegram Bot Token
     telegram_url = 'https://api.telegram.org/bot' + auth_token + '/sendMessage'
-    push_data = {
-        "chat_id": chatid,
-        "text": data
-    }
-
-    requests.post(url=telegram_url, data=push_data, verify=False, proxies=proxies)
+    for message in pack_texts(texts, TELEGRAM_MAX_CHARS):
+        push_data = {
+            "chat_id": chatid,
+            "text": message
+        }
+        res = post_with_retry(telegram_url, session=SESSION, data=push_data, verify=False, proxies=proxies, timeout=SEND_TIMEOUT)
+        # 响应体用不到，只看状态码，不做解码；发送失败抛出异常
+        res.raise_for_status()
 
 #slack发送告警
-#定义函数向告警向slakc发送警告
-def send_to_slack(alert_dict):
-    #定义请求头部
-    request_header = {
-        "content-type": "application/json; charset=UTF-8"
-    }
+#定义函数向告警向slakc发送警告：每条告警一个 section block，一批告警通常只需一次 POST
+def send_to_slack(texts):
     #定义请求URL
     push_url = 'https://hooks.slack.com/services/YOUR_WORKSPACE/YOUR_CHANNEL/YOUR_TOKEN'  # 请替换为实际的 Slack Webhook URL
-    #定义要发送的数据
-    push_slack_data = {
-        "text": '\n'.join([f'{k}: {v}' for k, v in alert_dict.items()] + [f'<@U070YD6L19R>'])
-    }
-    #把数据转换为JSON格
-    push_slack_data = json.dumps(push_slack_data)
-    #发送POST请求
-    res = requests.post(url=push_url, headers=request_header, data=push_slack_data, proxies=proxies)
-    #处理返回的数据
-    try:
-        slack_json_data = res.json()
-    except ValueError:
-        logging.error('Slack无法解析的响应数据: %s', res.text)
-    else:
-        logging.info('Slack数据返回响应：\n%s', json.dumps(slack_json_data, indent=4, ensure_ascii=False))
+    for i in range(0, len(texts), SLACK_MAX_BLOCKS):
+        chunk = texts[i:i + SLACK_MAX_BLOCKS]
+        blocks = [
+            {"type": "section", "text": {"type": "mrkdwn", "text": text[:SLACK_SECTION_MAX_CHARS]}}
+            for text in chunk
+        ]
+        # @提醒放在最后一个 section 末尾，每条消息只提醒一次
+        last = blocks[-1]["text"]
+        last["text"] = last["text"][:SLACK_SECTION_MAX_CHARS - len(SLACK_MENTION) - 1] + '\n' + SLACK_MENTION
+        #定义要发送的数据：text 作为通知摘要与不支持 blocks 时的回退内容
+        push_slack_data = {
+            "text": ALERT_SEPARATOR.join(chunk) + '\n' + SLACK_MENTION,
+            "blocks": blocks
+        }
+        #把数据转换为JSON格
+        push_slack_data = json_body(push_slack_data)
+        #发送POST请求
+        res = post_with_retry(push_url, session=SESSION, headers=_SLACK_HEADERS, data=push_slack_data, proxies=proxies, timeout=SEND_TIMEOUT)
+        res.raise_for_status()
+        #处理返回的数据
+        try:
+            slack_json_data = res.json()
+        except ValueError:
+            logging.error('Slack无法解析的响应数据: %s', res.text)
+        else:
+            # 缩进 JSON 只用于排查，DEBUG 未开启时不做重新编码
+            if logging.root.isEnabledFor(logging.DEBUG):
+                logging.debug('Slack数据返回响应：\n%s', json_pretty(slack_json_data))
 
-# 判断是否为主程序，如果是则执行以下代码
-if __name__ == '__main__':
-    # Flask路由设置
-    @app.route('/webhook/', methods=['POST'])
-    def handle_webhook():
+# Flask路由设置
+@app.route('/webhook/', methods=['POST'])
+def handle_webhook():
+    try:
         #解析请求数据
-        data_dict = json.loads(request.data)
+        data_dict = json_loads(request.data)
         #记录数据字典
         logging.info("收到的数据字典: %s", data_dict)
-        try:
-            #从数据字典中获取警告信息
-            alerts = data_dict['alerts']
-            #处理每一个警告
-            for alert in alerts:
-                #格式化警告
+        #从数据字典中获取警告信息
+        alerts = data_dict['alerts']
+    except (ValueError, KeyError, TypeError) as e:
+        # 请求体不是合法 JSON 或没有 alerts 字段：重试也无用，返回 400
+        logging.error('数据格式错误: 没有 "alerts" 字段. 错误信息: %s', str(e))
+        return "bad request", 400
+    #本次登记的全部告警，意外异常时整体撤销
+    claimed = []
+    try:
+        #按渠道收集告警文本：每个渠道对整批告警只发一次（超长时才拆分）
+        batches = {send_alert: [], send_to_telegram_v2: [], send_to_telegram: [], send_to_slack: []}
+        #每个渠道这一批对应的去重登记，发送失败时撤销
+        claims = {sender: [] for sender in batches}
+        failed = False
+        for alert in alerts:
+            fp = alert_fingerprint(alert)
+            status = alert.get('status')
+            #窗口内重复推送的同一告警不再通知
+            if not claim_alert(fp, status):
+                logging.info("重复告警，跳过通知: %s", alert.get('labels'))
+                continue
+            claimed.append((fp, status))
+            #格式化警告
+            try:
                 alert_dict = format_alert(alert)
-                #发送警告
-                send_alert(alert_dict)
-                send_to_telegram_v2(alert_dict)
-                #如果警告等级是灾难，才发送到telegram
-                if alert_dict.get('severity') == '灾难':
-                    send_to_telegram(alert_dict)
-                # 只要 `environment` 变量存在，就发送到 Slack
-                if 'environment' in alert_dict:
-                    send_to_slack(alert_dict) 
-        except KeyError as e:
-            # 如果捕获到KeyError，则记录错误信息
-            logging.error('数据格式错误: 没有 "alerts" 字段. 错误信息: %s', str(e))
-        #返回确认信息
-        return "OK"
-
-    # 运行 Flask 服务器
+                text = format_alert_text(alert_dict)
+            except Exception as e:
+                release_alert(fp, status)
+                failed = True
+                logging.exception('告警格式化失败: %s', e)
+                continue
+            #发送警告
+            senders = [send_alert, send_to_telegram_v2]
+            #如果警告等级是灾难，才发送到telegram
+            if alert_dict.get('severity') == '灾难':
+                senders.append(send_to_telegram)
+            # 只要 `environment` 变量存在，就发送到 Slack
+            if 'environment' in alert_dict:
+                senders.append(send_to_slack)
+            for sender in senders:
+                batches[sender].append(text)
+                claims[sender].append((fp, status))
+        #各渠道并发发送，总耗时约为最慢的一个渠道
+        futures = [
+            (sender, _send_executor.submit(sender, texts))
+            for sender, texts in batches.items() if texts
+        ]
+        #等待全部发送完成；单个渠道失败不影响其它渠道，但撤销该渠道这批告警的去重登记
+        for sender, future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                failed = True
+                logging.exception('%s 发送失败: %s', sender.__name__, e)
+                for fp, status in claims[sender]:
+                    release_alert(fp, status)
+    except Exception as e:
+        logging.exception('处理告警失败: %s', e)
+        for fp, status in claimed:
+            release_alert(fp, status)
+        return "error", 500
+    #有告警没能发出时返回 500，Alertmanager 会重试；已成功通知的告警重试时按重复跳过
+    if failed:
+        return "error", 500
+    #返回确认信息
+    return "OK"
+
+# 生产环境用 gunicorn 多线程运行（Flask 自带服务器仅用于本地调试）：
+#   gunicorn -w 1 -k gthread --threads 32 -b 0.0.0.0:8081 \
+#       --max-requests 10000 --max-requests-jitter 1000 --chdir archive/old_py 'webhook_nginx_8081:app'
+# 告警去重记录在进程内，多个 worker 之间不共享，因此只用 1 个 worker、靠线程并发；
+# 模块级线程池、会话与日志监听线程需在 worker 内创建，不要加 --preload
+if __name__ == '__main__':
     app.run(debug = False, host = '0.0.0.0', port = 8081)
\ No newline at end of file
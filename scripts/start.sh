@@ -14,7 +14,8 @@ PYTHON_CMD="${PYTHON_CMD:-python3.9}"  # 默认使用 python3.9
 CONFIG_FILE="${CONFIG_FILE:-${SCRIPT_DIR}/config.yaml}"  # 支持外部指定配置文件路径
 
 # 工作进程数和超时时间（可以通过环境变量覆盖）
-WORKERS="${WORKERS:-4}"
+# WORKERS 未设置时依次取 WEB_CONCURRENCY、CPU 核数 * 2 + 1（由 app.py 计算）
+WORKERS="${WORKERS:-${WEB_CONCURRENCY:-}}"
 TIMEOUT="${TIMEOUT:-30}"
 
 # 注意：host 和 port 配置从 config.yaml 读取，应用启动时会自动读取
@@ -113,7 +114,7 @@ start_service() {
     fi
     
     log_info "正在启动 ${PROJECT_NAME} 服务..."
-    log_info "工作进程数: ${WORKERS}"
+    log_info "工作进程数: ${WORKERS:-自动（CPU 核数 * 2 + 1）}"
     log_info "日志文件: ${LOG_FILE}"
     log_info "配置文件: ${CONFIG_FILE}"
     
@@ -308,7 +309,7 @@ main() {
             echo ""
             echo "配置说明:"
             echo "  HOST/PORT - 从 config.yaml 的 server 配置读取"
-            echo "  WORKERS   - 工作进程数（默认: 4，可通过环境变量覆盖）"
+            echo "  WORKERS   - 工作进程数（默认: WEB_CONCURRENCY，未设置时为 CPU 核数 * 2 + 1）"
             echo "  TIMEOUT   - 超时时间（默认: 30，可通过环境变量覆盖）"
             exit 1
             ;;